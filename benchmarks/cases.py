@@ -0,0 +1,173 @@
+# © 2017-2018, ETH Zurich, Institut für Theoretische Physik
+# Author:  Dominik Gresch <greschd@gmx.ch>
+"""
+Defines the symmetry problems used in the benchmarks.
+"""
+
+from collections import namedtuple
+
+import sympy as sp
+from sympy.core.numbers import I
+import sympy.physics.matrices as sm
+from sympy.physics.quantum import TensorProduct
+import symmetry_representation as sr
+
+import kdotp_symmetry as kp
+
+BenchmarkCase = namedtuple(
+    'BenchmarkCase', ['symmetry_operations', 'repr_basis', 'max_order']
+)
+
+
+def si_case(*, spinful):
+    """
+    Silicon (diamond structure) with sp3 orbitals on the two sites, as in ``examples/Si``. By default, the spinful case only runs the lowest order, since it takes more than a minute already for the linear order.
+    """
+    spins = (sr.SPIN_UP, sr.SPIN_DOWN) if spinful else (sr.NO_SPIN, )
+    orbitals = [
+        sr.Orbital(position=coord, function_string=fct, spin=spin)
+        for spin in spins for coord in (
+            sp.Matrix([sp.Rational(1, 2)] * 3),
+            sp.Matrix([sp.Rational(3, 4)] * 3)
+        ) for fct in sr.WANNIER_ORBITALS['sp3']
+    ]
+    translation = sp.Matrix([sp.Rational(1, 4)] * 3)
+    operations = [
+        (
+            sp.Matrix([[1, 1, 1], [0, -1, 0], [0, 0, -1]]), translation,
+            sp.Matrix([[-1, 0, 0], [0, 0, 1], [0, 1, 0]])
+        ),
+        (
+            sp.Matrix([[1, 1, 1], [0, 0, -1], [0, -1, 0]]), translation,
+            sp.Matrix([[-1, 0, 0], [0, 1, 0], [0, 0, 1]])
+        ),
+        (
+            sp.Matrix([[1, 0, 0], [-1, -1, -1], [0, 0, 1]]), sp.zeros(3, 1),
+            sp.Matrix([[0, 0, -1], [0, 1, 0], [-1, 0, 0]])
+        ),
+    ]
+    symmetry_operations = [
+        sr.SymmetryOperation.from_orbitals(
+            orbitals=orbitals,
+            real_space_operator=sr.RealSpaceOperator(
+                rotation_matrix=rotation, translation_vector=translation
+            ),
+            rotation_matrix_cartesian=rotation_cartesian,
+            numeric=False
+        ) for rotation, translation, rotation_cartesian in operations
+    ]
+    symmetry_operations.append(
+        sr.get_time_reversal(orbitals=orbitals, numeric=False)
+    )
+    return BenchmarkCase(
+        symmetry_operations=symmetry_operations,
+        repr_basis=kp.hermitian_basis(len(orbitals)),
+        max_order=0 if spinful else 3
+    )
+
+
+def taas2_case():
+    """
+    TaAs2 with four bands in the basis of tensor products of Pauli matrices, as in ``examples/TaAs2``.
+    """
+    pauli_vec = [sp.eye(2), *(sm.msigma(i) for i in range(1, 4))]
+    symmetry_operations = [
+        sr.SymmetryOperation(
+            rotation_matrix=[[0, 1, 0], [1, 0, 0], [0, 0, -1]],
+            repr_matrix=sp.diag(I, -I, I, -I),
+            repr_has_cc=False,
+            numeric=False
+        ),
+        sr.SymmetryOperation(
+            rotation_matrix=-sp.eye(3),
+            repr_matrix=sp.diag(1, 1, -1, -1),
+            repr_has_cc=False,
+            numeric=False
+        ),
+        sr.SymmetryOperation(
+            rotation_matrix=sp.eye(3),
+            repr_matrix=TensorProduct(sp.eye(2), sp.Matrix([[0, -1], [1, 0]])),
+            repr_has_cc=True,
+            numeric=False
+        ),
+    ]
+    return BenchmarkCase(
+        symmetry_operations=symmetry_operations,
+        repr_basis=[
+            TensorProduct(p1, p2) for p1 in pauli_vec for p2 in pauli_vec
+        ],
+        max_order=4
+    )
+
+
+def point_group_case(rotations, *, orbitals):
+    """
+    Spinless orbitals at a single site, for the point group generated by the given (cartesian) rotations, inversion and time-reversal. The orbitals are either ``'p'``, or ``'sp'``.
+    """
+    if orbitals not in ('p', 'sp'):
+        raise ValueError("Invalid orbitals '{}'.".format(orbitals))
+
+    def orbital_repr(rotation):
+        """
+        Returns the representation of a rotation on the orbitals.
+        """
+        if orbitals == 'p':
+            return rotation
+        return sp.diag(1, rotation)
+
+    symmetry_operations = [
+        sr.SymmetryOperation(
+            rotation_matrix=rotation,
+            repr_matrix=orbital_repr(rotation),
+            repr_has_cc=False,
+            numeric=False
+        ) for rotation in list(rotations) + [-sp.eye(3)]
+    ]
+    symmetry_operations.append(
+        sr.SymmetryOperation(
+            rotation_matrix=sp.eye(3),
+            repr_matrix=sp.eye(orbital_repr(sp.eye(3)).shape[0]),
+            repr_has_cc=True,
+            numeric=False
+        )
+    )
+    return BenchmarkCase(
+        symmetry_operations=symmetry_operations,
+        repr_basis='auto',
+        max_order=4
+    )
+
+
+def cubic_case(*, orbitals):
+    """
+    The cubic point group :math:`O_h`, generated by the fourfold rotation around z and the threefold rotation around (111).
+    """
+    return point_group_case([
+        sp.Matrix([[0, -1, 0], [1, 0, 0], [0, 0, 1]]),
+        sp.Matrix([[0, 0, 1], [1, 0, 0], [0, 1, 0]])
+    ],
+                            orbitals=orbitals)
+
+
+def hexagonal_case(*, orbitals):
+    """
+    The hexagonal point group :math:`D_{6h}`, generated by the sixfold rotation around z and the twofold rotation around x. The sixfold rotation has irrational entries.
+    """
+    half = sp.Rational(1, 2)
+    sqrt_3 = sp.sqrt(3)
+    return point_group_case([
+        sp.Matrix([[half, -sqrt_3 / 2, 0], [sqrt_3 / 2, half, 0], [0, 0, 1]]),
+        sp.diag(1, -1, -1)
+    ],
+                            orbitals=orbitals)
+
+
+CASES = {
+    'si_spinless': lambda: si_case(spinful=False),
+    'si_spinful': lambda: si_case(spinful=True),
+    'taas2': taas2_case,
+    'cubic_p': lambda: cubic_case(orbitals='p'),
+    'cubic_sp': lambda: cubic_case(orbitals='sp'),
+    'hexagonal_p': lambda: hexagonal_case(orbitals='p'),
+    'hexagonal_sp': lambda: hexagonal_case(orbitals='sp'),
+}
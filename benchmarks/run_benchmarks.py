@@ -0,0 +1,395 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# © 2017-2018, ETH Zurich, Institut für Theoretische Physik
+# Author:  Dominik Gresch <greschd@gmx.ch>
+"""
+Runs the benchmarks of kdotp-symmetry, and compares the results to a stored baseline.
+
+Each benchmark times one function on the problems defined in ``cases.py``, for the orders of :math:`\\mathbf{k}` up to the maximum order of the case. The wall time and CPU time are the minimum over the repetitions, and the peak memory is measured with :py:mod:`tracemalloc` in a separate run. The results of each run are appended to a JSON history file.
+
+If a baseline file exists, the results are compared to it, and the script exits with a non-zero status if any benchmark became slower or uses more memory than allowed by the ``--threshold``. The baseline is created or updated with ``--save-baseline``.
+
+Example::
+
+    python benchmarks/run_benchmarks.py --cases taas2 cubic_p --orders 0 1 2
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+import platform
+import subprocess
+import tracemalloc
+
+import sympy as sp
+
+import kdotp_symmetry as kp
+from kdotp_symmetry._expr_utils import expr_to_vector, matrix_to_expr_operator, _polynomial_basis_index
+from kdotp_symmetry._repr_utils import hermitian_to_vector, repr_to_matrix_operator
+from kdotp_symmetry._linalg import nullspace_blocked, zassenhaus, sparse_kron
+from kdotp_symmetry._symmetric_hamiltonian import _get_repr_data, _get_expr_matrices
+
+from cases import CASES
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def bench_symmetric_hamiltonian(case, *, expr_basis, repr_data):  # pylint: disable=unused-argument
+    """
+    Calculates the basis of the symmetric Hamiltonian.
+    """
+    return lambda: kp.symmetric_hamiltonian(
+        *case.symmetry_operations,
+        expr_basis=expr_basis,
+        repr_basis=case.repr_basis
+    )
+
+
+def bench_nullspace_blocked(case, *, expr_basis, repr_data):  # pylint: disable=unused-argument
+    r"""
+    Calculates the nullspaces of (F \otimes G - 1) for each symmetry operation.
+    """
+    matrices = _nullspace_matrices(expr_basis=expr_basis, repr_data=repr_data)
+
+    def run():
+        for mat in matrices:
+            nullspace_blocked(mat, simplify=sp.nsimplify)
+
+    return run
+
+
+def bench_zassenhaus(case, *, expr_basis, repr_data):  # pylint: disable=unused-argument
+    """
+    Intersects the invariant subspaces of the first two symmetry operations.
+    """
+    basis_a, basis_b = [
+        [list(vec) for vec in nullspace_blocked(mat, simplify=sp.nsimplify)]
+        for mat in
+        _nullspace_matrices(expr_basis=expr_basis, repr_data=repr_data)[:2]
+    ]
+    return lambda: zassenhaus(basis_a, basis_b)
+
+
+def bench_expr_to_vector(case, *, expr_basis, repr_data):  # pylint: disable=unused-argument
+    """
+    Converts the images of the expression basis under each symmetry operation to vectors.
+    """
+    images = [
+        matrix_to_expr_operator(
+            sp.Matrix(element.rotation_matrix),
+            repr_has_cc=element.repr_has_cc
+        )(expr) for element in repr_data.generators for expr in expr_basis
+    ]
+
+    def run():
+        for expr in images:
+            expr_to_vector(expr, expr_basis)
+
+    return run
+
+
+def bench_hermitian_to_vector(case, *, expr_basis, repr_data):  # pylint: disable=unused-argument
+    """
+    Converts the images of the representation basis under each symmetry operation to vectors.
+    """
+    repr_basis = repr_data.repr_basis
+    images = [
+        repr_to_matrix_operator(
+            element.repr_matrix, complex_conjugate=element.repr_has_cc
+        )(mat) for element in repr_data.generators for mat in repr_basis
+    ]
+
+    def run():
+        for mat in images:
+            hermitian_to_vector(mat, repr_basis)
+
+    return run
+
+
+BENCHMARKS = {
+    'symmetric_hamiltonian': bench_symmetric_hamiltonian,
+    'nullspace_blocked': bench_nullspace_blocked,
+    'zassenhaus': bench_zassenhaus,
+    'expr_to_vector': bench_expr_to_vector,
+    'hermitian_to_vector': bench_hermitian_to_vector,
+}
+# benchmarks which do not depend on the expression basis are only run once
+# per case
+ORDER_INDEPENDENT = {'hermitian_to_vector'}
+
+
+def _nullspace_matrices(*, expr_basis, repr_data):
+    r"""
+    Returns the matrices (F \otimes G - 1) for the generators of the symmetry group.
+    """
+    res = []
+    for expr_mat, repr_mat in zip(
+        _get_expr_matrices(repr_data.generators, expr_basis=expr_basis),
+        repr_data.generator_repr_matrices
+    ):
+        full_mat = sparse_kron(expr_mat, repr_mat)
+        res.append(full_mat - sp.SparseMatrix.eye(full_mat.shape[0]))
+    return res
+
+
+def _clear_caches():
+    """
+    Clears the in-memory caches, such that each repetition does the full calculation.
+    """
+    kp.clear_matrix_cache()
+    _polynomial_basis_index.cache_clear()
+
+
+def measure(func, *, repeat):
+    """
+    Returns the minimum wall time and CPU time of calling ``func``, and its peak memory.
+    """
+    wall_times = []
+    cpu_times = []
+    for _ in range(repeat):
+        _clear_caches()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        func()
+        cpu_times.append(time.process_time() - cpu_start)
+        wall_times.append(time.perf_counter() - wall_start)
+    # tracemalloc slows down the calculation, so the memory is measured in
+    # a separate run
+    _clear_caches()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return dict(
+        wall_time=min(wall_times),
+        cpu_time=min(cpu_times),
+        peak_memory=peak_memory
+    )
+
+
+def run_benchmarks(*, cases, functions, orders, repeat):
+    """
+    Runs the given benchmarks, and returns a dictionary mapping the name of each benchmark to its result.
+    """
+    results = {}
+    for case_name in cases:
+        case = CASES[case_name]()
+        repr_data = _get_repr_data(
+            case.symmetry_operations, repr_basis=case.repr_basis
+        )
+        case_orders = list(orders or range(case.max_order + 1))
+        for function_name in functions:
+            if function_name in ORDER_INDEPENDENT:
+                names = {
+                    case_orders[0]: '{}/{}'.format(function_name, case_name)
+                }
+            else:
+                names = {
+                    order:
+                    '{}/{}/order_{}'.format(function_name, case_name, order)
+                    for order in case_orders
+                }
+            for order, name in names.items():
+                func = BENCHMARKS[function_name](
+                    case,
+                    expr_basis=kp.monomial_basis(order),
+                    repr_data=repr_data
+                )
+                results[name] = measure(func, repeat=repeat)
+                print(_format_result(name, results[name]), flush=True)
+    return results
+
+
+def compare(results, baseline, *, threshold, min_time, min_memory):
+    """
+    Compares the results to the baseline, and returns the names of the benchmarks which regressed. Increases of the wall time below ``min_time`` seconds, and of the peak memory below ``min_memory`` bytes, are ignored since they are dominated by noise.
+    """
+    regressions = []
+    for name, res in sorted(results.items()):
+        if name not in baseline:
+            continue
+        ref = baseline[name]
+        time_ratio = res['wall_time'] / max(ref['wall_time'], 1e-12)
+        memory_ratio = res['peak_memory'] / max(ref['peak_memory'], 1)
+        slower = (
+            time_ratio > threshold
+            and res['wall_time'] - ref['wall_time'] > min_time
+        )
+        larger = (
+            memory_ratio > threshold
+            and res['peak_memory'] - ref['peak_memory'] > min_memory
+        )
+        print(
+            '{:<60} time: {:6.2f}x  memory: {:6.2f}x{}'.format(
+                name, time_ratio, memory_ratio,
+                '  REGRESSION' if slower or larger else ''
+            )
+        )
+        if slower or larger:
+            regressions.append(name)
+    return regressions
+
+
+def _format_result(name, res):
+    """
+    Formats a single benchmark result for printing.
+    """
+    return '{:<60} wall: {:9.4f} s  cpu: {:9.4f} s  peak memory: {:9.2f} MiB'.format(
+        name, res['wall_time'], res['cpu_time'], res['peak_memory'] / 2**20
+    )
+
+
+def _git_revision():
+    """
+    Returns the current git revision, or None if it can not be determined.
+    """
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                       cwd=BENCHMARK_DIR,
+                                       stderr=subprocess.DEVNULL
+                                       ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _load_json(path, default):
+    """
+    Loads a JSON file, or returns the ``default`` if the file does not exist.
+    """
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r') as in_file:
+        return json.load(in_file)
+
+
+def _dump_json(data, path):
+    """
+    Writes the data to a JSON file.
+    """
+    with open(path, 'w') as out_file:
+        json.dump(data, out_file, indent=2, sort_keys=True)
+
+
+def main(argv=None):
+    """
+    Runs the benchmarks given on the command line, and returns the exit status.
+    """
+    parser = argparse.ArgumentParser(
+        description='Run the kdotp-symmetry benchmarks.'
+    )
+    parser.add_argument(
+        '--cases',
+        nargs='+',
+        choices=sorted(CASES),
+        default=sorted(CASES),
+        help='The symmetry problems to run.'
+    )
+    parser.add_argument(
+        '--functions',
+        nargs='+',
+        choices=sorted(BENCHMARKS),
+        default=list(BENCHMARKS),
+        help='The functions to benchmark.'
+    )
+    parser.add_argument(
+        '--orders',
+        nargs='+',
+        type=int,
+        help=
+        'The orders of k. Defaults to all orders up to the maximum order of each case.'
+    )
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=3,
+        help='Number of repetitions of the timing.'
+    )
+    parser.add_argument(
+        '--history',
+        default=os.path.join(BENCHMARK_DIR, 'history.json'),
+        help='JSON file to which the results are appended.'
+    )
+    parser.add_argument(
+        '--baseline',
+        default=os.path.join(BENCHMARK_DIR, 'baseline.json'),
+        help='JSON file containing the baseline results.'
+    )
+    parser.add_argument(
+        '--save-baseline',
+        action='store_true',
+        help='Store the results as the new baseline.'
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=1.5,
+        help='Maximum allowed ratio of the results to the baseline.'
+    )
+    parser.add_argument(
+        '--min-time',
+        type=float,
+        default=0.01,
+        help=
+        'Minimum increase of the wall time (in seconds) which is considered a regression.'
+    )
+    parser.add_argument(
+        '--min-memory',
+        type=float,
+        default=0.1,
+        help=
+        'Minimum increase of the peak memory (in MiB) which is considered a regression.'
+    )
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error('The number of repetitions must be positive.')
+
+    results = run_benchmarks(
+        cases=args.cases,
+        functions=args.functions,
+        orders=args.orders,
+        repeat=args.repeat
+    )
+
+    history = _load_json(args.history, default=[])
+    history.append(
+        dict(
+            timestamp=datetime.datetime.now().isoformat(),
+            git_revision=_git_revision(),
+            kdotp_symmetry_version=kp.__version__,
+            sympy_version=sp.__version__,
+            python_version=platform.python_version(),
+            platform=platform.platform(),
+            results=results
+        )
+    )
+    _dump_json(history, args.history)
+
+    baseline = _load_json(args.baseline, default={})
+    regressions = []
+    if baseline:
+        print('\nComparison to the baseline {}:'.format(args.baseline))
+        regressions = compare(
+            results,
+            baseline,
+            threshold=args.threshold,
+            min_time=args.min_time,
+            min_memory=args.min_memory * 2**20
+        )
+    if args.save_baseline:
+        baseline.update(results)
+        _dump_json(baseline, args.baseline)
+        print('\nSaved the baseline to {}.'.format(args.baseline))
+    if regressions:
+        print('\n{} benchmarks regressed.'.format(len(regressions)))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
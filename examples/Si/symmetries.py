@@ -52,18 +52,18 @@ symmetry_generators = [
 ]
 
 
-def print_result(order):
-    """prints the basis for a given order of k"""
-    print('Order:', order)
-    for m in kp.symmetric_hamiltonian(
+def print_results(orders):
+    """prints the basis for the given orders of k"""
+    for order, result in kp.symmetric_hamiltonian_orders(
         *symmetry_generators,
-        expr_basis=kp.monomial_basis(order),
+        orders=orders,
         repr_basis=kp.hermitian_basis(len(orbitals))
     ):
-        print(m)
-    print()
+        print('Order:', order)
+        for m in result:
+            print(m)
+        print()
 
 
 if __name__ == '__main__':
-    for i in range(2):
-        print_result(order=i)
+    print_results(orders=range(2))
@@ -37,20 +37,16 @@ time_reversal = sr.SymmetryOperation(
 )
 
 
-def print_result(order):
-    """prints the basis for a given order of k"""
-    print('Order:', order)
-    for m in kp.symmetric_hamiltonian(
-        c2y,
-        parity,
-        time_reversal,
-        expr_basis=kp.monomial_basis(order),
-        repr_basis=basis
+def print_results(orders):
+    """prints the basis for the given orders of k"""
+    for order, result in kp.symmetric_hamiltonian_orders(
+        c2y, parity, time_reversal, orders=orders, repr_basis=basis
     ):
-        print(m)
-    print()
+        print('Order:', order)
+        for m in result:
+            print(m)
+        print()
 
 
 if __name__ == '__main__':
-    for i in range(3):
-        print_result(order=i)
+    print_results(orders=range(3))
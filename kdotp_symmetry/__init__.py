@@ -7,5 +7,13 @@ __version__ = '1.0.1'
 from ._expr_utils import *
 from ._repr_utils import *
 from ._symmetric_hamiltonian import *
+from ._numeric_hamiltonian import *
+from ._cache import *
+from ._to_matrix import *
+from ._hamiltonian_basis import *
+from ._evaluator import *
+from ._bands import *
+from ._fit import *
+from ._profiling import *
 
-__all__ = _expr_utils.__all__ + _repr_utils.__all__ + _symmetric_hamiltonian.__all__  # pylint: disable=undefined-variable
+__all__ = _expr_utils.__all__ + _repr_utils.__all__ + _symmetric_hamiltonian.__all__ + _numeric_hamiltonian.__all__ + _cache.__all__ + _to_matrix.__all__ + _hamiltonian_basis.__all__ + _evaluator.__all__ + _bands.__all__ + _fit.__all__ + _profiling.__all__  # pylint: disable=undefined-variable
@@ -0,0 +1,171 @@
+# © 2017-2018, ETH Zurich, Institut für Theoretische Physik
+# Author:  Dominik Gresch <greschd@gmx.ch>
+"""
+Defines functions to compute the band structure of the symmetric Hamiltonian on large sets of k-points.
+"""
+
+import os
+import functools
+
+import numpy as np
+from fsc.export import export
+
+from ._evaluator import to_evaluator
+from ._parallel import check_executor, executor_context, executor_map
+from ._logging_setup import LOGGER
+
+
+@export
+def band_structure(
+    basis,
+    coefficients,
+    k_points,
+    *,
+    eigenvectors=False,
+    chunk_size=10000,
+    executor=None,
+    max_workers=None,
+    eigenvalues_path=None,
+    eigenvectors_path=None
+):
+    r"""
+    Calculates the eigenvalues (and optionally eigenvectors) of the Hamiltonian given by the ``basis`` and ``coefficients`` at the given :math:`\mathbf{k}`-points.
+
+    The :math:`\mathbf{k}`-points are processed in chunks, such that only the Hamiltonian matrices of one chunk per worker are kept in memory. Each chunk is diagonalized with a single call to :py:func:`numpy.linalg.eigh`.
+
+    :param basis: Basis of the symmetric Hamiltonian, as returned by :py:func:`.symmetric_hamiltonian`, or the :py:class:`.HamiltonianEvaluator` created from it.
+    :type basis: :py:class:`list` of :py:mod:`sympy` matrices, :py:class:`.SymmetricHamiltonianBasis`, or :py:class:`.HamiltonianEvaluator`
+
+    :param coefficients: Coefficients of the basis elements.
+    :type coefficients: array-like
+
+    :param k_points: The :math:`\mathbf{k}`-points, as an array of shape ``(N, 3)``.
+    :type k_points: array-like
+
+    :param eigenvectors: Flag to enable computing the eigenvectors.
+    :type eigenvectors: bool
+
+    :param chunk_size: Number of :math:`\mathbf{k}`-points which are diagonalized at once.
+    :type chunk_size: int
+
+    :param executor: Determines how the chunks are computed. If ``None``, they are computed one after another in the current process. If ``'process'``, a :py:class:`concurrent.futures.ProcessPoolExecutor` is created for the duration of the call. Otherwise, the given :py:class:`concurrent.futures.Executor` is used. The result does not depend on the executor.
+    :type executor: None, str, concurrent.futures.Executor
+
+    :param max_workers: The number of worker processes when ``executor`` is ``'process'``. Defaults to the number of processors.
+    :type max_workers: int
+
+    :param eigenvalues_path: If given, the eigenvalues are written to a memory-mapped ``.npy`` file at this path, instead of being kept in memory.
+    :type eigenvalues_path: str
+
+    :param eigenvectors_path: If given, the eigenvectors are written to a memory-mapped ``.npy`` file at this path.
+    :type eigenvectors_path: str
+
+    :returns: The eigenvalues, as an array of shape ``(N, dim)`` in ascending order for each :math:`\mathbf{k}`-point. If ``eigenvectors`` is set, a tuple of the eigenvalues and the eigenvectors of shape ``(N, dim, dim)`` is returned, where the eigenvectors are the columns as in :py:func:`numpy.linalg.eigh`.
+    """
+    check_executor(executor)
+    if chunk_size < 1:
+        raise ValueError(
+            'The chunk size must be positive, got {}.'.format(chunk_size)
+        )
+    if eigenvectors_path is not None and not eigenvectors:
+        raise ValueError(
+            "The 'eigenvectors_path' can only be given if 'eigenvectors' is set."
+        )
+    basis = to_evaluator(basis)
+    coefficients = np.asarray(coefficients)
+    if coefficients.ndim != 1:
+        raise ValueError(
+            'The coefficients must be one-dimensional, got shape {}.'.format(
+                coefficients.shape
+            )
+        )
+    k_points = np.asarray(k_points, dtype=float)
+
+    outputs = _create_outputs(
+        num_k=len(k_points),
+        dim=basis.dim,
+        eigenvectors=eigenvectors,
+        eigenvalues_path=eigenvalues_path,
+        eigenvectors_path=eigenvectors_path
+    )
+    _compute_chunks(
+        functools.partial(
+            _chunk_eigh,
+            evaluator=basis,
+            coefficients=coefficients,
+            eigenvectors=eigenvectors
+        ),
+        k_points,
+        outputs=outputs,
+        chunk_size=chunk_size,
+        executor=executor,
+        max_workers=max_workers
+    )
+    if eigenvectors:
+        return tuple(outputs)
+    return outputs[0]
+
+
+def _create_outputs(
+    *, num_k, dim, eigenvectors, eigenvalues_path, eigenvectors_path
+):
+    """
+    Creates the output arrays for the eigenvalues, and the eigenvectors if they are computed.
+    """
+    outputs = [
+        _create_output(eigenvalues_path, shape=(num_k, dim), dtype=float)
+    ]
+    if eigenvectors:
+        outputs.append(
+            _create_output(
+                eigenvectors_path, shape=(num_k, dim, dim), dtype=complex
+            )
+        )
+    return outputs
+
+
+def _create_output(path, *, shape, dtype):
+    """
+    Creates the output array, as a memory-mapped ``.npy`` file if a ``path`` is given.
+    """
+    if path is None:
+        return np.empty(shape, dtype=dtype)
+    return np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+
+
+def _compute_chunks(
+    func, k_points, *, outputs, chunk_size, executor, max_workers
+):
+    """
+    Applies ``func`` to the chunks of k-points with the given executor, and writes each of the results it returns to the corresponding output array.
+    """
+    chunk_starts = list(range(0, len(k_points), chunk_size))
+    LOGGER.info(
+        'Calculating the band structure in %s chunks.', len(chunk_starts)
+    )
+    # the chunks are submitted in groups, such that the results which are
+    # not yet written to the output are bounded
+    group_size = 2 * (max_workers or os.cpu_count() or 1)
+    with executor_context(executor, max_workers=max_workers) as chunk_executor:
+        for group_start in range(0, len(chunk_starts), group_size):
+            starts = chunk_starts[group_start:group_start + group_size]
+            results = executor_map(
+                func, [k_points[start:start + chunk_size] for start in starts],
+                executor=chunk_executor
+            )
+            for start, res in zip(starts, results):
+                for out, chunk_res in zip(outputs, res):
+                    out[start:start + chunk_size] = chunk_res
+    for out in outputs:
+        if isinstance(out, np.memmap):
+            out.flush()
+
+
+def _chunk_eigh(k_points, *, evaluator, coefficients, eigenvectors):
+    """
+    Diagonalizes the Hamiltonian for a chunk of k-points. Returns a tuple of the eigenvalues, and the eigenvectors if they are computed.
+    """
+    hamiltonians = evaluator(k_points, coefficients)
+    if eigenvectors:
+        return tuple(np.linalg.eigh(hamiltonians))
+    return (np.linalg.eigvalsh(hamiltonians), )
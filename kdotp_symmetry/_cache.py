@@ -0,0 +1,270 @@
+# © 2017-2018, ETH Zurich, Institut für Theoretische Physik
+# Author:  Dominik Gresch <greschd@gmx.ch>
+"""
+Defines a persistent on-disk cache for the basis of the symmetric Hamiltonian.
+"""
+
+import os
+import json
+import fcntl
+import hashlib
+import tempfile
+import contextlib
+from fractions import Fraction
+
+import sympy as sp
+from fsc.export import export
+
+from . import __version__
+from ._gaussian_rational import to_fraction_pair, fraction_pair_to_sympy
+from ._logging_setup import LOGGER
+
+
+@export
+class ResultCache:
+    """
+    Cache which stores the coefficients of the results of :py:func:`.symmetric_hamiltonian` as files in a local directory, such that they can be re-used across processes. The entries are identified by a hash of the problem, and stamped with the version of kdotp-symmetry that created them. Entries written by a different version are ignored.
+
+    Writes to the cache are protected by a file lock, such that the same directory can be shared by concurrent processes. When the total size of the entries exceeds ``max_size``, the least recently used entries are removed.
+
+    The coefficients are stored as plain integers, such that reading an entry never evaluates its content. Only results whose coefficients are (complex) rational numbers are stored. Entries which can not be read are treated as missing, and removed.
+
+    :param directory: Path of the cache directory. It is created if it does not exist.
+    :type directory: str
+
+    :param max_size: Maximum total size of the cache entries, in bytes.
+    :type max_size: int
+    """
+    _SUFFIX = '.json'
+    _LOCK_NAME = '.lock'
+
+    def __init__(self, directory, *, max_size=100 * 2**20):
+        self.directory = os.path.abspath(directory)
+        self.max_size = max_size
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get(self, key):
+        """
+        Returns the cached coefficients for the given ``key``, or ``None`` if they are not in the cache.
+
+        :param key: The hash of the problem, as returned by :func:`problem_key`.
+        :type key: str
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r') as in_file:
+                entry = json.load(in_file)
+        except OSError:
+            return None
+        except ValueError:
+            self._remove_invalid(path)
+            return None
+        if not isinstance(entry, dict):
+            self._remove_invalid(path)
+            return None
+        if entry.get('version') != __version__ or entry.get('key') != key:
+            LOGGER.info('Ignoring cache entry from a different version.')
+            return None
+        try:
+            coefficients = _decode_coefficients(entry['coefficients'])
+        except (
+            KeyError, TypeError, ValueError, IndexError, ZeroDivisionError
+        ):
+            self._remove_invalid(path)
+            return None
+        # update the access time used for the eviction
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        return coefficients
+
+    def set(self, key, coefficients):
+        """
+        Stores the ``coefficients`` for the given ``key``, and removes the least recently used entries if the cache exceeds its maximum size.
+
+        :param key: The hash of the problem, as returned by :func:`problem_key`.
+        :type key: str
+
+        :param coefficients: Coefficients of the basis of the symmetric Hamiltonian, as in :py:class:`.SymmetricHamiltonianBasis`.
+        :type coefficients: sympy.SparseMatrix
+        """
+        try:
+            encoded_coefficients = _encode_coefficients(coefficients)
+        except ValueError:
+            LOGGER.info(
+                'Not storing result %s, since its coefficients are not rational.',
+                key
+            )
+            return
+        entry = dict(
+            version=__version__, key=key, coefficients=encoded_coefficients
+        )
+        with self._lock():
+            # write to a temporary file first, such that readers never see
+            # a partially written entry
+            file_descriptor, tmp_path = tempfile.mkstemp(
+                dir=self.directory, suffix='.tmp'
+            )
+            try:
+                with os.fdopen(file_descriptor, 'w') as out_file:
+                    json.dump(entry, out_file)
+                os.replace(tmp_path, self._path(key))
+            except BaseException:
+                with contextlib.suppress(OSError):
+                    os.remove(tmp_path)
+                raise
+            self._evict()
+
+    def clear(self):
+        """
+        Removes all entries from the cache.
+        """
+        with self._lock():
+            for path, _, _ in self._entries():
+                with contextlib.suppress(OSError):
+                    os.remove(path)
+
+    def _remove_invalid(self, path):
+        """
+        Removes a cache entry which can not be read.
+        """
+        LOGGER.warning('Removing invalid cache entry %s.', path)
+        with self._lock():
+            with contextlib.suppress(OSError):
+                os.remove(path)
+
+    def _path(self, key):
+        """
+        Returns the path of the cache entry for the given ``key``.
+        """
+        return os.path.join(self.directory, key + self._SUFFIX)
+
+    @contextlib.contextmanager
+    def _lock(self):
+        """
+        Context manager which holds an exclusive lock on the cache directory.
+        """
+        with open(
+            os.path.join(self.directory, self._LOCK_NAME), 'w'
+        ) as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _entries(self):
+        """
+        Returns the path, size and modification time of all cache entries.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(self._SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            with contextlib.suppress(OSError):
+                stat = os.stat(path)
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self):
+        """
+        Removes the least recently used entries until the total size is below the maximum size. Must be called while holding the lock.
+        """
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total_size = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total_size <= self.max_size:
+                break
+            LOGGER.info('Removing cache entry %s.', path)
+            with contextlib.suppress(OSError):
+                os.remove(path)
+            total_size -= size
+
+
+def _encode_coefficients(coefficients):
+    """
+    Converts the coefficients into a JSON-compatible form, where each value is given by the integers ``[re_num, re_den, im_num, im_den]`` of its real and imaginary parts. Raises a ValueError if a value is not a (complex) rational number.
+    """
+    coefficients = sp.SparseMatrix(coefficients)
+    entries = []
+    for i, j, val in coefficients.row_list():
+        fraction_pair = to_fraction_pair(val)
+        if fraction_pair is None:
+            raise ValueError(
+                'The value {} is not a rational number.'.format(val)
+            )
+        real_part, imag_part = fraction_pair
+        entries.append([
+            i, j,
+            [
+                real_part.numerator, real_part.denominator,
+                imag_part.numerator, imag_part.denominator
+            ]
+        ])
+    return dict(shape=list(coefficients.shape), entries=entries)
+
+
+def _decode_coefficients(data):
+    """
+    Converts the JSON-compatible form created by :func:`_encode_coefficients` back into a sparse matrix. Raises an error if the data is not in the expected form.
+    """
+    num_rows, num_cols = data['shape']
+    _check_integers(num_rows, num_cols)
+    entries = {}
+    for i, j, value in data['entries']:
+        _check_integers(i, j, *value)
+        if not (0 <= i < num_rows and 0 <= j < num_cols):
+            raise IndexError('The index {} is out of range.'.format((i, j)))
+        real_num, real_den, imag_num, imag_den = value
+        entries[(i, j)] = fraction_pair_to_sympy(
+            (Fraction(real_num, real_den), Fraction(imag_num, imag_den))
+        )
+    return sp.SparseMatrix(num_rows, num_cols, entries)
+
+
+def _check_integers(*values):
+    """
+    Raises a TypeError if any of the values is not an integer.
+    """
+    if not all(
+        isinstance(val, int) and not isinstance(val, bool) for val in values
+    ):
+        raise TypeError('Expected integers, got {}.'.format(values))
+
+
+def problem_key(symmetry_operations, *, expr_basis, repr_basis, method):
+    """
+    Returns a hash which identifies the problem of computing the symmetric Hamiltonian for the given input. The hash does not depend on the type (dense or sparse) of the matrices.
+
+    :param symmetry_operations: The symmetry operations that the Hamiltonian should respect.
+    :type symmetry_operations: list[symmetry_representation.SymmetryOperation]
+
+    :param expr_basis: The basis for the k-functions.
+    :type expr_basis: list[sympy.Expr]
+
+    :param repr_basis: The basis for the hermitian matrices.
+    :type repr_basis: list[sympy.Matrix]
+
+    :param method: Method used to compute the invariant subspace.
+    :type method: str
+    """
+    canonical_form = repr((
+        __version__,
+        method,
+        tuple((
+            _canonical_matrix(sym_op.rotation_matrix),
+            _canonical_matrix(sym_op.repr.matrix),
+            bool(sym_op.repr.has_cc),
+        ) for sym_op in symmetry_operations),
+        tuple(sp.srepr(sp.sympify(expr)) for expr in expr_basis),
+        tuple(_canonical_matrix(mat) for mat in repr_basis),
+    ))
+    return hashlib.sha256(canonical_form.encode('utf-8')).hexdigest()
+
+
+def _canonical_matrix(matrix):
+    """
+    Returns a string representation of a matrix which does not depend on its type.
+    """
+    return [[sp.srepr(val) for val in row]
+            for row in sp.Matrix(matrix).tolist()]
@@ -0,0 +1,209 @@
+# © 2017-2018, ETH Zurich, Institut für Theoretische Physik
+# Author:  Dominik Gresch <greschd@gmx.ch>
+"""
+Defines a vectorized evaluator for the numeric Hamiltonian on a set of k-points.
+"""
+
+import numpy as np
+import sympy as sp
+from fsc.export import export
+
+from ._expr_utils import K_VEC
+from ._hamiltonian_basis import SymmetricHamiltonianBasis
+
+
+@export
+class HamiltonianEvaluator:
+    r"""
+    Evaluates linear combinations of the basis of the symmetric Hamiltonian on many :math:`\mathbf{k}`-points at once. The basis is compiled into the array of its coefficients w.r.t. the monomials in :math:`\mathbf{k}`, such that each monomial is computed only once per :math:`\mathbf{k}`-point.
+
+    :param basis: Basis of the symmetric Hamiltonian, as returned by :py:func:`.symmetric_hamiltonian`. The entries must be polynomials in :math:`\mathbf{k}`.
+    :type basis: :py:class:`list` of :py:mod:`sympy` matrices, or :py:class:`.SymmetricHamiltonianBasis`
+    """
+    def __init__(self, basis):
+        if isinstance(basis, SymmetricHamiltonianBasis):
+            self._setup(
+                *_monomial_tensor_from_coefficients(
+                    basis.coefficient_tensor(numeric=True),
+                    expr_basis=basis.expr_basis
+                )
+            )
+        else:
+            self._setup(*_monomial_tensor_from_matrices(basis))
+
+    @classmethod
+    def from_coefficient_tensor(cls, coefficient_tensor, *, expr_basis):
+        r"""
+        Creates the evaluator from the coefficients of the basis w.r.t. the ``expr_basis``, as returned by :py:meth:`.SymmetricHamiltonianBasis.coefficient_tensor` or :py:func:`.numeric_symmetric_hamiltonian`.
+
+        :param coefficient_tensor: Coefficients of shape ``(n_terms, len(expr_basis), dim, dim)``.
+        :type coefficient_tensor: numpy.ndarray
+
+        :param expr_basis: The basis for the :math:`\mathbf{k}`-functions, given as polynomials.
+        :type expr_basis: :py:class:`list` of :py:mod:`sympy` expressions
+        """
+        res = cls.__new__(cls)
+        res._setup(  # pylint: disable=protected-access
+            *_monomial_tensor_from_coefficients(
+                np.asarray(coefficient_tensor, dtype=complex),
+                expr_basis=expr_basis
+            )
+        )
+        return res
+
+    def _setup(self, monomials, monomial_tensor):
+        """
+        Sets the exponents of the monomials, as an integer array of shape ``(n_monomials, 3)``, and the coefficients of the basis w.r.t. these monomials, of shape ``(n_terms, n_monomials, dim, dim)``.
+        """
+        self.monomials = np.array(monomials, dtype=int).reshape(-1, len(K_VEC))
+        self.monomial_tensor = monomial_tensor
+
+    @property
+    def num_terms(self):
+        """
+        The number of basis elements.
+        """
+        return self.monomial_tensor.shape[0]
+
+    @property
+    def dim(self):
+        """
+        The size of the Hamiltonian matrices.
+        """
+        return self.monomial_tensor.shape[-1]
+
+    def monomial_values(self, k_points):
+        r"""
+        Returns the values of the monomials at the given :math:`\mathbf{k}`-points, as an array of shape ``(N, n_monomials)``. The powers of each component of :math:`\mathbf{k}` are computed once, and shared between the monomials.
+
+        :param k_points: The :math:`\mathbf{k}`-points, as an array of shape ``(N, 3)``.
+        :type k_points: array-like
+        """
+        k_points = np.asarray(k_points, dtype=float)
+        if k_points.ndim != 2 or k_points.shape[1] != len(K_VEC):
+            raise ValueError(
+                'The k-points must have shape (N, {}), got {}.'.format(
+                    len(K_VEC), k_points.shape
+                )
+            )
+        res = np.ones((k_points.shape[0], len(self.monomials)))
+        for axis, exponents in enumerate(self.monomials.T):
+            max_power = np.max(exponents, initial=0)
+            if max_power == 0:
+                continue
+            powers = np.ones((k_points.shape[0], max_power + 1))
+            powers[:, 1:] = np.cumprod(
+                np.repeat(k_points[:, axis, None], max_power, axis=1), axis=1
+            )
+            res *= powers[:, exponents]
+        return res
+
+    def __call__(self, k_points, coefficients):
+        r"""
+        Evaluates the Hamiltonian at the given :math:`\mathbf{k}`-points.
+
+        :param k_points: The :math:`\mathbf{k}`-points, as an array of shape ``(N, 3)``.
+        :type k_points: array-like
+
+        :param coefficients: Coefficients of the basis elements, as an array of shape ``(n_terms,)`` for a single Hamiltonian, or ``(P, n_terms)`` for ``P`` Hamiltonians.
+        :type coefficients: array-like
+
+        :returns: The Hamiltonian matrices, as an array of shape ``(N, dim, dim)`` for a single set of coefficients, or ``(P, N, dim, dim)`` otherwise.
+        :rtype: numpy.ndarray
+        """
+        coefficients = np.asarray(coefficients)
+        single = coefficients.ndim == 1
+        coefficients = np.atleast_2d(coefficients)
+        if coefficients.ndim != 2 or coefficients.shape[1] != self.num_terms:
+            raise ValueError(
+                'The coefficients must have shape ({0},) or (P, {0}), got {1}.'
+                .format(self.num_terms, coefficients.shape)
+            )
+        # combine the coefficients first, since there are usually much less
+        # sets of coefficients than k-points
+        combined = np.tensordot(coefficients, self.monomial_tensor, axes=1)
+        combined = combined.reshape(*combined.shape[:2], -1)
+        res = np.matmul(self.monomial_values(k_points), combined)
+        res = res.reshape(*res.shape[:2], self.dim, self.dim)
+        if single:
+            return res[0]
+        return res
+
+    def basis_values(self, k_points):
+        r"""
+        Evaluates each basis element at the given :math:`\mathbf{k}`-points.
+
+        :param k_points: The :math:`\mathbf{k}`-points, as an array of shape ``(N, 3)``.
+        :type k_points: array-like
+
+        :returns: Array of shape ``(n_terms, N, dim, dim)``.
+        :rtype: numpy.ndarray
+        """
+        return self(k_points, np.eye(self.num_terms))
+
+
+def to_evaluator(basis):
+    """
+    Returns the :class:`HamiltonianEvaluator` for the given ``basis``, which can also be an evaluator already.
+    """
+    if isinstance(basis, HamiltonianEvaluator):
+        return basis
+    return HamiltonianEvaluator(basis)
+
+
+def _polynomial_coefficients(expr):
+    """
+    Returns the coefficients of a polynomial in (kx, ky, kz), as a dictionary mapping the exponents to the (complex) coefficient.
+    """
+    try:
+        return {
+            monomial: complex(coeff)
+            for monomial, coeff in sp.Poly(expr, *K_VEC).as_dict().items()
+        }
+    except (sp.PolynomialError, TypeError) as exc:
+        raise ValueError(
+            'The expression {} is not a polynomial in {} with numeric coefficients.'
+            .format(expr, K_VEC)
+        ) from exc
+
+
+def _monomial_tensor_from_matrices(basis):
+    """
+    Returns the monomials and the coefficient tensor for a basis given as matrices of polynomials.
+    """
+    basis = [sp.Matrix(mat) for mat in basis]
+    if not basis:
+        raise ValueError('The basis must not be empty.')
+    dim = basis[0].shape[0]
+    entries = [{(i, j): _polynomial_coefficients(mat[i, j])
+                for i in range(dim) for j in range(dim) if mat[i, j] != 0}
+               for mat in basis]
+    monomials = sorted({
+        monomial
+        for mat_entries in entries for coefficients in mat_entries.values()
+        for monomial in coefficients
+    })
+    positions = {monomial: idx for idx, monomial in enumerate(monomials)}
+    res = np.zeros((len(basis), len(monomials), dim, dim), dtype=complex)
+    for term_idx, mat_entries in enumerate(entries):
+        for (i, j), coefficients in mat_entries.items():
+            for monomial, coeff in coefficients.items():
+                res[term_idx, positions[monomial], i, j] += coeff
+    return monomials, res
+
+
+def _monomial_tensor_from_coefficients(coefficient_tensor, *, expr_basis):
+    """
+    Returns the monomials and the coefficient tensor for a basis given by the coefficients w.r.t. a polynomial expression basis.
+    """
+    expr_coefficients = [_polynomial_coefficients(expr) for expr in expr_basis]
+    monomials = sorted(set().union(*expr_coefficients))
+    positions = {monomial: idx for idx, monomial in enumerate(monomials)}
+    # matrix which converts the expression basis to monomials
+    conversion = np.zeros((len(expr_basis), len(monomials)), dtype=complex)
+    for expr_idx, coefficients in enumerate(expr_coefficients):
+        for monomial, coeff in coefficients.items():
+            conversion[expr_idx, positions[monomial]] = coeff
+    return monomials, np.einsum(
+        'nicd,im->nmcd', coefficient_tensor, conversion
+    )
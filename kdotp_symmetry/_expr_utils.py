@@ -6,14 +6,24 @@ Utilities for handling algebraic expressions, such as turning them to vector or
 
 import random
 import operator
-from functools import reduce
+from collections import namedtuple
+from functools import reduce, lru_cache
 from itertools import combinations_with_replacement
 
 import sympy as sp
 from fsc.export import export
 
+from ._to_matrix import to_matrix, cached_matrix
+
 K_VEC = sp.symbols('kx, ky, kz')
 
+_PolynomialBasisIndex = namedtuple(
+    '_PolynomialBasisIndex', [
+        'monomials', 'monomial_positions', 'coefficient_matrix',
+        'pivot_monomials', 'pivot_inverse'
+    ]
+)
+
 
 def expr_to_vector(
     expr,
@@ -25,6 +35,8 @@ def expr_to_vector(
     """
     Converts an algebraic (sympy) expression into vector form.
 
+    If both the expression and the basis are polynomials in (kx, ky, kz), the vector is read off directly from the polynomial coefficients. Otherwise, it is determined by evaluating the expression at random points.
+
     :param expr: Algebraic expression
     :type expr: sympy.Expr
 
@@ -33,6 +45,116 @@ def expr_to_vector(
 
     :param random_fct: Function creating random numbers on which the expression will be evaluated.
     """
+    basis_index = _polynomial_basis_index(tuple(basis))
+    if basis_index is not None:
+        try:
+            expr_coefficients = sp.Poly(expr, *K_VEC).as_dict()
+        except sp.PolynomialError:
+            pass
+        else:
+            return _polynomial_to_vector(
+                expr_coefficients, basis=basis, basis_index=basis_index
+            )
+    return _expr_to_vector_random(expr, basis, random_fct=random_fct)
+
+
+@lru_cache(maxsize=32)
+def _polynomial_basis_index(basis):
+    """
+    Creates the index from monomials to basis positions for a basis of polynomials. Returns ``None`` if the basis is not polynomial in (kx, ky, kz).
+    """
+    try:
+        basis_coefficients = [sp.Poly(b, *K_VEC).as_dict() for b in basis]
+    except sp.PolynomialError:
+        return None
+    monomials = sorted(set().union(*basis_coefficients))
+    coefficient_matrix = sp.Matrix(
+        len(monomials), len(basis),
+        lambda i, j: basis_coefficients[j].get(monomials[i], 0)
+    )
+    # pivot columns of the transpose are a set of linearly independent rows
+    _, pivots = coefficient_matrix.T.rref()
+    if len(pivots) != len(basis):
+        raise ValueError(
+            'The basis {basis} is not linearly independent.'.format(
+                basis=basis
+            )
+        )
+    # for bases consisting of (multiples of) single monomials, the position
+    # and coefficient can be looked up directly
+    if all(len(coefficients) == 1 for coefficients in basis_coefficients):
+        monomial_positions = {
+            monomial: (position, coeff)
+            for position, coefficients in enumerate(basis_coefficients)
+            for monomial, coeff in coefficients.items()
+        }
+    else:
+        monomial_positions = None
+    return _PolynomialBasisIndex(
+        monomials={m: i
+                   for i, m in enumerate(monomials)},
+        monomial_positions=monomial_positions,
+        coefficient_matrix=coefficient_matrix,
+        pivot_monomials=[monomials[i] for i in pivots],
+        pivot_inverse=coefficient_matrix[list(pivots), :].inv()
+    )
+
+
+def _polynomial_to_vector(expr_coefficients, *, basis, basis_index):
+    """
+    Converts the polynomial coefficients ``expr_coefficients`` of an expression into vector form, using the precomputed index of a polynomial basis.
+    """
+    if any(m not in basis_index.monomials for m in expr_coefficients):
+        raise ValueError(
+            'Expression {expr} is not in the span of the basis {basis}.'.
+            format(expr=_coefficients_to_expr(expr_coefficients), basis=basis)
+        )
+    if basis_index.monomial_positions is not None:
+        vec = [sp.Integer(0)] * len(basis)
+        for monomial, coeff in expr_coefficients.items():
+            position, basis_coeff = basis_index.monomial_positions[monomial]
+            vec[position] = _nsimplify(coeff / basis_coeff)
+        return tuple(vec)
+    vec = basis_index.pivot_inverse @ sp.Matrix([
+        expr_coefficients.get(m, 0) for m in basis_index.pivot_monomials
+    ])
+    vec = tuple(_nsimplify(v) for v in vec)
+    # check consistency, including the monomials which were not used to solve
+    mismatch = basis_index.coefficient_matrix @ sp.Matrix(vec) - sp.Matrix([
+        expr_coefficients.get(m, 0) for m in basis_index.monomials
+    ])
+    if not all(sp.simplify(val) == 0 for val in mismatch if val != 0):
+        raise ValueError(
+            "Vector {vec} in basis {basis} does not match expression {expr}".
+            format(
+                vec=vec,
+                basis=basis,
+                expr=_coefficients_to_expr(expr_coefficients)
+            )
+        )
+    return vec
+
+
+def _nsimplify(value):
+    """
+    Applies ``nsimplify`` to a value. Since this is only needed to get rid of floating-point numbers, exact values are returned unchanged.
+    """
+    if value.has(sp.Float):
+        return value.nsimplify()
+    return value
+
+
+def _coefficients_to_expr(coefficients):
+    """
+    Converts a dictionary of polynomial coefficients back into an expression.
+    """
+    return sp.Poly.from_dict(coefficients, *K_VEC).as_expr()
+
+
+def _expr_to_vector_random(expr, basis, *, random_fct):
+    """
+    Converts an algebraic expression into vector form by evaluating it and the basis at random points.
+    """
     dim = len(basis)
     # create random values for the coordinates and evaluate
     # both the basis functions and the expression to generate
@@ -96,15 +218,139 @@ def monomial_basis(*degrees):
 
 def matrix_to_expr_operator(matrix_form, repr_has_cc=False):
     """Returns a function that operates on expression, corresponding to the given ``matrix_form`` which operates on a vector in real space. ``repr_has_cc`` determines whether the symmetry contains time reversal."""
+    substitution = list(
+        zip(
+            K_VEC,
+            _k_matrix_form(matrix_form, repr_has_cc=repr_has_cc)
+            @ sp.Matrix(K_VEC)
+        )
+    )
+
+    def expr_operator(expr):
+        return expr.subs(substitution, simultaneous=True)
+
+    return expr_operator
+
+
+def matrix_to_expr_matrix(matrix_form, *, basis, repr_has_cc=False):
+    """
+    Returns the matrix form w.r.t. ``basis`` of the expression operator corresponding to ``matrix_form``, as given by :func:`matrix_to_expr_operator`.
+
+    For polynomial bases, the images of the monomials are built up directly as products of the transformed (kx, ky, kz), since monomials of a given degree transform as the symmetric tensor power of the k-space matrix. Other bases are handled by applying the expression operator. The result is cached in memory, see :func:`.matrix_cache_info`.
+    """
+    return _expr_matrix(
+        sp.ImmutableMatrix(matrix_form),
+        basis=tuple(basis),
+        repr_has_cc=bool(repr_has_cc)
+    )
+
+
+@cached_matrix
+def _expr_matrix(matrix_form, *, basis, repr_has_cc):
+    """
+    Implementation of :func:`matrix_to_expr_matrix`, for hashable arguments.
+    """
+    basis_index = _polynomial_basis_index(basis)
+    if basis_index is None:
+        return to_matrix(
+            operator=matrix_to_expr_operator(
+                matrix_form, repr_has_cc=repr_has_cc
+            ),
+            basis=basis,
+            to_vector_fct=expr_to_vector
+        )
+    images = polynomial_images(
+        matrix_form,
+        basis_coefficients=[sp.Poly(expr, *K_VEC).as_dict() for expr in basis],
+        repr_has_cc=repr_has_cc
+    )
+    return sp.Matrix([
+        _polynomial_to_vector(image, basis=basis, basis_index=basis_index)
+        for image in images
+    ]).transpose()
+
+
+def polynomial_images(matrix_form, *, basis_coefficients, repr_has_cc=False):
+    """
+    Returns the images of polynomials under the expression operator corresponding to ``matrix_form``, as given by :func:`matrix_to_expr_operator`. Both the polynomials and their images are given as dictionaries of their coefficients.
+
+    The images of the monomials are built up directly as products of the transformed (kx, ky, kz), since monomials of a given degree transform as the symmetric tensor power of the k-space matrix.
+    """
+    k_matrix_form = _k_matrix_form(matrix_form, repr_has_cc=repr_has_cc)
+    dim = len(K_VEC)
+    unit_monomials = [
+        tuple(int(i == j) for j in range(dim)) for i in range(dim)
+    ]
+    k_images = [{
+        unit_monomials[j]: k_matrix_form[i, j]
+        for j in range(dim) if k_matrix_form[i, j] != 0
+    } for i in range(dim)]
+    monomial_images = {(0, ) * dim: {(0, ) * dim: sp.Integer(1)}}
+
+    def get_image(monomial):
+        """Get the image of a monomial, by recursively splitting off a single factor."""
+        if monomial not in monomial_images:
+            idx = next(i for i, power in enumerate(monomial) if power > 0)
+            reduced_monomial = tuple(
+                power - int(i == idx) for i, power in enumerate(monomial)
+            )
+            monomial_images[monomial] = _polynomial_product(
+                get_image(reduced_monomial), k_images[idx]
+            )
+        return monomial_images[monomial]
+
+    images = []
+    for coefficients in basis_coefficients:
+        image = {}
+        for monomial, coeff in coefficients.items():
+            for image_monomial, image_coeff in get_image(monomial).items():
+                image[image_monomial] = image.get(
+                    image_monomial, sp.Integer(0)
+                ) + coeff * image_coeff
+        images.append(drop_zeros(image))
+    return images
+
+
+def _polynomial_product(coefficients_a, coefficients_b):
+    """
+    Multiplies two polynomials given as dictionaries of their coefficients.
+    """
+    res = {}
+    for monomial_a, coeff_a in coefficients_a.items():
+        for monomial_b, coeff_b in coefficients_b.items():
+            monomial = tuple(
+                power_a + power_b
+                for power_a, power_b in zip(monomial_a, monomial_b)
+            )
+            product = coeff_a * coeff_b
+            res[monomial] = res.get(monomial, sp.Integer(0)) + product
+    return drop_zeros(res)
+
+
+def drop_zeros(entries):
+    """
+    Removes the vanishing values from a dictionary, such as the coefficients of a polynomial or the entries of a sparse vector. Values which are not rational are expanded before they are compared to zero. This cancels the sums and products of the algebraic numbers in the symmetry matrices, and is much cheaper than :func:`sympy.simplify`.
+
+    :param entries: The dictionary of sympy values.
+    :type entries: dict
+    """
+    res = {}
+    for key, val in entries.items():
+        if not val.is_Rational:
+            val = sp.expand(val)
+        if val != 0:
+            res[key] = val
+    return res
+
+
+def _k_matrix_form(matrix_form, repr_has_cc=False):
+    """
+    Returns the matrix which acts on the k-vector, for the given real-space ``matrix_form``.
+    """
     # k-form and r-form of the matrix are related by A -> A^-1^T
     # => matrix^T gives g^-1 in k-space coordinates
     # Change sign if the representation has complex conjugation
     k_matrix_form = sp.Matrix(matrix_form).T
     if repr_has_cc:
         k_matrix_form *= -1
-    substitution = list(zip(K_VEC, k_matrix_form @ sp.Matrix(K_VEC)))
-
-    def expr_operator(expr):
-        return expr.subs(substitution, simultaneous=True)
-
-    return expr_operator
+    return k_matrix_form
@@ -0,0 +1,183 @@
+# © 2017-2018, ETH Zurich, Institut für Theoretische Physik
+# Author:  Dominik Gresch <greschd@gmx.ch>
+"""
+Defines functions to fit the coefficients of the symmetric Hamiltonian to reference data.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import scipy.optimize
+from fsc.export import export
+
+from ._evaluator import to_evaluator
+from ._logging_setup import LOGGER
+
+FitResult = namedtuple('FitResult', ['coefficients', 'residual'])
+
+
+@export
+def fit_hamiltonian(basis, k_points, reference_hamiltonians, *, weights=None):
+    r"""
+    Fits the (real) coefficients of the ``basis`` to reference Hamiltonian matrices, for example from a tight-binding model. The squared Frobenius distance to the reference matrices, summed over the :math:`\mathbf{k}`-points, is minimized.
+
+    Since the Hamiltonian is linear in the coefficients, the fit is a single linear least-squares problem. It is solved with :py:func:`numpy.linalg.lstsq` directly on the real and imaginary parts of the weighted basis elements, which are computed for all :math:`\mathbf{k}`-points at once. This avoids the loss of precision of the normal equations for ill-conditioned bases.
+
+    :param basis: Basis of the symmetric Hamiltonian, as returned by :py:func:`.symmetric_hamiltonian`, or the :py:class:`.HamiltonianEvaluator` created from it.
+    :type basis: :py:class:`list` of :py:mod:`sympy` matrices, :py:class:`.SymmetricHamiltonianBasis`, or :py:class:`.HamiltonianEvaluator`
+
+    :param k_points: The :math:`\mathbf{k}`-points, as an array of shape ``(N, 3)``.
+    :type k_points: array-like
+
+    :param reference_hamiltonians: The reference Hamiltonian matrices, as an array of shape ``(N, dim, dim)``.
+    :type reference_hamiltonians: array-like
+
+    :param weights: Weights of the :math:`\mathbf{k}`-points, as an array of shape ``(N,)``. By default, all points have the same weight.
+    :type weights: array-like
+
+    :returns: The fitted coefficients, and the weighted sum of the squared Frobenius distances.
+    :rtype: FitResult
+    """
+    evaluator = to_evaluator(basis)
+    reference_hamiltonians = np.asarray(reference_hamiltonians, dtype=complex)
+    num_k = len(k_points)
+    if reference_hamiltonians.shape != (num_k, evaluator.dim, evaluator.dim):
+        raise ValueError(
+            'The reference Hamiltonians must have shape {}, got {}.'.format(
+                (num_k, evaluator.dim, evaluator.dim),
+                reference_hamiltonians.shape
+            )
+        )
+    weights = _get_weights(weights, num_k=num_k)
+
+    LOGGER.info('Calculating the design tensor.')
+    design = evaluator.basis_values(k_points)
+    design = design.reshape(evaluator.num_terms, num_k, -1)
+    reference = reference_hamiltonians.reshape(num_k, -1)
+    sqrt_weights = np.sqrt(weights)[:, np.newaxis]
+    # the coefficients are real, such that the real and imaginary parts
+    # are separate equations of the same least-squares problem
+    design_matrix = (design * sqrt_weights).reshape(evaluator.num_terms, -1).T
+    target = (reference * sqrt_weights).ravel()
+    coefficients, _, _, _ = np.linalg.lstsq(
+        np.concatenate([design_matrix.real, design_matrix.imag]),
+        np.concatenate([target.real, target.imag]),
+        rcond=None
+    )
+    difference = np.tensordot(coefficients, design, axes=1) - reference
+    residual = np.sum(weights * np.sum(np.abs(difference)**2, axis=-1))
+    return FitResult(coefficients=coefficients, residual=residual)
+
+
+@export
+def fit_eigenvalues(
+    basis,
+    k_points,
+    reference_eigenvalues,
+    *,
+    initial_coefficients,
+    band_indices=None,
+    weights=None,
+    **kwargs
+):
+    r"""
+    Fits the (real) coefficients of the ``basis`` to reference eigenvalues, for example from a DFT calculation. The squared difference between the eigenvalues of the Hamiltonian and the reference eigenvalues is minimized with :py:func:`scipy.optimize.least_squares`.
+
+    The derivatives of the eigenvalues w.r.t. the coefficients are computed analytically as the expectation values of the basis elements in the eigenstates, using the same design tensor as the Hamiltonian.
+
+    :param basis: Basis of the symmetric Hamiltonian, as in :py:func:`.fit_hamiltonian`.
+    :type basis: :py:class:`list` of :py:mod:`sympy` matrices, :py:class:`.SymmetricHamiltonianBasis`, or :py:class:`.HamiltonianEvaluator`
+
+    :param k_points: The :math:`\mathbf{k}`-points, as an array of shape ``(N, 3)``.
+    :type k_points: array-like
+
+    :param reference_eigenvalues: The reference eigenvalues, as an array of shape ``(N, len(band_indices))``.
+    :type reference_eigenvalues: array-like
+
+    :param initial_coefficients: Starting point of the optimization. Since the eigenvalues are not linear in the coefficients, the result can depend on it.
+    :type initial_coefficients: array-like
+
+    :param band_indices: Indices of the bands (in ascending order of the eigenvalues) which are compared to the reference eigenvalues. By default, all bands are used.
+    :type band_indices: :py:class:`list` of :py:class:`int`
+
+    :param weights: Weights of the :math:`\mathbf{k}`-points, as an array of shape ``(N,)``. By default, all points have the same weight.
+    :type weights: array-like
+
+    :param kwargs: Additional keyword arguments passed to :py:func:`scipy.optimize.least_squares`.
+
+    :returns: The fitted coefficients, and the weighted sum of the squared differences of the eigenvalues.
+    :rtype: FitResult
+    """
+    evaluator = to_evaluator(basis)
+    num_k = len(k_points)
+    if band_indices is None:
+        band_indices = list(range(evaluator.dim))
+    band_indices = np.asarray(band_indices, dtype=int)
+    reference_eigenvalues = np.asarray(reference_eigenvalues, dtype=float)
+    if reference_eigenvalues.shape != (num_k, len(band_indices)):
+        raise ValueError(
+            'The reference eigenvalues must have shape {}, got {}.'.format(
+                (num_k, len(band_indices)), reference_eigenvalues.shape
+            )
+        )
+    sqrt_weights = np.sqrt(_get_weights(weights, num_k=num_k))[:, np.newaxis]
+
+    LOGGER.info('Calculating the design tensor.')
+    design = evaluator.basis_values(k_points)
+
+    def residuals_and_jacobian(coefficients):
+        """
+        Returns the weighted differences of the eigenvalues, and their derivatives w.r.t. the coefficients.
+        """
+        eigenvalues, eigenvectors = np.linalg.eigh(
+            np.tensordot(coefficients, design, axes=1)
+        )
+        eigenvectors = eigenvectors[:, :, band_indices]
+        residuals = sqrt_weights * (
+            eigenvalues[:, band_indices] - reference_eigenvalues
+        )
+        # Hellmann-Feynman: the derivative of the eigenvalue is the
+        # expectation value of the basis element
+        jacobian = np.einsum(
+            'kai,mkab,kbi->kim', eigenvectors.conj(), design, eigenvectors
+        ).real * sqrt_weights[:, :, np.newaxis]
+        return residuals.ravel(), jacobian.reshape(-1, evaluator.num_terms)
+
+    cache = {}
+
+    def get_cached(coefficients):
+        """
+        Returns the residuals and Jacobian, re-using the result of the previous call with the same coefficients.
+        """
+        key = coefficients.tobytes()
+        if key not in cache:
+            cache.clear()
+            cache[key] = residuals_and_jacobian(coefficients)
+        return cache[key]
+
+    result = scipy.optimize.least_squares(
+        lambda coefficients: get_cached(coefficients)[0],
+        np.asarray(initial_coefficients, dtype=float),
+        jac=lambda coefficients: get_cached(coefficients)[1],
+        **kwargs
+    )
+    if not result.success:
+        LOGGER.warning(
+            'The eigenvalue fit did not converge: %s', result.message
+        )
+    return FitResult(coefficients=result.x, residual=np.sum(result.fun**2))
+
+
+def _get_weights(weights, *, num_k):
+    """
+    Returns the weights of the k-points as an array, checking their shape.
+    """
+    if weights is None:
+        return np.ones(num_k)
+    weights = np.asarray(weights, dtype=float)
+    if weights.shape != (num_k, ):
+        raise ValueError(
+            'The weights must have shape {}, got {}.'.format((num_k, ),
+                                                             weights.shape)
+        )
+    return weights
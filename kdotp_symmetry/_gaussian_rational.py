@@ -0,0 +1,283 @@
+# © 2017-2018, ETH Zurich, Institut für Theoretische Physik
+# Author:  Dominik Gresch <greschd@gmx.ch>
+"""
+Defines exact linear algebra routines for matrices whose entries are Gaussian rationals, i.e. complex numbers with rational real and imaginary part.
+
+The entries are converted from sympy only once. The elimination is done with fraction-free Gauss-Jordan elimination on Gaussian integers, which are stored as pairs of Python integers. This avoids the overhead of the sympy expression tree for every arithmetic operation.
+
+The rows are stored as dictionaries of their non-zero entries, and each elimination step only touches the rows which have a non-zero entry in the pivot column. Instead of dividing by the previous pivot as in Bareiss elimination, which requires updating every row at every step, each row is divided by the greatest common divisor of its entries. This keeps the entries at most as large as in Bareiss elimination.
+"""
+
+import functools
+from fractions import Fraction
+from math import gcd
+
+import sympy as sp
+
+
+def to_gaussian_integer_rows(matrix):
+    """
+    Converts a sympy matrix into a list of rows of Gaussian integers, where each row is scaled by the least common multiple of its denominators. Returns ``None`` if any entry is not a Gaussian rational.
+
+    :param matrix: The matrix to convert.
+    :type matrix: sympy.Matrix
+    """
+    matrix = sp.Matrix(matrix)
+    rows = []
+    for i in range(matrix.shape[0]):
+        row = []
+        for val in matrix.row(i):
+            entry = to_fraction_pair(val)
+            if entry is None:
+                return None
+            row.append(entry)
+        rows.append(_to_integer_row(row))
+    return rows
+
+
+def to_fraction_pair(val):
+    """
+    Converts a sympy number into a pair of fractions for the real and imaginary part, or ``None`` if it is not a Gaussian rational.
+
+    :param val: The number to convert.
+    :type val: sympy.Expr
+    """
+    val = sp.sympify(val)
+    if val.is_Rational:
+        return (Fraction(int(val.p), int(val.q)), Fraction(0))
+    real, imag = val.as_real_imag()
+    if not (real.is_Rational and imag.is_Rational):
+        return None
+    return (
+        Fraction(int(real.p), int(real.q)), Fraction(int(imag.p), int(imag.q))
+    )
+
+
+def fraction_pair_to_sympy(val):
+    """
+    Converts a pair of fractions for the real and imaginary part into a sympy number.
+
+    :param val: The real and imaginary part.
+    :type val: tuple[fractions.Fraction]
+    """
+    real = sp.Rational(val[0].numerator, val[0].denominator)
+    if val[1] == 0:
+        return real
+    return real + sp.I * sp.Rational(val[1].numerator, val[1].denominator)
+
+
+def gaussian_rational_rref(matrix):
+    """
+    Returns the reduced row echelon form of a matrix and the indices of the pivot columns, in the same format as :py:meth:`sympy.Matrix.rref`. Returns ``None`` if the matrix is not over the Gaussian rationals.
+
+    :param matrix: The input matrix.
+    :type matrix: sympy.Matrix
+    """
+    n_rows, n_cols = sp.Matrix(matrix).shape
+    rows = to_gaussian_integer_rows(matrix)
+    if rows is None:
+        return None
+    rows, pivots = _fraction_free_rref(rows)
+    res = sp.zeros(n_rows, n_cols)
+    for i, (row, pivot_idx) in enumerate(zip(rows, pivots)):
+        for j, val in row.items():
+            res[i, j] = fraction_pair_to_sympy(
+                _divide_to_fraction(val, row[pivot_idx])
+            )
+    return res, tuple(pivots)
+
+
+def gaussian_rational_rank(matrix):
+    """
+    Returns the rank of a matrix, or ``None`` if the matrix is not over the Gaussian rationals.
+
+    :param matrix: The input matrix.
+    :type matrix: sympy.Matrix
+    """
+    rows = to_gaussian_integer_rows(matrix)
+    if rows is None:
+        return None
+    _, pivots = _fraction_free_rref(rows)
+    return len(pivots)
+
+
+def gaussian_rational_nullspace(matrix):
+    """
+    Returns a basis of the nullspace of a matrix, as a list of column matrices. The result is the same as for :py:meth:`sympy.Matrix.nullspace`. Returns ``None`` if the matrix is not over the Gaussian rationals.
+
+    :param matrix: The input matrix.
+    :type matrix: sympy.Matrix
+    """
+    n_cols = sp.Matrix(matrix).shape[1]
+    rows = to_gaussian_integer_rows(matrix)
+    if rows is None:
+        return None
+    rows, pivots = _fraction_free_rref(rows)
+    pivot_set = set(pivots)
+    basis = []
+    for free_idx in range(n_cols):
+        if free_idx in pivot_set:
+            continue
+        vec = sp.zeros(n_cols, 1)
+        vec[free_idx] = sp.Integer(1)
+        for row, pivot_idx in zip(rows, pivots):
+            if free_idx in row:
+                vec[pivot_idx] = -fraction_pair_to_sympy(
+                    _divide_to_fraction(row[free_idx], row[pivot_idx])
+                )
+        basis.append(vec)
+    return basis
+
+
+def _fraction_free_rref(rows):
+    """
+    Performs fraction-free Gauss-Jordan elimination on the given rows of Gaussian integers. Returns the non-zero rows in reduced form, as dictionaries of their non-zero entries, and the pivot indices. Each row must be divided by its entry at the pivot index to get the reduced row echelon form.
+    """
+    rows = [{idx: val
+             for idx, val in enumerate(row) if val != (0, 0)} for row in rows]
+    # maps each column index to the indices of the rows in which it is non-zero
+    column_rows = {}
+    for row_idx, row in enumerate(rows):
+        for column_idx in row:
+            column_rows.setdefault(column_idx, set()).add(row_idx)
+    is_pivot_row = [False] * len(rows)
+    pivots = []
+    pivot_rows = []
+    for column_idx in sorted(column_rows):
+        candidates = [
+            row_idx for row_idx in column_rows[column_idx]
+            if not is_pivot_row[row_idx]
+        ]
+        if not candidates:
+            continue
+        # the reduced form does not depend on the choice of the pivot row,
+        # so the sparsest one is used to keep the fill-in low
+        pivot_row_idx = min(candidates, key=lambda idx: len(rows[idx]))
+        pivot_row = rows[pivot_row_idx]
+        for row_idx in list(column_rows[column_idx]):
+            if row_idx == pivot_row_idx:
+                continue
+            old_row = rows[row_idx]
+            new_row = _eliminate(old_row, pivot_row, column_idx=column_idx)
+            for idx in old_row.keys() - new_row.keys():
+                column_rows[idx].discard(row_idx)
+            for idx in new_row.keys() - old_row.keys():
+                column_rows.setdefault(idx, set()).add(row_idx)
+            rows[row_idx] = new_row
+        is_pivot_row[pivot_row_idx] = True
+        pivots.append(column_idx)
+        pivot_rows.append(pivot_row_idx)
+    return [rows[row_idx] for row_idx in pivot_rows], pivots
+
+
+def _eliminate(row, pivot_row, *, column_idx):
+    """
+    Eliminates the entry at ``column_idx`` of a row using the pivot row, without introducing fractions. The result is divided by the greatest common divisor of its entries.
+    """
+    pivot = pivot_row[column_idx]
+    factor = row[column_idx]
+    res = {idx: _multiply(pivot, val) for idx, val in row.items()}
+    for idx, pivot_val in pivot_row.items():
+        res[idx] = _subtract(
+            res.get(idx, (0, 0)), _multiply(factor, pivot_val)
+        )
+    res = {idx: val for idx, val in res.items() if val != (0, 0)}
+    divisor = _content(res.values())
+    if divisor != (1, 0):
+        res = {idx: _exact_divide(val, divisor) for idx, val in res.items()}
+    return res
+
+
+def _content(values):
+    """
+    Returns the greatest common divisor of the given Gaussian integers.
+    """
+    values = list(values)
+    integer_divisor = functools.reduce(
+        gcd, (part for val in values for part in val), 0
+    )
+    if integer_divisor == 0:
+        return (1, 0)
+    res = (0, 0)
+    for val in values:
+        res = _gcd((val[0] // integer_divisor, val[1] // integer_divisor), res)
+        if _norm(res) == 1:
+            break
+    return _multiply(res, (integer_divisor, 0))
+
+
+def _gcd(val_a, val_b):
+    """
+    Returns a greatest common divisor of two Gaussian integers, using the Euclidean algorithm.
+    """
+    while val_b != (0, 0):
+        norm = _norm(val_b)
+        real, imag = _multiply(val_a, (val_b[0], -val_b[1]))
+        # quotient rounded to the nearest Gaussian integer
+        quotient = ((2 * real + norm) // (2 * norm),
+                    (2 * imag + norm) // (2 * norm))
+        val_a, val_b = val_b, _subtract(val_a, _multiply(quotient, val_b))
+    return val_a
+
+
+def _norm(val):
+    """
+    Returns the norm of a Gaussian integer.
+    """
+    return val[0]**2 + val[1]**2
+
+
+def _multiply(val_a, val_b):
+    """
+    Multiplies two Gaussian integers.
+    """
+    return (
+        val_a[0] * val_b[0] - val_a[1] * val_b[1],
+        val_a[0] * val_b[1] + val_a[1] * val_b[0]
+    )
+
+
+def _subtract(val_a, val_b):
+    """
+    Subtracts two Gaussian integers.
+    """
+    return (val_a[0] - val_b[0], val_a[1] - val_b[1])
+
+
+def _exact_divide(val, divisor):
+    """
+    Divides two Gaussian integers, where the division is known to be exact.
+    """
+    if divisor == (1, 0):
+        return val
+    norm = _norm(divisor)
+    real, imag = _multiply(val, (divisor[0], -divisor[1]))
+    if real % norm or imag % norm:
+        raise ValueError('Inexact division of {} by {}.'.format(val, divisor))
+    return (real // norm, imag // norm)
+
+
+def _divide_to_fraction(val, divisor):
+    """
+    Divides two Gaussian integers, with the result given as a pair of fractions.
+    """
+    norm = _norm(divisor)
+    real, imag = _multiply(val, (divisor[0], -divisor[1]))
+    return (Fraction(real, norm), Fraction(imag, norm))
+
+
+def _to_integer_row(row):
+    """
+    Scales a row of Gaussian rationals by the least common multiple of the denominators, and returns it as Gaussian integers.
+    """
+    scale = functools.reduce(
+        _lcm, (part.denominator for val in row for part in val), 1
+    )
+    return [(int(val[0] * scale), int(val[1] * scale)) for val in row]
+
+
+def _lcm(val_a, val_b):
+    """
+    Returns the least common multiple of two positive integers.
+    """
+    return val_a * val_b // gcd(val_a, val_b)
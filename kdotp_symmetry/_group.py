@@ -0,0 +1,276 @@
+# © 2017-2018, ETH Zurich, Institut für Theoretische Physik
+# Author:  Dominik Gresch <greschd@gmx.ch>
+"""
+Defines functions to construct the finite group generated by a set of symmetry operations.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import sympy as sp
+
+from ._numeric import to_numpy
+
+SymmetryGroupElement = namedtuple(
+    'SymmetryGroupElement', ['rotation_matrix', 'repr_matrix', 'repr_has_cc']
+)
+
+
+def generate_group(generators, *, max_order=10000):
+    """
+    Returns all elements of the finite group generated by the given ``generators``. Each generator is a tuple of matrices, which are multiplied element-wise. The elements are returned as tuples of :py:class:`sympy.ImmutableSparseMatrix`, with the identity first.
+
+    :param generators: Generators of the group.
+    :type generators: list[tuple[sympy.Matrix]]
+
+    :param max_order: Maximum number of group elements, after which an error is raised.
+    :type max_order: int
+    """
+    generators = [
+        tuple(_canonicalize(sp.SparseMatrix(mat)) for mat in gen)
+        for gen in generators
+    ]
+    if not all(
+        _has_finite_order(gen, max_order=max_order) for gen in generators
+    ):
+        raise ValueError(_infinite_group_message(max_order))
+    identity = tuple(
+        sp.ImmutableSparseMatrix(sp.eye(mat.shape[0])) for mat in generators[0]
+    )
+    return _closure(
+        generators,
+        identity=identity,
+        multiply=_multiply_matrices,
+        key=_element_key,
+        max_order=max_order
+    )
+
+
+def generate_symmetry_group(generators, *, max_order=10000):
+    """
+    Returns all elements of the finite group generated by the given symmetry operations, as :class:`SymmetryGroupElement` instances with the identity first. Operations which contain a complex conjugation are composed as anti-unitary operations.
+
+    Since the rotation and representation matrices are small, this is much cheaper than closing the group of the operators acting on the (large) space of Hamiltonian terms.
+
+    :param generators: Generators of the group.
+    :type generators: list[SymmetryGroupElement]
+
+    :param max_order: Maximum number of group elements, after which an error is raised.
+    :type max_order: int
+    """
+    generators = [
+        SymmetryGroupElement(
+            rotation_matrix=_canonicalize(
+                sp.SparseMatrix(gen.rotation_matrix)
+            ),
+            repr_matrix=_canonicalize(sp.SparseMatrix(gen.repr_matrix)),
+            repr_has_cc=bool(gen.repr_has_cc)
+        ) for gen in generators
+    ]
+    if not all(
+        _symmetry_element_has_finite_order(gen, max_order=max_order)
+        for gen in generators
+    ):
+        raise ValueError(_infinite_group_message(max_order))
+    identity = SymmetryGroupElement(
+        rotation_matrix=sp.ImmutableSparseMatrix(
+            sp.eye(generators[0].rotation_matrix.shape[0])
+        ),
+        repr_matrix=sp.ImmutableSparseMatrix(
+            sp.eye(generators[0].repr_matrix.shape[0])
+        ),
+        repr_has_cc=False
+    )
+    return _closure(
+        generators,
+        identity=identity,
+        multiply=_multiply_symmetry_operations,
+        key=_symmetry_element_key,
+        max_order=max_order
+    )
+
+
+def _closure(generators, *, identity, multiply, key, max_order):
+    """
+    Computes the closure of the given ``generators`` under the ``multiply`` function, where elements are identified by their ``key``.
+    """
+    elements = [identity]
+    known_elements = {key(identity)}
+    queue = [identity]
+    while queue:
+        element = queue.pop()
+        for gen in generators:
+            new_element = multiply(gen, element)
+            new_key = key(new_element)
+            if new_key not in known_elements:
+                if len(elements) >= max_order:
+                    raise ValueError(_infinite_group_message(max_order))
+                known_elements.add(new_key)
+                elements.append(new_element)
+                queue.append(new_element)
+    return elements
+
+
+def _infinite_group_message(max_order):
+    """
+    Returns the error message for generators which do not generate a finite group.
+    """
+    return 'The given generators do not generate a finite group of order at most {}.'.format(
+        max_order
+    )
+
+
+def _has_finite_order(element, *, max_order, tolerance=1e-8):
+    """
+    Checks numerically whether a power of at most ``max_order`` of the ``element``, given as a tuple of matrices, is the identity. Since the powers are computed in floating-point arithmetic, this is much cheaper than the exact closure, and is used to fail early for elements of infinite order.
+    """
+    element = [to_numpy(mat) for mat in element]
+    identities = [np.eye(mat.shape[0]) for mat in element]
+    power = element
+    for _ in range(max_order):
+        if all(
+            np.allclose(mat, identity, atol=tolerance)
+            for mat, identity in zip(power, identities)
+        ):
+            return True
+        power = [mat_a @ mat_b for mat_a, mat_b in zip(element, power)]
+    return False
+
+
+def _symmetry_element_has_finite_order(element, *, max_order):
+    """
+    Checks numerically whether the given symmetry operation has finite order at most ``max_order``. An anti-unitary operation has finite order if its square, which is unitary, has finite order.
+    """
+    if element.repr_has_cc:
+        return _has_finite_order((
+            element.rotation_matrix**
+            2, element.repr_matrix * element.repr_matrix.conjugate()
+        ),
+                                 max_order=max_order // 2)
+    return _has_finite_order((element.rotation_matrix, element.repr_matrix),
+                             max_order=max_order)
+
+
+def _multiply_matrices(element_a, element_b):
+    """
+    Multiplies two group elements given as tuples of matrices.
+    """
+    return tuple(
+        _canonicalize(mat_a * mat_b)
+        for mat_a, mat_b in zip(element_a, element_b)
+    )
+
+
+def _multiply_symmetry_operations(element_a, element_b):
+    """
+    Multiplies two symmetry operations. If the first operation contains a complex conjugation, it also acts on the representation matrix of the second one.
+    """
+    repr_matrix_b = element_b.repr_matrix
+    if element_a.repr_has_cc:
+        repr_matrix_b = repr_matrix_b.conjugate()
+    return SymmetryGroupElement(
+        rotation_matrix=_canonicalize(
+            element_a.rotation_matrix * element_b.rotation_matrix
+        ),
+        repr_matrix=_canonicalize(element_a.repr_matrix * repr_matrix_b),
+        repr_has_cc=element_a.repr_has_cc != element_b.repr_has_cc
+    )
+
+
+def cyclic_invariant_dimension(element, *, max_order=10000):
+    """
+    Returns the dimension of the subspace which is invariant under a single group ``element``, given as a tuple of matrices. This is computed from the traces of the powers of the element, which generate a cyclic group.
+
+    :param element: The group element, as a tuple of matrices.
+    :type element: tuple[sympy.Matrix]
+
+    :param max_order: Maximum order of the element, after which an error is raised.
+    :type max_order: int
+    """
+    if not _has_finite_order(element, max_order=max_order):
+        raise ValueError(
+            'The given element does not have finite order at most {}.'.
+            format(max_order)
+        )
+    element = tuple(_canonicalize(sp.SparseMatrix(mat)) for mat in element)
+    identity_key = _element_key(
+        tuple(
+            sp.ImmutableSparseMatrix(sp.eye(mat.shape[0])) for mat in element
+        )
+    )
+    power = element
+    powers = [element]
+    while _element_key(power) != identity_key:
+        if len(powers) >= max_order:
+            raise ValueError(
+                'The given element does not have finite order at most {}.'.
+                format(max_order)
+            )
+        power = _multiply_matrices(element, power)
+        powers.append(power)
+    return invariant_dimension(powers)
+
+
+def invariant_dimension(group):
+    """
+    Returns the dimension of the subspace which is invariant under all elements of the given ``group``, as created by :func:`generate_group`. This is the multiplicity of the trivial representation, computed from the traces of the (Kronecker) products of the matrices in each group element.
+    """
+    return invariant_dimension_from_traces([
+        tuple(mat.trace() for mat in element) for element in group
+    ])
+
+
+def invariant_dimension_from_traces(traces):
+    """
+    Returns the dimension of the invariant subspace of a group, given the traces of the matrices in each group element. The traces of each element are given as a tuple, corresponding to a Kronecker product of the matrices.
+    """
+    dimension = sp.simplify(
+        sp.expand_complex(
+            sum(_product(element_traces)
+                for element_traces in traces) / len(traces)
+        )
+    )
+    if not (dimension.is_Integer and dimension >= 0):
+        raise ValueError(
+            'Invalid dimension {} of the invariant subspace.'.
+            format(dimension)
+        )
+    return int(dimension)
+
+
+def _product(values):
+    """
+    Returns the product of the given values.
+    """
+    res = sp.Integer(1)
+    for val in values:
+        res *= val
+    return res
+
+
+def _element_key(element):
+    """
+    Returns a hashable key for a group element, which does not depend on the order in which the entries of the sparse matrices were created.
+    """
+    return tuple((mat.shape, tuple(mat.row_list())) for mat in element)
+
+
+def _symmetry_element_key(element):
+    """
+    Returns a hashable key for a symmetry group element.
+    """
+    return (
+        _element_key((element.rotation_matrix, element.repr_matrix)),
+        element.repr_has_cc
+    )
+
+
+def _canonicalize(mat):
+    """
+    Brings the entries of a sparse matrix into a canonical form, such that equal group elements compare equal.
+    """
+    return sp.ImmutableSparseMatrix(
+        mat.applyfunc(
+            lambda val: val if val.is_Rational else sp.expand_complex(val)
+        )
+    )
@@ -0,0 +1,93 @@
+# © 2017-2018, ETH Zurich, Institut für Theoretische Physik
+# Author:  Dominik Gresch <greschd@gmx.ch>
+"""
+Defines the compact result type of the symmetric Hamiltonian calculation.
+"""
+
+from collections.abc import Sequence
+
+import numpy as np
+import sympy as sp
+from fsc.export import export
+
+
+@export
+class SymmetricHamiltonianBasis(Sequence):
+    r"""
+    Basis of the symmetric Hamiltonian, stored as the sparse matrix of its coefficients w.r.t. the products of ``expr_basis`` and ``repr_basis``. The column ``i * len(repr_basis) + j`` of the coefficient matrix belongs to the product of ``expr_basis[i]`` and ``repr_basis[j]``.
+
+    The object behaves like a sequence of :py:mod:`sympy` matrix expressions, which are only expanded when they are accessed.
+
+    :param coefficients: Coefficients of the basis elements, one row per basis element.
+    :type coefficients: sympy.SparseMatrix
+
+    :param expr_basis: The basis for the :math:`\mathbf{k}`-functions.
+    :type expr_basis: :py:class:`list` of :py:mod:`sympy` expressions
+
+    :param repr_basis: The basis for the hermitian matrices.
+    :type repr_basis: :py:class:`list` of :py:mod:`sympy` matrices
+    """
+    __slots__ = ('coefficients', 'expr_basis', 'repr_basis')
+
+    def __init__(self, coefficients, *, expr_basis, repr_basis):
+        coefficients = sp.SparseMatrix(coefficients)
+        if coefficients.shape[1] != len(expr_basis) * len(repr_basis):
+            raise ValueError(
+                'The number {} of coefficient columns does not match the size {} of the product basis.'
+                .format(
+                    coefficients.shape[1],
+                    len(expr_basis) * len(repr_basis)
+                )
+            )
+        self.coefficients = coefficients
+        self.expr_basis = list(expr_basis)
+        self.repr_basis = list(repr_basis)
+
+    def __len__(self):
+        return self.coefficients.shape[0]
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError('Basis index out of range.')
+        repr_matrix_size = self.repr_basis[0].shape[0]
+        expanded = sp.zeros(repr_matrix_size)
+        for _, col_idx, val in self.coefficients.row(idx).row_list():
+            expr_idx, repr_idx = divmod(col_idx, len(self.repr_basis))
+            expanded += val * self.expr_basis[expr_idx] * self.repr_basis[
+                repr_idx]
+        return expanded
+
+    def __repr__(self):
+        return '{}(<{} terms, {} expressions, {} matrices>)'.format(
+            type(self).__name__, len(self), len(self.expr_basis),
+            len(self.repr_basis)
+        )
+
+    def coefficient_tensor(self, *, numeric=False):
+        """
+        Returns the coefficients of the basis elements as a dense array of shape ``(len(self), len(expr_basis), dim, dim)``. The basis element with index ``n`` is the sum of ``expr_basis[i] * tensor[n, i]`` over ``i``.
+
+        :param numeric: If set, the array is converted to complex numbers. Otherwise, it contains the exact :py:mod:`sympy` values.
+        :type numeric: bool
+
+        :rtype: numpy.ndarray
+        """
+        repr_matrix_size = self.repr_basis[0].shape[0]
+        repr_entries = [
+            sp.SparseMatrix(mat).row_list() for mat in self.repr_basis
+        ]
+        shape = (
+            len(self), len(self.expr_basis), repr_matrix_size, repr_matrix_size
+        )
+        tensor = np.full(shape, sp.Integer(0), dtype=object)
+        for term_idx, col_idx, val in self.coefficients.row_list():
+            expr_idx, repr_idx = divmod(col_idx, len(self.repr_basis))
+            for i, j, repr_val in repr_entries[repr_idx]:
+                tensor[term_idx, expr_idx, i, j] += val * repr_val
+        if numeric:
+            return tensor.astype(complex)
+        return tensor
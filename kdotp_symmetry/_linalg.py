@@ -4,12 +4,18 @@
 Defines the functions to calculate the basis of an intersection of vector spaces.
 """
 
-import enum
+import functools
 from collections import namedtuple
 
 import sympy as sp
 import numpy as np
-import networkx as nx
+import scipy.sparse
+import scipy.sparse.csgraph
+
+from ._gaussian_rational import gaussian_rational_rref, gaussian_rational_nullspace
+from ._modular import modular_rref, modular_nullspace
+from ._parallel import check_executor, executor_map
+from ._profiling import stage, matrix_info
 
 ZassenhausResult = namedtuple('ZassenhausResult', ['sum', 'intersection'])
 
@@ -20,7 +26,7 @@ def zassenhaus(basis_a, basis_b):
     """
     # handle the case where one of the bases is empty
     if len(basis_a) == 0 or len(basis_b) == 0:  # pylint: disable=no-else-return
-        mat, pivot = sp.Matrix(basis_a).rref()
+        mat, pivot = _rref(sp.Matrix(basis_a))
         plus_basis = mat[:len(pivot), :].tolist()
         return ZassenhausResult(sum=plus_basis, intersection=[])
     else:
@@ -31,7 +37,7 @@ def zassenhaus(basis_a, basis_b):
         if B.shape[1] != dim:
             raise ValueError('Inconsistent dimensions of the two bases given.')
         zassenhaus_mat = A.row_join(A).col_join(B.row_join(sp.zeros(*B.shape)))
-        mat, pivot = zassenhaus_mat.rref()
+        mat, pivot = _rref(zassenhaus_mat)
 
         # idx is the row index of the first row belonging to the intersection basis
         idx = np.searchsorted(pivot, dim)
@@ -41,69 +47,338 @@ def zassenhaus(basis_a, basis_b):
         return ZassenhausResult(sum=plus_basis, intersection=int_basis)
 
 
-def intersection_basis(*bases):
+def _rref(matrix):
+    """
+    Returns the reduced row echelon form and the pivot columns of a matrix, using the exact Gaussian rational backend if possible.
+    """
+    res = gaussian_rational_rref(matrix)
+    if res is None:
+        return matrix.rref()
+    return res
+
+
+def intersection_basis(*bases, solver='exact'):
     r"""
-    Given ``bases`` of different subspaces :math:`U_i \subseteq V`, returns a basis of the intersection :math:`\bigcap_i U_i`. The basis vectors must all have the same length.
+    Given ``bases`` of different subspaces :math:`U_i \subseteq V`, returns a basis of the intersection :math:`\bigcap_i U_i`. The basis vectors must all have the same length. For more than one subspace, the result is given in reduced row echelon form.
+
+    :param solver: The solver used for the row reduction, as in :func:`nullspace_blocked`.
+    :type solver: str
+    """
+    check_solver(solver)
+    bases = [[list(vec) for vec in basis] for basis in bases]
+    if any(len(basis) == 0 for basis in bases):
+        return []
+    if len(bases) == 1:
+        return bases[0]
+    dim = len(bases[0][0])
+    if any(len(vec) != dim for basis in bases for vec in basis):
+        raise ValueError('Inconsistent dimensions of the bases given.')
+    sparse_bases = [[_to_sparse(vec) for vec in basis] for basis in bases]
+    return [
+        _to_dense(vec, dim=dim) for vec in
+        sparse_intersection_basis(sparse_bases, dim=dim, solver=solver)
+    ]
+
+
+def sparse_intersection_basis(bases, *, dim, solver='exact'):
+    """
+    Computes a basis of the intersection of the spans of the given ``bases``, where each vector is given as a dictionary mapping the index to the (non-zero) value. The result is given in the same form. For more than one subspace, it is in reduced row echelon form.
+
+    The bases are intersected pairwise, starting from the smallest one. Each step is a Zassenhaus intersection, where only the intersection part of the reduced row echelon form is kept.
     """
-    # sorting is not strictly needed, but usually more efficient
-    bases_sorted = sorted(bases, key=len)
-    current_basis = bases_sorted.pop(0)
-    for basis in bases_sorted:
-        if len(current_basis) == 0:
+    if len(bases) == 1:
+        return list(bases[0])
+    bases = sorted(bases, key=len)
+    result = bases[0]
+    for basis in bases[1:]:
+        if not result:
             break
-        current_basis = zassenhaus(current_basis, basis).intersection
-    return current_basis
+        zassenhaus_rows = [{
+            **vec,
+            **{dim + idx: val
+               for idx, val in vec.items()}
+        } for vec in result]
+        zassenhaus_rows.extend(basis)
+        # rows with a pivot in the second half span the intersection
+        result = []
+        for row in _sparse_rref_basis_solver(
+            zassenhaus_rows, dim=2 * dim, solver=solver
+        ):
+            if min(row) >= dim:
+                result.append({idx - dim: val for idx, val in row.items()})
+    return result
 
 
-@enum.unique
-class _NodeType(enum.Enum):
-    ROW = 'row'
-    COLUMN = 'column'
+def rref_basis(vectors, *, dim, max_rank=None):
+    """
+    Computes the reduced row echelon basis of the span of the given ``vectors``, which are given as dictionaries mapping the index to the (non-zero) value. The vectors are consumed lazily, such that the computation stops as soon as the basis has ``max_rank`` elements.
+    """
+    return [
+        _to_dense(vec, dim=dim)
+        for vec in sparse_rref_basis(vectors, max_rank=max_rank)
+    ]
 
 
-def nullspace_blocked(matrix, **kwargs):
+def sparse_rref_basis(vectors, *, max_rank=None):
+    """
+    Computes the reduced row echelon basis of the span of the given ``vectors``, like :func:`rref_basis`. The basis vectors are returned as dictionaries of the non-zero entries, sorted by their pivot index.
+    """
+    # maps the pivot index to the (normalized) basis vector
+    basis = {}
+    for vec in vectors:
+        if max_rank is not None and len(basis) >= max_rank:
+            break
+        vec = {idx: sp.sympify(val) for idx, val in vec.items()}
+        for pivot_idx in sorted(basis):
+            if pivot_idx in vec:
+                _add_scaled(vec, basis[pivot_idx], -vec[pivot_idx])
+        if not vec:
+            continue
+        pivot_idx = min(vec)
+        pivot_val = vec[pivot_idx]
+        vec = {idx: _simplify(val / pivot_val) for idx, val in vec.items()}
+        for basis_vec in basis.values():
+            if pivot_idx in basis_vec:
+                _add_scaled(basis_vec, vec, -basis_vec[pivot_idx])
+        basis[pivot_idx] = vec
+    return [basis[pivot_idx] for pivot_idx in sorted(basis)]
+
+
+def _sparse_rref_basis_solver(vectors, *, dim, solver):
+    """
+    Computes the reduced row echelon basis of the span of the given ``vectors`` like :func:`sparse_rref_basis`, using the multi-modular solver if ``solver`` is ``'modular'`` and the vectors are over the Gaussian rationals.
+    """
+    if solver == 'modular':
+        res = modular_rref(
+            sp.SparseMatrix(
+                len(vectors), dim, {(i, idx): val
+                                    for i, vec in enumerate(vectors)
+                                    for idx, val in vec.items()}
+            )
+        )
+        if res is not None:
+            mat, pivots = res
+            return [{
+                idx: val
+                for idx, val in enumerate(mat.row(i)) if val != 0
+            } for i in range(len(pivots))]
+    return sparse_rref_basis(vectors)
+
+
+def _to_sparse(vec):
+    """
+    Converts a vector into a dictionary of its non-zero entries.
+    """
+    return {idx: val for idx, val in enumerate(vec) if val != 0}
+
+
+def _to_dense(vec, *, dim):
+    """
+    Converts a dictionary of the non-zero entries of a vector with length ``dim`` into a list.
+    """
+    return [vec.get(idx, sp.Integer(0)) for idx in range(dim)]
+
+
+def _add_scaled(vec, other, factor):
+    """
+    Adds ``factor * other`` to ``vec`` in place, for vectors given as dictionaries of the non-zero entries.
+    """
+    for idx, val in other.items():
+        new_val = _simplify(vec.get(idx, sp.Integer(0)) + factor * val)
+        if new_val == 0:
+            vec.pop(idx, None)
+        else:
+            vec[idx] = new_val
+
+
+def _simplify(val):
+    """
+    Simplifies a value such that it can be reliably compared to zero.
+    """
+    if val.is_Rational:
+        return val
+    return sp.simplify(val)
+
+
+def invariant_blocks(matrices):
+    """
+    Returns the partition of the indices of the given square ``matrices`` into blocks which are not mixed by any of the matrices. In the basis ordered by the blocks, all matrices are block-diagonal. Each block is a sorted list of indices, and the blocks are sorted by their first index.
+    """
+    dim = matrices[0].shape[0]
+    row_indices = []
+    column_indices = []
+    for mat in matrices:
+        rows, columns = _nonzero_pattern(mat)
+        row_indices.append(rows)
+        column_indices.append(columns)
+    components = connected_components(
+        dim, np.concatenate(row_indices), np.concatenate(column_indices)
+    )
+    return [component.tolist() for component in components]
+
+
+def nullspace_blocked(
+    matrix, *, solver='exact', executor=None, max_workers=None, **kwargs
+):
     """
     Calculate the nullspace of a given matrix. This is functionally equivalent to sympy's ``nullspace`` method, but it first subdivides the matrix into block-diagonal parts if possible.
 
+    The matrix is handled in sparse form, such that only the (dense) blocks are ever stored with their zero entries.
+
     Keyword arguments are forwarded to the sympy nullspace method.
-    """
-    n_rows, n_cols = matrix.shape
-    row_nodes = [(_NodeType.ROW, i) for i in range(n_rows)]
-    column_nodes = [(_NodeType.COLUMN, i) for i in range(n_cols)]
 
-    graph = nx.Graph()
+    :param solver: Determines how the nullspaces of the blocks are computed. With ``'exact'``, blocks over the Gaussian rationals are solved by exact fraction-free elimination. With ``'modular'``, they are solved modulo several primes, and the exact result is reconstructed and verified. Other blocks are always solved with sympy. The result does not depend on the solver.
+    :type solver: str
 
-    graph.add_nodes_from(row_nodes)
-    graph.add_nodes_from(column_nodes)
+    :param executor: Determines how the nullspaces of the independent blocks are computed. If ``None``, they are computed one after another in the current process. If ``'process'``, a :py:class:`concurrent.futures.ProcessPoolExecutor` is created for the duration of the call. Otherwise, the given :py:class:`concurrent.futures.Executor` is used. The result does not depend on the executor.
+    :type executor: None, str, concurrent.futures.Executor
 
-    for row_idx in range(n_rows):
-        for column_idx, val in enumerate(matrix.row(row_idx)):
-            if val.is_nonzero:
-                graph.add_edge((_NodeType.ROW, row_idx),
-                               (_NodeType.COLUMN, column_idx))
+    :param max_workers: The number of workers used when ``executor`` is ``'process'``. Defaults to the number of processors.
+    :type max_workers: int
+    """
+    n_cols = sp.SparseMatrix(matrix).shape[1]
+    return [
+        sp.Matrix(_to_dense(vec, dim=n_cols))
+        for vec in sparse_nullspace_blocked(
+            matrix,
+            solver=solver,
+            executor=executor,
+            max_workers=max_workers,
+            **kwargs
+        )
+    ]
 
-    nullspace = []
-    components = list(nx.connected_components(graph))
-    for component in components:
-        row_indices = sorted(
-            idx for kind, idx in component if kind is _NodeType.ROW
+
+def sparse_nullspace_blocked(
+    matrix, *, solver='exact', executor=None, max_workers=None, **kwargs
+):
+    """
+    Calculate the nullspace of a given matrix, like :func:`nullspace_blocked`. The basis vectors are returned as dictionaries of their non-zero entries, such that no dense vector of the full dimension is created.
+    """
+    check_solver(solver)
+    check_executor(executor)
+    with stage('nullspace_blocked') as info:
+        matrix = sp.SparseMatrix(matrix)
+        info.update(matrix_info(matrix))
+        blocks = _matrix_blocks(matrix)
+        info.update(
+            num_components=len(blocks),
+            component_shapes=[mat_part.shape for _, mat_part in blocks]
         )
-        column_indices = sorted(
-            idx for kind, idx in component if kind is _NodeType.COLUMN
+        block_nullspaces = executor_map(
+            functools.partial(_block_nullspace, solver=solver, **kwargs),
+            [mat_part for _, mat_part in blocks],
+            executor=executor,
+            max_workers=max_workers
         )
-        if len(column_indices) == 0:
-            continue
-        mat_part = matrix[row_indices, column_indices]
-        # Get rid of fractions -- least common multiple of the denominators
-        # This greatly improves the performance of sympy's nullspace -- for
-        # whatever reason.
-        mat_part *= sp.lcm([sp.fraction(val)[1] for val in mat_part])
-        nullspace_part = np.array(mat_part.nullspace(**kwargs))
-        if len(nullspace_part) == 0:
+        block_columns = [component_columns for component_columns, _ in blocks]
+        nullspace = []
+        for component_columns, block_nullspace in zip(
+            block_columns, block_nullspaces
+        ):
+            for vec_part in block_nullspace:
+                nullspace.append({
+                    idx: val
+                    for idx, val in zip(component_columns, vec_part)
+                    if val != 0
+                })
+        info['dimension'] = len(nullspace)
+    return nullspace
+
+
+def check_solver(solver):
+    """
+    Checks that the given ``solver`` is valid.
+    """
+    if solver not in ('exact', 'modular'):
+        raise ValueError(
+            "Invalid solver '{}', must be 'exact' or 'modular'.".
+            format(solver)
+        )
+
+
+def _matrix_blocks(matrix):
+    """
+    Splits a sparse matrix into the (dense) blocks which do not share any rows or columns with each other. Returns a list of the column indices and the matrix of each block. Blocks without columns are dropped, since they do not contribute to the nullspace.
+    """
+    n_rows, n_cols = matrix.shape
+    row_indices, column_indices = _nonzero_pattern(matrix)
+
+    # rows are the nodes 0, ..., n_rows - 1, and columns the following ones
+    components = connected_components(
+        n_rows + n_cols, row_indices, column_indices + n_rows
+    )
+
+    blocks = []
+    for component in components:
+        split_idx = np.searchsorted(component, n_rows)
+        component_rows = component[:split_idx].tolist()
+        component_columns = (component[split_idx:] - n_rows).tolist()
+        if len(component_columns) == 0:
             continue
-        nullspace_part_extended = np.zeros((len(nullspace_part), n_cols),
-                                           dtype=object)
-        nullspace_part_extended[:, column_indices] = nullspace_part
-        nullspace.extend([sp.Matrix(vec) for vec in nullspace_part_extended])
+        blocks.append((
+            component_columns,
+            sp.Matrix(matrix.extract(component_rows, component_columns))
+        ))
+    return blocks
 
-    return nullspace
+
+def _block_nullspace(mat_part, *, solver, **kwargs):
+    """
+    Calculates the nullspace of a single (dense) block. The exact Gaussian rational backend or the multi-modular solver is used if all entries are Gaussian rationals, otherwise the sympy nullspace is used.
+    """
+    if solver == 'modular':
+        res = modular_nullspace(mat_part)
+    else:
+        res = gaussian_rational_nullspace(mat_part)
+    if res is not None:
+        return res
+    # Get rid of fractions -- least common multiple of the denominators
+    # This greatly improves the performance of sympy's nullspace -- for
+    # whatever reason.
+    mat_part *= sp.lcm([sp.fraction(val)[1] for val in mat_part])
+    return mat_part.nullspace(**kwargs)
+
+
+def _nonzero_pattern(matrix):
+    """
+    Returns the row and column indices of the non-zero entries of a matrix, as integer arrays.
+    """
+    entries = [(i, j) for i, j, val in sp.SparseMatrix(matrix).row_list()
+               if not val.is_zero]
+    pattern = np.array(entries, dtype=int).reshape(-1, 2)
+    return pattern[:, 0], pattern[:, 1]
+
+
+def connected_components(num_nodes, indices_a, indices_b):
+    """
+    Returns the connected components of the graph with ``num_nodes`` nodes and edges between ``indices_a`` and ``indices_b``. Each component is a sorted array of node indices, and the components are sorted by their first index.
+    """
+    adjacency = scipy.sparse.coo_matrix(
+        (np.ones(len(indices_a), dtype=bool), (indices_a, indices_b)),
+        shape=(num_nodes, num_nodes)
+    )
+    _, labels = scipy.sparse.csgraph.connected_components(
+        adjacency, directed=False
+    )
+    # a stable sort keeps the nodes within each component sorted
+    order = np.argsort(labels, kind='stable')
+    split_indices = np.flatnonzero(np.diff(labels[order])) + 1
+    components = np.split(order, split_indices)
+    return sorted(components, key=lambda component: component[0])
+
+
+def sparse_kron(matrix_a, matrix_b):
+    """
+    Returns the Kronecker product of two matrices as a :py:class:`sympy.SparseMatrix`, computed from their non-zero entries only.
+    """
+    matrix_a = sp.SparseMatrix(matrix_a)
+    matrix_b = sp.SparseMatrix(matrix_b)
+    n_rows_b, n_cols_b = matrix_b.shape
+    entries_b = matrix_b.row_list()
+    return sp.SparseMatrix(
+        matrix_a.shape[0] * n_rows_b, matrix_a.shape[1] * n_cols_b,
+        {(i_a * n_rows_b + i_b, j_a * n_cols_b + j_b): val_a * val_b
+         for i_a, j_a, val_a in matrix_a.row_list()
+         for i_b, j_b, val_b in entries_b}
+    )
@@ -0,0 +1,285 @@
+# © 2017-2018, ETH Zurich, Institut für Theoretische Physik
+# Author:  Dominik Gresch <greschd@gmx.ch>
+"""
+Defines a multi-modular solver for the reduced row echelon form and the nullspace of matrices whose entries are Gaussian rationals.
+
+The matrix is reduced modulo several word-sized primes :math:`p \\equiv 1 \\mod 4`, for which the imaginary unit has a square root :math:`s` modulo :math:`p`. A Gaussian integer :math:`a + b i` is mapped to the two residues :math:`a \\pm b s`, such that the real and imaginary part of the result can be recovered. The elimination modulo each prime is done with vectorized ``int64`` NumPy arithmetic. The exact result is reconstructed with the Chinese remainder theorem and rational reconstruction, and verified exactly against the original matrix.
+"""
+
+import itertools
+from fractions import Fraction
+
+import numpy as np
+import sympy as sp
+
+from ._gaussian_rational import to_gaussian_integer_rows, fraction_pair_to_sympy
+
+# the product of two residues must fit into an int64
+_PRIME_BOUND = 2**31
+
+
+def modular_rref(matrix, *, max_primes=64):
+    """
+    Returns the reduced row echelon form of a matrix and the indices of the pivot columns, in the same format as :py:meth:`sympy.Matrix.rref`. Returns ``None`` if the matrix is not over the Gaussian rationals, or if the result could not be reconstructed with ``max_primes`` primes.
+
+    :param matrix: The input matrix.
+    :type matrix: sympy.Matrix
+
+    :param max_primes: The maximum number of primes used before giving up.
+    :type max_primes: int
+    """
+    n_rows, n_cols = sp.Matrix(matrix).shape
+    rows = to_gaussian_integer_rows(matrix)
+    if rows is None:
+        return None
+    is_real = all(val[1] == 0 for row in rows for val in row)
+    pivots = real_crt = imag_crt = None
+    for prime, sqrt_minus_one in itertools.islice(_primes(), max_primes):
+        prime_res = _rref_residues(
+            rows,
+            n_cols=n_cols,
+            prime=prime,
+            sqrt_minus_one=sqrt_minus_one,
+            is_real=is_real
+        )
+        if prime_res is None:
+            continue
+        prime_pivots, real_part, imag_part = prime_res
+        # The rank can only drop modulo a prime, and the pivots can only
+        # move to later columns. Primes where this happens are discarded.
+        if pivots is None or _is_better(prime_pivots, pivots):
+            pivots = prime_pivots
+            real_crt = _CRTAccumulator()
+            imag_crt = _CRTAccumulator()
+        elif prime_pivots != pivots:
+            continue
+        real_crt.add(real_part, prime=prime)
+        imag_crt.add(imag_part, prime=prime)
+        rref_rows = _reconstruct(real_crt, imag_crt, pivots=pivots)
+        if rref_rows is not None and _verify(rows, rref_rows, pivots=pivots):
+            res = _to_sympy_matrix(rref_rows, n_rows=n_rows, n_cols=n_cols)
+            return res, pivots
+    return None
+
+
+def modular_nullspace(matrix, *, max_primes=64):
+    """
+    Returns a basis of the nullspace of a matrix, as a list of column matrices. The result is the same as for :py:meth:`sympy.Matrix.nullspace`. Returns ``None`` if :func:`modular_rref` fails.
+
+    :param matrix: The input matrix.
+    :type matrix: sympy.Matrix
+
+    :param max_primes: The maximum number of primes used before giving up.
+    :type max_primes: int
+    """
+    n_cols = sp.Matrix(matrix).shape[1]
+    res = modular_rref(matrix, max_primes=max_primes)
+    if res is None:
+        return None
+    rref_mat, pivots = res
+    pivot_set = set(pivots)
+    basis = []
+    for free_idx in range(n_cols):
+        if free_idx in pivot_set:
+            continue
+        vec = sp.zeros(n_cols, 1)
+        vec[free_idx] = sp.Integer(1)
+        for row_idx, pivot_idx in enumerate(pivots):
+            vec[pivot_idx] = -rref_mat[row_idx, free_idx]
+        basis.append(vec)
+    return basis
+
+
+def _primes():
+    """
+    Generates the primes :math:`p \\equiv 1 \\mod 4` below the bound, in descending order, together with a square root of -1 modulo :math:`p`.
+    """
+    prime = _PRIME_BOUND
+    while True:
+        prime = sp.prevprime(prime)
+        if prime % 4 == 1:
+            yield prime, _sqrt_minus_one(prime)
+
+
+def _sqrt_minus_one(prime):
+    """
+    Returns a square root of -1 modulo a prime :math:`p \\equiv 1 \\mod 4`.
+    """
+    base = 2
+    # find a quadratic non-residue
+    while pow(base, (prime - 1) // 2, prime) != prime - 1:
+        base += 1
+    return pow(base, (prime - 1) // 4, prime)
+
+
+def _is_better(pivots_a, pivots_b):
+    """
+    Checks if the pivots ``pivots_a`` belong to a larger rank, or to earlier pivot columns than ``pivots_b``.
+    """
+    return (-len(pivots_a), pivots_a) < (-len(pivots_b), pivots_b)
+
+
+def _rref_residues(rows, *, n_cols, prime, sqrt_minus_one, is_real):
+    """
+    Computes the reduced row echelon form modulo a prime. Returns the pivots, and the residues of the real and imaginary part of the non-zero rows, or ``None`` if the two residues of the Gaussian integers give different pivots.
+    """
+    residues_plus = _to_residues(
+        rows, n_cols=n_cols, prime=prime, sqrt_minus_one=sqrt_minus_one
+    )
+    rref_plus, pivots = _rref_mod(residues_plus, prime=prime)
+    if is_real:
+        return pivots, rref_plus, np.zeros_like(rref_plus)
+    residues_minus = _to_residues(
+        rows,
+        n_cols=n_cols,
+        prime=prime,
+        sqrt_minus_one=prime - sqrt_minus_one
+    )
+    rref_minus, pivots_minus = _rref_mod(residues_minus, prime=prime)
+    if pivots_minus != pivots:
+        # the prime is unlucky for one of the two residues
+        return None
+    inverse_two = pow(2, prime - 2, prime)
+    inverse_two_s = pow(2 * sqrt_minus_one, prime - 2, prime)
+    real_part = (rref_plus + rref_minus) % prime * inverse_two % prime
+    imag_part = (rref_plus - rref_minus) % prime * inverse_two_s % prime
+    return pivots, real_part, imag_part
+
+
+def _to_residues(rows, *, n_cols, prime, sqrt_minus_one):
+    """
+    Maps rows of Gaussian integers to an array of residues modulo a prime, where the imaginary unit is mapped to ``sqrt_minus_one``.
+    """
+    res = np.zeros((len(rows), n_cols), dtype=np.int64)
+    for i, row in enumerate(rows):
+        for j, (real, imag) in enumerate(row):
+            if real or imag:
+                res[i, j] = (real + imag * sqrt_minus_one) % prime
+    return res
+
+
+def _rref_mod(matrix, *, prime):
+    """
+    Computes the reduced row echelon form of an array of residues modulo a prime with Gauss-Jordan elimination. Returns the non-zero rows and the pivots. Only the rows with a non-zero entry in the pivot column are updated in each step.
+    """
+    matrix = matrix.copy()
+    n_rows, n_cols = matrix.shape
+    pivots = []
+    for column_idx in range(n_cols):
+        row_idx = len(pivots)
+        if row_idx == n_rows:
+            break
+        candidates = np.flatnonzero(matrix[row_idx:, column_idx])
+        if len(candidates) == 0:
+            continue
+        pivot_row_idx = row_idx + candidates[0]
+        matrix[[row_idx, pivot_row_idx]] = matrix[[pivot_row_idx, row_idx]]
+        inverse = pow(int(matrix[row_idx, column_idx]), prime - 2, prime)
+        matrix[row_idx] = matrix[row_idx] * inverse % prime
+        update_indices = np.flatnonzero(matrix[:, column_idx])
+        update_indices = update_indices[update_indices != row_idx]
+        if len(update_indices) > 0:
+            update = np.outer(
+                matrix[update_indices, column_idx], matrix[row_idx]
+            ) % prime
+            matrix[update_indices] = (matrix[update_indices] - update) % prime
+        pivots.append(column_idx)
+    return matrix[:len(pivots)], tuple(pivots)
+
+
+class _CRTAccumulator:
+    """
+    Combines residues of an integer array modulo different primes with the Chinese remainder theorem.
+    """
+    def __init__(self):
+        self.modulus = 1
+        self.values = None
+
+    def add(self, residues, *, prime):
+        """
+        Adds the residues modulo a new prime.
+        """
+        residues = residues.astype(object)
+        if self.values is None:
+            self.values = residues
+        else:
+            inverse = pow(self.modulus % prime, prime - 2, prime)
+            self.values = self.values + self.modulus * (
+                (residues - self.values % prime) * inverse % prime
+            )
+        self.modulus *= prime
+
+
+def _reconstruct(real_crt, imag_crt, *, pivots):
+    """
+    Reconstructs the rows of the reduced row echelon form from the combined residues of the real and imaginary part. Returns ``None`` if the reconstruction fails for any entry.
+    """
+    pivot_set = set(pivots)
+    rref_rows = []
+    for real_row, imag_row in zip(real_crt.values, imag_crt.values):
+        row = {}
+        for j, (real, imag) in enumerate(zip(real_row, imag_row)):
+            if j in pivot_set:
+                continue
+            real = _rational_reconstruction(real, real_crt.modulus)
+            imag = _rational_reconstruction(imag, imag_crt.modulus)
+            if real is None or imag is None:
+                return None
+            if real or imag:
+                row[j] = (real, imag)
+        rref_rows.append(row)
+    for row, pivot_idx in zip(rref_rows, pivots):
+        row[pivot_idx] = (Fraction(1), Fraction(0))
+    return rref_rows
+
+
+def _rational_reconstruction(value, modulus):
+    """
+    Returns the fraction :math:`n / d` with :math:`n \\equiv d \\cdot value \\mod modulus` and :math:`|n|, d \\leq \\sqrt{modulus / 2}`, or ``None`` if it does not exist.
+    """
+    value %= modulus
+    if value == 0:
+        return Fraction(0)
+    bound = sp.integer_nthroot(modulus // 2, 2)[0]
+    r_prev, r_curr = modulus, value
+    t_prev, t_curr = 0, 1
+    while r_curr > bound:
+        quotient = r_prev // r_curr
+        r_prev, r_curr = r_curr, r_prev - quotient * r_curr
+        t_prev, t_curr = t_curr, t_prev - quotient * t_curr
+    if t_curr == 0 or abs(t_curr) > bound:
+        return None
+    return Fraction(r_curr, t_curr)
+
+
+def _to_sympy_matrix(rref_rows, *, n_rows, n_cols):
+    """
+    Converts the rows of the reduced row echelon form into a sympy matrix, padded with zero rows.
+    """
+    res = sp.zeros(n_rows, n_cols)
+    for i, row in enumerate(rref_rows):
+        for j, val in row.items():
+            res[i, j] = fraction_pair_to_sympy(val)
+    return res
+
+
+def _verify(rows, rref_rows, *, pivots):
+    """
+    Checks that each row of the matrix is the combination of the rows of the reduced row echelon form given by its entries in the pivot columns. Since the rank modulo a prime is at most the true rank, this proves that the reduced row echelon form is correct.
+    """
+    for row in rows:
+        combination = {}
+        for rref_row, pivot_idx in zip(rref_rows, pivots):
+            factor_real, factor_imag = row[pivot_idx]
+            if not (factor_real or factor_imag):
+                continue
+            for j, (real, imag) in rref_row.items():
+                old_real, old_imag = combination.get(j, (0, 0))
+                combination[j] = (
+                    old_real + factor_real * real - factor_imag * imag,
+                    old_imag + factor_real * imag + factor_imag * real
+                )
+        for j, val in enumerate(row):
+            if combination.get(j, (0, 0)) != val:
+                return False
+    return True
@@ -0,0 +1,126 @@
+# © 2017-2018, ETH Zurich, Institut für Theoretische Physik
+# Author:  Dominik Gresch <greschd@gmx.ch>
+"""
+Defines floating-point linear algebra routines for computing invariant subspaces, and for recovering exact basis vectors from the numeric result.
+"""
+
+import numpy as np
+import scipy.linalg
+import sympy as sp
+
+
+def to_numpy(matrix):
+    """
+    Converts a sympy matrix with numeric entries into a complex NumPy array.
+
+    :param matrix: The matrix to convert.
+    :type matrix: sympy.Matrix
+    """
+    matrix = sp.SparseMatrix(matrix)
+    res = np.zeros(matrix.shape, dtype=complex)
+    for i, j, val in matrix.row_list():
+        res[i, j] = complex(val)
+    return res
+
+
+def numeric_nullspace(matrix, *, dimension):
+    """
+    Returns an orthonormal basis of the nullspace of a matrix with known ``dimension``, as the columns of an array. The basis is given by the right singular vectors of the ``dimension`` smallest singular values.
+
+    :param matrix: The input matrix.
+    :type matrix: numpy.ndarray
+
+    :param dimension: The dimension of the nullspace.
+    :type dimension: int
+    """
+    n_cols = matrix.shape[1]
+    if dimension == 0:
+        return np.zeros((n_cols, 0), dtype=complex)
+    _, _, right_vectors = scipy.linalg.svd(matrix)
+    return right_vectors[n_cols - dimension:].conj().T
+
+
+def numeric_intersection(basis_a, basis_b, *, tolerance):
+    """
+    Returns an orthonormal basis of the intersection of two subspaces, given by orthonormal bases in the columns of ``basis_a`` and ``basis_b``. The intersection is spanned by the principal vectors whose principal angle is zero up to the given ``tolerance``.
+
+    :param basis_a: Orthonormal basis of the first subspace.
+    :type basis_a: numpy.ndarray
+
+    :param basis_b: Orthonormal basis of the second subspace.
+    :type basis_b: numpy.ndarray
+
+    :param tolerance: Tolerance for the cosine of the principal angles.
+    :type tolerance: float
+    """
+    if basis_a.shape[1] == 0 or basis_b.shape[1] == 0:
+        return np.zeros((basis_a.shape[0], 0), dtype=complex)
+    left_vectors, cosines, _ = scipy.linalg.svd(basis_a.conj().T @ basis_b)
+    return basis_a @ left_vectors[:, :len(cosines)][:, cosines > 1 - tolerance]
+
+
+def numeric_rref(vectors, *, tolerance):
+    """
+    Returns the reduced row echelon form of the given vectors (rows of an array), and the indices of the pivot columns. Entries smaller than ``tolerance`` relative to the largest entry are treated as zero. The pivots are the same as for the exact reduced row echelon form if the vectors are accurate to the given tolerance.
+
+    :param vectors: The input vectors, as rows of an array.
+    :type vectors: numpy.ndarray
+
+    :param tolerance: Relative tolerance for treating entries as zero.
+    :type tolerance: float
+    """
+    matrix = np.array(vectors, dtype=complex)
+    n_rows, n_cols = matrix.shape
+    threshold = tolerance * max(np.max(np.abs(matrix), initial=0), 1)
+    pivots = []
+    for column_idx in range(n_cols):
+        row_idx = len(pivots)
+        if row_idx == n_rows:
+            break
+        pivot_row_idx = row_idx + np.argmax(
+            np.abs(matrix[row_idx:, column_idx])
+        )
+        if abs(matrix[pivot_row_idx, column_idx]) <= threshold:
+            continue
+        matrix[[row_idx, pivot_row_idx]] = matrix[[pivot_row_idx, row_idx]]
+        matrix[row_idx] /= matrix[row_idx, column_idx]
+        factors = matrix[:, column_idx].copy()
+        factors[row_idx] = 0
+        matrix -= np.outer(factors, matrix[row_idx])
+        pivots.append(column_idx)
+    matrix = matrix[:len(pivots)]
+    matrix[np.abs(matrix) <= threshold] = 0
+    return matrix, tuple(pivots)
+
+
+def rationalize(value, *, tolerance, cache=None):
+    """
+    Returns a simple exact sympy number which is equal to the given complex ``value`` up to the ``tolerance``. The real and imaginary part are converted separately with :py:func:`sympy.nsimplify`, which can identify rational numbers and simple square roots.
+
+    :param value: The value to convert.
+    :type value: complex
+
+    :param tolerance: Absolute tolerance of the exact result.
+    :type tolerance: float
+
+    :param cache: Dictionary of previously converted real numbers, which is updated with the new results.
+    :type cache: dict
+    """
+    if cache is None:
+        cache = {}
+    value = complex(value)
+    return _rationalize_real(
+        value.real, tolerance=tolerance, cache=cache
+    ) + sp.I * _rationalize_real(value.imag, tolerance=tolerance, cache=cache)
+
+
+def _rationalize_real(value, *, tolerance, cache):
+    """
+    Converts a real number into a simple exact sympy number, re-using the results for values which agree up to the tolerance.
+    """
+    if abs(value) <= tolerance:
+        return sp.Integer(0)
+    key = int(round(value / tolerance))
+    if key not in cache:
+        cache[key] = sp.nsimplify(value, tolerance=tolerance, rational=False)
+    return cache[key]
@@ -0,0 +1,221 @@
+# © 2017-2018, ETH Zurich, Institut für Theoretische Physik
+# Author:  Dominik Gresch <greschd@gmx.ch>
+"""
+Defines a floating-point version of the calculation of the symmetric Hamiltonian, which can be used with numeric symmetry operations.
+"""
+
+import numpy as np
+import scipy.linalg
+import scipy.sparse
+import sympy as sp
+from fsc.export import export
+
+from ._expr_utils import K_VEC, polynomial_images
+from ._repr_utils import hermitian_basis
+from ._linalg import connected_components
+from ._numeric import to_numpy, numeric_rref
+from ._logging_setup import LOGGER
+
+
+@export
+def numeric_symmetric_hamiltonian(
+    *symmetry_operations, expr_basis, repr_basis='auto', tolerance=1e-6
+):
+    r"""
+    Calculates the basis of the symmetric Hamiltonian for a given set of symmetry operations in floating-point arithmetic. In contrast to :py:func:`.symmetric_hamiltonian`, the symmetry operations can be numeric.
+
+    :param symmetry_operations: The symmetry operations that the Hamiltonian should respect. Both numeric and exact symmetry operations are accepted.
+    :type symmetry_operations: :py:class:`symmetry_representation.SymmetryOperation`
+
+    :param expr_basis: The basis for the :math:`\mathbf{k}`-functions that are considered. The basis elements must be polynomials in :math:`\mathbf{k}`.
+    :type expr_basis: :py:class:`list` of :py:mod:`sympy` expressions
+
+    :param repr_basis: The orthogonal basis for the hermitian matrices, with the same size as the representations. By default, the :py:func:`.hermitian_basis` of the appropriate size is used.
+    :type repr_basis: :py:class:`list` of matrices
+
+    :param tolerance: Singular values of the symmetry constraints below this tolerance are treated as zero. The same tolerance is used to check that the symmetry operations are compatible with the bases.
+    :type tolerance: float
+
+    :returns: Coefficients of the basis for the symmetric Hamiltonian, as an array of shape ``(n_terms, len(expr_basis), dim, dim)``. The basis element with index ``n`` is the sum of ``expr_basis[i] * coefficients[n, i]`` over ``i``. The basis is in reduced row echelon form w.r.t. the products of ``expr_basis`` and ``repr_basis``.
+    :rtype: numpy.ndarray
+    """
+    if not symmetry_operations:
+        raise ValueError('At least one symmetry operation must be given.')
+    repr_matrix_size = np.shape(symmetry_operations[0].repr.matrix)[0]
+    if repr_basis == 'auto':
+        repr_basis = hermitian_basis(repr_matrix_size)
+    repr_basis_array = np.array([_to_array(b) for b in repr_basis])
+
+    LOGGER.info('Calculating numeric matrix form of the symmetry operations.')
+    operator_matrices = [(
+        numeric_expr_matrix(
+            sym_op.rotation_matrix,
+            basis=expr_basis,
+            repr_has_cc=sym_op.repr.has_cc,
+            tolerance=tolerance
+        ),
+        numeric_repr_matrix(
+            sym_op.repr.matrix,
+            basis=repr_basis_array,
+            complex_conjugate=sym_op.repr.has_cc,
+            tolerance=tolerance
+        )
+    ) for sym_op in symmetry_operations]
+
+    LOGGER.info('Calculating numeric invariant subspace.')
+    basis_vectors = numeric_invariant_basis(
+        operator_matrices, tolerance=tolerance
+    )
+    # drop the imaginary part caused by rounding errors, such that the
+    # resulting matrices are exactly hermitian
+    if np.max(np.abs(basis_vectors.imag), initial=0) <= tolerance:
+        basis_vectors = basis_vectors.real
+    return np.einsum(
+        'nij,jab->niab',
+        basis_vectors.reshape(-1, len(expr_basis), len(repr_basis)),
+        repr_basis_array
+    )
+
+
+def numeric_invariant_basis(operator_matrices, *, tolerance):
+    r"""
+    Computes the basis of the subspace which is invariant under (F \otimes G) for all pairs (F, G) of the given ``operator_matrices``. The subspace is split into blocks which are not mixed by any of the operations, and the invariant subspace of each block is the nullspace of the sum of (F \otimes G - 1)^\dagger (F \otimes G - 1) over the operations.
+
+    :returns: The basis vectors in reduced row echelon form, as rows of an array.
+    """
+    full_matrices = [
+        scipy.sparse.csr_matrix(
+            scipy.sparse.kron(expr_mat, repr_mat) -
+            scipy.sparse.identity(expr_mat.shape[0] * repr_mat.shape[0])
+        ) for expr_mat, repr_mat in operator_matrices
+    ]
+    dim = full_matrices[0].shape[0]
+    pattern = scipy.sparse.coo_matrix(
+        sum(abs(mat) for mat in full_matrices) > tolerance
+    )
+    blocks = connected_components(dim, pattern.row, pattern.col)
+    LOGGER.info('Splitting the numeric problem into %s blocks.', len(blocks))
+
+    basis_vectors = []
+    for block in blocks:
+        constraint_matrices = [
+            mat[:, block][block, :].toarray() for mat in full_matrices
+        ]
+        gram_matrix = sum(mat.conj().T @ mat for mat in constraint_matrices)
+        eigenvalues, eigenvectors = scipy.linalg.eigh(gram_matrix)
+        # the eigenvalues of the Gram matrix are the squared singular values
+        block_basis = eigenvectors[:, eigenvalues <= tolerance**2]
+        if block_basis.shape[1] == 0:
+            continue
+        block_rref, _ = numeric_rref(block_basis.T, tolerance=tolerance)
+        block_vectors = np.zeros((len(block_rref), dim), dtype=complex)
+        block_vectors[:, block] = block_rref
+        basis_vectors.append(block_vectors)
+    if not basis_vectors:
+        return np.zeros((0, dim), dtype=complex)
+    # sort by the pivot index to get the reduced row echelon form
+    basis_vectors = np.concatenate(basis_vectors)
+    pivots = np.argmax(np.abs(basis_vectors) > 0, axis=1)
+    return basis_vectors[np.argsort(pivots, kind='stable')]
+
+
+def numeric_expr_matrix(
+    rotation_matrix, *, basis, repr_has_cc=False, tolerance=1e-6
+):
+    """
+    Returns the matrix form w.r.t. the polynomial ``basis`` of the expression operator corresponding to the (real-space) ``rotation_matrix``, in floating-point arithmetic. This is the numeric equivalent of :func:`.matrix_to_expr_matrix`.
+
+    :param rotation_matrix: Real-space matrix form of the symmetry operation.
+    :type rotation_matrix: array-like
+
+    :param basis: Basis of polynomials in (kx, ky, kz).
+    :type basis: list[sympy.Expr]
+
+    :param repr_has_cc: Specifies whether the symmetry contains time reversal.
+    :type repr_has_cc: bool
+
+    :param tolerance: Absolute tolerance for checking that the basis is invariant under the operation.
+    :type tolerance: float
+    """
+    try:
+        basis_coefficients = [sp.Poly(b, *K_VEC).as_dict() for b in basis]
+    except sp.PolynomialError as exc:
+        raise ValueError(
+            'The numeric calculation requires a polynomial basis, got {}.'.
+            format(basis)
+        ) from exc
+    # the images are built in the same way as for the exact calculation,
+    # and only the resulting coefficients are converted to floats
+    image_coefficients = polynomial_images(
+        _to_array(rotation_matrix).real.tolist(),
+        basis_coefficients=basis_coefficients,
+        repr_has_cc=repr_has_cc
+    )
+
+    monomials = sorted(set().union(*basis_coefficients, *image_coefficients))
+    monomial_positions = {m: i for i, m in enumerate(monomials)}
+
+    def to_array(coefficients_list):
+        """Write the polynomial coefficients as columns of an array."""
+        res = np.zeros((len(monomials), len(coefficients_list)), dtype=complex)
+        for col_idx, coefficients in enumerate(coefficients_list):
+            for monomial, coeff in coefficients.items():
+                res[monomial_positions[monomial], col_idx] = complex(coeff)
+        return res
+
+    basis_array = to_array(basis_coefficients)
+    image_array = to_array(image_coefficients)
+    res, _, _, _ = np.linalg.lstsq(basis_array, image_array, rcond=None)
+    if np.max(np.abs(basis_array @ res - image_array), initial=0) > tolerance:
+        raise ValueError(
+            'The basis {basis} is not invariant under the rotation {rotation}.'
+            .format(basis=basis, rotation=rotation_matrix)
+        )
+    return res
+
+
+def numeric_repr_matrix(
+    matrix_representation, *, basis, complex_conjugate=False, tolerance=1e-6
+):
+    """
+    Returns the matrix form w.r.t. the *orthogonal* ``basis`` of the operator given by :func:`.repr_to_matrix_operator`, in floating-point arithmetic.
+
+    :param matrix_representation: Real-space matrix form of the symmetry representation.
+    :type matrix_representation: array-like
+
+    :param basis: Basis of the hermitian matrices, as an array of shape ``(len(basis), dim, dim)``.
+    :type basis: numpy.ndarray
+
+    :param complex_conjugate: Specifies whether the representation contains complex conjugation.
+    :type complex_conjugate: bool
+
+    :param tolerance: Absolute tolerance for checking that the images of the basis are in the span of the basis.
+    :type tolerance: float
+    """
+    matrix_representation = _to_array(matrix_representation)
+    basis = np.asarray(basis, dtype=complex)
+    if complex_conjugate:
+        images = matrix_representation @ basis.conj(
+        ) @ matrix_representation.conj().T
+    else:
+        images = matrix_representation @ basis @ matrix_representation.conj().T
+    norm_squares = np.einsum('iab,iab->i', basis.conj(), basis).real
+    res = np.einsum('iab,jab->ij', basis.conj(), images) / norm_squares[:,
+                                                                        None]
+    if np.max(
+        np.abs(np.einsum('ij,iab->jab', res, basis) - images), initial=0
+    ) > tolerance:
+        raise ValueError(
+            'The images of the representation {repr} are not in the span of the basis.'
+            .format(repr=matrix_representation)
+        )
+    return res
+
+
+def _to_array(matrix):
+    """
+    Converts a sympy matrix or array-like into a complex NumPy array.
+    """
+    if isinstance(matrix, sp.MatrixBase):
+        return to_numpy(matrix)
+    return np.array(matrix, dtype=complex)
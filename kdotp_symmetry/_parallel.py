@@ -0,0 +1,77 @@
+# © 2017-2018, ETH Zurich, Institut für Theoretische Physik
+# Author:  Dominik Gresch <greschd@gmx.ch>
+"""
+Defines helper functions to distribute independent computations to an executor.
+"""
+
+import contextlib
+import concurrent.futures
+
+
+def check_executor(executor):
+    """
+    Checks that the given ``executor`` is valid, i.e. ``None``, ``'process'``, or a :py:class:`concurrent.futures.Executor`.
+    """
+    if not (
+        executor is None or executor == 'process'
+        or isinstance(executor, concurrent.futures.Executor)
+    ):
+        raise ValueError(
+            "Invalid executor '{}', must be None, 'process', or a concurrent.futures.Executor."
+            .format(executor)
+        )
+
+
+@contextlib.contextmanager
+def executor_context(executor, *, max_workers=None):
+    """
+    Context manager which resolves the ``executor`` option to an executor that can be re-used for several calls to :func:`executor_map`. If ``executor`` is ``'process'``, a :py:class:`concurrent.futures.ProcessPoolExecutor` is created, and shut down when the context is left. Otherwise, the given ``executor`` is returned unchanged.
+
+    :param max_workers: The number of workers used when ``executor`` is ``'process'``. Defaults to the number of processors.
+    :type max_workers: int
+    """
+    check_executor(executor)
+    if executor == 'process':
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers
+        ) as process_executor:
+            yield process_executor
+    else:
+        yield executor
+
+
+def executor_map(func, items, *, executor=None, max_workers=None):
+    """
+    Applies ``func`` to each of the ``items``, and generates the results in the same order as the items.
+
+    :param executor: If ``None``, the items are processed one after another in the current process. If ``'process'``, a :py:class:`concurrent.futures.ProcessPoolExecutor` is created for the duration of the call. Otherwise, the given :py:class:`concurrent.futures.Executor` is used.
+    :type executor: None, str, concurrent.futures.Executor
+
+    :param max_workers: The number of workers used when ``executor`` is ``'process'``. Defaults to the number of processors.
+    :type max_workers: int
+    """
+    check_executor(executor)
+    items = list(items)
+    if executor is None or len(items) <= 1:
+        for item in items:
+            yield func(item)
+    elif executor == 'process':
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers
+        ) as process_executor:
+            yield from _ordered_results(process_executor, func, items)
+    else:
+        yield from _ordered_results(executor, func, items)
+
+
+def _ordered_results(executor, func, items):
+    """
+    Submits all items to the executor, and generates the results in order.
+    """
+    futures = [executor.submit(func, item) for item in items]
+    try:
+        for future in futures:
+            yield future.result()
+    finally:
+        for future in futures:
+            future.cancel()
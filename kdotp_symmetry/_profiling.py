@@ -0,0 +1,196 @@
+# © 2017-2018, ETH Zurich, Institut für Theoretische Physik
+# Author:  Dominik Gresch <greschd@gmx.ch>
+"""
+Defines hooks to measure the time and memory used by the individual stages of the calculation.
+"""
+
+import time
+import pstats
+import cProfile
+import threading
+import contextlib
+import tracemalloc
+from collections import namedtuple
+
+import sympy as sp
+from fsc.export import export
+
+StageEvent = namedtuple(
+    'StageEvent', [
+        'stage', 'context', 'info', 'wall_time', 'cpu_time', 'peak_memory',
+        'profile'
+    ]
+)
+
+_LISTENERS = []
+_STATE = threading.local()
+
+
+class _Listener:
+    """
+    Receives the events of the stages while a :func:`profile_stages` context is active.
+    """
+    def __init__(self, callback, *, cprofile, trace_memory):
+        self.callback = callback
+        self.cprofile = cprofile
+        self.trace_memory = trace_memory
+
+    def profiles(self, stage_name):
+        """
+        Returns whether the listener requests a cProfile capture of the given stage.
+        """
+        if isinstance(self.cprofile, bool):
+            return self.cprofile
+        return stage_name in self.cprofile
+
+
+@export
+@contextlib.contextmanager
+def profile_stages(callback=None, *, cprofile=False, trace_memory=False):
+    """
+    Context manager which records an event for each stage of the calculations done inside of it, for example in :py:func:`.symmetric_hamiltonian`. The events are emitted when a stage ends, such that nested stages are reported before the stage which contains them.
+
+    Each event is a namedtuple with the following attributes:
+
+    * ``stage``: The name of the stage, for example ``'nullspace_blocked'``.
+    * ``context``: Dictionary which identifies the stage within the calculation, for example the index of the ``'operation'`` or ``'block'`` it belongs to. It contains the context of all enclosing stages.
+    * ``info``: Dictionary of the sizes measured in the stage, such as the ``'shape'`` and number of non-zero entries (``'nnz'``) of the matrices, the number of components found by :py:func:`.nullspace_blocked` or the ``'dimension'`` of the resulting subspace.
+    * ``wall_time``, ``cpu_time``: The wall time and CPU time of the stage, in seconds.
+    * ``peak_memory``: The peak memory allocated during the stage, in bytes, if ``trace_memory`` is set. Otherwise, ``None``.
+    * ``profile``: The :py:class:`pstats.Stats` of the stage, if it is profiled. Otherwise, ``None``.
+
+    Stages which are computed in a different process, when an executor is used, do not emit events.
+
+    :param callback: Function which is called with each event.
+    :type callback: callable
+
+    :param cprofile: Determines which stages are profiled with :py:mod:`cProfile`. Either a flag to profile all stages, or the names of the stages. Since only one profiler can be active at a time, stages inside a profiled stage are not profiled separately.
+    :type cprofile: bool, :py:class:`set` of :py:class:`str`
+
+    :param trace_memory: Flag to enable measuring the peak memory of each stage with :py:mod:`tracemalloc`. This slows down the calculation considerably.
+    :type trace_memory: bool
+
+    :returns: The list of events, which is filled as the stages end.
+    """
+    events = []
+
+    def emit(event):
+        events.append(event)
+        if callback is not None:
+            callback(event)
+
+    if not isinstance(cprofile, bool):
+        cprofile = frozenset(cprofile)
+    listener = _Listener(emit, cprofile=cprofile, trace_memory=trace_memory)
+    _LISTENERS.append(listener)
+    started_tracemalloc = trace_memory and not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start()
+    try:
+        yield events
+    finally:
+        _LISTENERS.remove(listener)
+        if started_tracemalloc:
+            tracemalloc.stop()
+
+
+@contextlib.contextmanager
+def stage(name, **context):
+    """
+    Context manager which marks a stage of the calculation. The keyword arguments identify the stage, and are inherited by the stages nested inside of it. The context manager returns a dictionary, to which the stage adds the sizes it measured.
+
+    If no :func:`profile_stages` context is active, the stage is not measured.
+    """
+    info = {}
+    listeners = list(_LISTENERS)
+    if not listeners:
+        yield info
+        return
+
+    stack = _stage_stack()
+    full_context = dict(stack[-1]['context']) if stack else {}
+    full_context.update(context)
+    trace_memory = any(listener.trace_memory for listener in listeners)
+    profiler = None
+    if not any(frame['profiler'] is not None for frame in stack) and any(
+        listener.profiles(name) for listener in listeners
+    ):
+        profiler = cProfile.Profile()
+    frame = dict(context=full_context, profiler=profiler, peak_memory=0)
+    if trace_memory and tracemalloc.is_tracing():
+        _update_peak_memory(stack)
+        frame['start_memory'] = tracemalloc.get_traced_memory()[0]
+    stack.append(frame)
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield info
+    except Exception as exc:
+        info['error'] = repr(exc)
+        raise
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        cpu_time = time.process_time() - cpu_start
+        wall_time = time.perf_counter() - wall_start
+        stack.pop()
+        peak_memory = None
+        if 'start_memory' in frame and tracemalloc.is_tracing():
+            _update_peak_memory(stack + [frame])
+            peak_memory = frame['peak_memory'] - frame['start_memory']
+        event = StageEvent(
+            stage=name,
+            context=full_context,
+            info=info,
+            wall_time=wall_time,
+            cpu_time=cpu_time,
+            peak_memory=peak_memory,
+            profile=_get_stats(profiler)
+        )
+        for listener in listeners:
+            if listener in _LISTENERS:
+                listener.callback(event)
+
+
+def _stage_stack():
+    """
+    Returns the stack of the currently active stages in this thread.
+    """
+    if not hasattr(_STATE, 'stack'):
+        _STATE.stack = []
+    return _STATE.stack
+
+
+def _update_peak_memory(frames):
+    """
+    Updates the peak memory of the given stages with the peak since the last update, and resets the peak. Since the peak is shared by all stages, it has to be recorded before it is reset for a nested stage. Before Python 3.9, the peak can not be reset, and the peak since the start of the tracing is used.
+    """
+    peak = tracemalloc.get_traced_memory()[1]
+    for frame in frames:
+        frame['peak_memory'] = max(frame['peak_memory'], peak)
+    if hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+
+
+def _get_stats(profiler):
+    """
+    Returns the statistics of the profiler, or None if the stage was not profiled.
+    """
+    if profiler is None:
+        return None
+    return pstats.Stats(profiler)
+
+
+def matrix_info(*matrices):
+    """
+    Returns the shape and the total number of non-zero entries of the given matrices, to be added to the info of a stage. Since counting the entries is not free, an empty dictionary is returned if no :func:`profile_stages` context is active.
+    """
+    if not _LISTENERS or not matrices:
+        return {}
+    return dict(
+        shape=tuple(matrices[0].shape),
+        nnz=sum(sp.SparseMatrix(mat).nnz() for mat in matrices)
+    )
@@ -7,6 +7,8 @@ Utilities for handling symmetry representations, such as converting them to matr
 import sympy as sp
 from fsc.export import export
 
+from ._to_matrix import to_matrix, cached_matrix
+
 
 def frobenius_product(A, B):
     r"""
@@ -122,3 +124,162 @@ def repr_to_matrix_operator(matrix_representation, complex_conjugate=False):
         return matrix_representation @ matrix @ matrix_representation.H
 
     return operator
+
+
+def repr_to_matrix(
+    matrix_representation,
+    *,
+    basis,
+    complex_conjugate=False,
+    basis_norm_squares=None
+):
+    """
+    Returns the matrix form w.r.t. the *orthogonal* ``basis`` of the operator given by :func:`repr_to_matrix_operator`.
+
+    If ``basis`` is the :func:`hermitian_basis` of the appropriate size, the matrix is constructed directly from the entries of the representation, since each basis element has at most two non-zero entries. The matrix is then returned as a :py:class:`sympy.SparseMatrix`, since it has only about ``dim**2`` non-zero entries out of ``dim**4``. Otherwise, the operator is applied to each basis element and the result is converted with :func:`hermitian_to_vector`. The result is cached in memory, see :func:`.matrix_cache_info`.
+
+    :param matrix_representation: Real-space matrix form of the symmetry representation.
+    :type matrix_representation: sympy.Matrix
+
+    :param basis: Basis of the hermitian matrices.
+    :type basis: list[sympy.Matrix]
+
+    :param complex_conjugate: Specifies whether the representation contains complex conjugation.
+    :type complex_conjugate: bool
+
+    :param basis_norm_squares: Squared norms of the basis elements, passed on to :func:`hermitian_to_vector`.
+    :type basis_norm_squares: list
+    """
+    return _repr_matrix(
+        sp.ImmutableMatrix(matrix_representation),
+        basis=tuple(sp.ImmutableMatrix(b) for b in basis),
+        complex_conjugate=bool(complex_conjugate),
+        basis_norm_squares=None
+        if basis_norm_squares is None else tuple(basis_norm_squares)
+    )
+
+
+@cached_matrix
+def _repr_matrix(
+    matrix_representation, *, basis, complex_conjugate, basis_norm_squares
+):
+    """
+    Implementation of :func:`repr_to_matrix`, for hashable arguments.
+    """
+    if _is_hermitian_basis(basis, matrix_representation.shape[0]):
+        return _hermitian_basis_repr_matrix(
+            matrix_representation, complex_conjugate=complex_conjugate
+        )
+    return to_matrix(
+        operator=repr_to_matrix_operator(
+            matrix_representation, complex_conjugate=complex_conjugate
+        ),
+        basis=basis,
+        to_vector_fct=hermitian_to_vector,
+        to_vector_kwargs=dict(basis_norm_squares=basis_norm_squares)
+    )
+
+
+def repr_trace(
+    matrix_representation,
+    *,
+    basis,
+    complex_conjugate=False,
+    basis_norm_squares=None
+):
+    """
+    Returns the trace of the matrix given by :func:`repr_to_matrix`, without computing the full matrix.
+
+    If ``basis`` spans all hermitian matrices, the trace does not depend on the basis and is computed directly from the representation. Otherwise, only the diagonal entries of the matrix are computed.
+
+    The parameters are the same as for :func:`repr_to_matrix`.
+    """
+    matrix_representation = sp.Matrix(matrix_representation)
+    if len(basis) == matrix_representation.shape[0]**2:
+        if complex_conjugate:
+            return sp.expand_complex(
+                (matrix_representation *
+                 matrix_representation.conjugate()).trace()
+            )
+        trace = matrix_representation.trace()
+        return sp.expand_complex(trace * trace.conjugate())
+    operator = repr_to_matrix_operator(
+        matrix_representation, complex_conjugate=complex_conjugate
+    )
+    if basis_norm_squares is None:
+        basis_norm_squares = [frobenius_product(b, b) for b in basis]
+    return sum(
+        frobenius_product(b, operator(b)) / norm_sq
+        for b, norm_sq in zip(basis, basis_norm_squares)
+    )
+
+
+def _is_hermitian_basis(basis, dim):
+    """
+    Checks whether ``basis`` is the :func:`hermitian_basis` of size ``dim``.
+    """
+    return len(basis) == dim**2 and all(
+        b == b_herm for b, b_herm in zip(basis, hermitian_basis(dim))
+    )
+
+
+def _hermitian_basis_repr_matrix(matrix_representation, complex_conjugate):
+    """
+    Constructs the matrix form of the representation operator w.r.t. the :func:`hermitian_basis` as a sparse matrix, using the sparsity of the basis elements.
+    """
+    dim = matrix_representation.shape[0]
+    # non-zero entries in each column of the representation matrix,
+    # and its complex conjugate
+    columns = [[(i, val) for i, val in enumerate(matrix_representation[:, j])
+                if val != 0] for j in range(dim)]
+    columns_conjugate = [[(i, val.conjugate()) for i, val in col]
+                         for col in columns]
+    # position of the real part of the off-diagonal basis elements, the
+    # imaginary part directly follows
+    off_diagonal_positions = {}
+    position = dim
+    for i in range(dim):
+        for j in range(i + 1, dim):
+            off_diagonal_positions[(i, j)] = position
+            position += 2
+
+    def to_vector(matrix_entries):
+        """
+        Converts a hermitian matrix, given by its non-zero entries, into vector form.
+        """
+        vec = {}
+        for (i, j), val in matrix_entries.items():
+            if i == j:
+                contributions = [(i, val)]
+            elif i < j:
+                idx = off_diagonal_positions[(i, j)]
+                contributions = [(idx, val / 2), (idx + 1, sp.I * val / 2)]
+            else:
+                idx = off_diagonal_positions[(j, i)]
+                contributions = [(idx, val / 2), (idx + 1, -sp.I * val / 2)]
+            for idx, contribution in contributions:
+                vec[idx] = vec.get(idx, sp.Integer(0)) + contribution
+        return vec
+
+    entries = {}
+    for col_idx, basis_element in enumerate(hermitian_basis(dim)):
+        if complex_conjugate:
+            basis_element = basis_element.conjugate()
+        # U @ B @ U^dagger, using only the non-zero entries of B
+        image = {}
+        for i, j, val in basis_element.row_list():
+            for row, u_row_i in columns[i]:
+                for col, u_col_j_conj in columns_conjugate[j]:
+                    image[(row, col)] = image.get(
+                        (row, col), sp.Integer(0)
+                    ) + u_row_i * val * u_col_j_conj
+        for row_idx, val in to_vector(image).items():
+            if not val.is_Rational:
+                # expanding into real and imaginary part evaluates
+                # the trigonometric functions of roots of unity
+                val = sp.expand_complex(val).simplify()
+                if val.has(sp.Float):
+                    val = val.nsimplify()
+            if val != 0:
+                entries[(row_idx, col_idx)] = val
+    return sp.SparseMatrix(dim**2, dim**2, entries)
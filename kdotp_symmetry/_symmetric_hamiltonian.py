@@ -4,29 +4,48 @@
 Defines functions to construct the basis of the symmetry-constrained Hamiltonian.
 """
 
-import sympy as sp
-from sympy.physics.quantum import TensorProduct
+from collections import namedtuple
+
 import numpy as np
-import scipy.linalg as la
+import sympy as sp
 from fsc.export import export
 
-from ._expr_utils import expr_to_vector, matrix_to_expr_operator
-from ._repr_utils import hermitian_to_vector, hermitian_basis, repr_to_matrix_operator, check_orthogonal, frobenius_product
-from ._linalg import intersection_basis, nullspace_blocked
-from ._to_matrix import to_matrix
+from ._expr_utils import matrix_to_expr_matrix, monomial_basis, drop_zeros
+from ._repr_utils import hermitian_basis, repr_to_matrix, repr_trace, check_orthogonal, frobenius_product
+from ._linalg import sparse_intersection_basis, sparse_nullspace_blocked, sparse_rref_basis, invariant_blocks, sparse_kron
+from ._group import SymmetryGroupElement, generate_symmetry_group, invariant_dimension_from_traces, cyclic_invariant_dimension
+from ._numeric import to_numpy, numeric_nullspace, numeric_intersection, numeric_rref, rationalize
+from ._cache import ResultCache, problem_key
+from ._hamiltonian_basis import SymmetricHamiltonianBasis
+from ._parallel import check_executor, executor_context, executor_map
+from ._profiling import stage, matrix_info
 from ._logging_setup import LOGGER
 
+_ReprData = namedtuple(
+    '_ReprData', [
+        'repr_basis', 'generators', 'generator_repr_matrices', 'group',
+        'group_repr_traces', 'group_repr_matrices'
+    ]
+)
+
 
 @export
 def symmetric_hamiltonian(
     *symmetry_operations,
     expr_basis,
     repr_basis='auto',
-    check_repr_basis=False
+    check_repr_basis=False,
+    method='nullspace',
+    executor=None,
+    max_workers=None,
+    cache=None,
+    lazy=False
 ):
     r"""
     Calculates the basis of the symmetric Hamiltonian for a given set of symmetry operations.
 
+    The time and memory used by the individual stages of the calculation can be measured with :py:func:`.profile_stages`.
+
     :param symmetry_operations: The symmetry operations that the Hamiltonian should respect.
     :type symmetry_operations: :py:class:`symmetry_representation.SymmetryOperation`
 
@@ -39,20 +58,264 @@ def symmetric_hamiltonian(
     :param check_repr_basis: Flag to enable explicitly checking the orthogonality of ``repr_basis``.
     :type check_repr_basis: bool
 
+    :param method: Method used to compute the invariant subspace. With ``'nullspace'``, the invariant subspace of each symmetry operation is computed as a nullspace, and the results are intersected. With ``'projector'``, the symmetry operations are first closed into the finite group they generate, and the invariant subspace is computed as the image of the group-averaged projector. Since this requires the matrix form of the representation for every group element, the ``'projector'`` method is only faster than ``'nullspace'`` for small groups (of order up to about 16) with small representations, where it avoids the elimination steps of the nullspace. For larger groups or representations, ``'nullspace'`` or ``'incremental'`` should be used. With ``'incremental'``, the symmetry operations are processed starting from the one with the smallest invariant subspace, and each subsequent operation is solved only within the subspace that is invariant under the previous ones. With ``'numeric'``, the invariant subspace is computed in floating-point arithmetic, and the exact basis is recovered from the numeric reduced row echelon form. The exact basis is verified against the symmetry operations, and the ``'nullspace'`` method is used if the verification fails.
+    :type method: str
+
+    :param executor: Determines how the invariant subspaces of the individual symmetry operations are computed. If ``None``, they are computed one after another in the current process. If ``'process'``, a :py:class:`concurrent.futures.ProcessPoolExecutor` is created once for the whole call. Otherwise, the given :py:class:`concurrent.futures.Executor` is used. The result does not depend on the executor. An executor can only be given for the ``'nullspace'`` method.
+    :type executor: None, str, concurrent.futures.Executor
+
+    :param max_workers: The number of worker processes when ``executor`` is ``'process'``. Defaults to the number of processors.
+    :type max_workers: int
+
+    :param cache: If given, the result is looked up in and stored to this cache. A path is interpreted as the directory of a :py:class:`.ResultCache`.
+    :type cache: None, str, ResultCache
+
+    :param lazy: If set, the basis is returned as a :py:class:`.SymmetricHamiltonianBasis`, which stores only the sparse coefficients and expands the matrices when they are accessed.
+    :type lazy: bool
+
     :returns: Basis for the symmetric Hamiltonian, as a :py:class:`list` of :py:mod:`sympy` matrix expressions.
     """
+    _check_method(method, executor=executor)
+    with stage('symmetric_hamiltonian') as info:
+        if cache is None:
+            result = _symmetric_hamiltonian(
+                symmetry_operations,
+                expr_basis=expr_basis,
+                repr_basis=repr_basis,
+                check_repr_basis=check_repr_basis,
+                method=method,
+                executor=executor,
+                max_workers=max_workers
+            )
+        else:
+            result = _symmetric_hamiltonian_cached(
+                symmetry_operations,
+                cache=cache,
+                expr_basis=expr_basis,
+                repr_basis=repr_basis,
+                check_repr_basis=check_repr_basis,
+                method=method,
+                executor=executor,
+                max_workers=max_workers
+            )
+        info['dimension'] = len(result)
+        if lazy:
+            return result
+        with stage('expand_basis'):
+            LOGGER.info('Expanding basis vectors.')
+            return list(result)
+
+
+def _symmetric_hamiltonian_cached(
+    symmetry_operations, *, cache, expr_basis, repr_basis, **kwargs
+):
+    """
+    Calculates the basis of the symmetric Hamiltonian, using the result from the cache if it exists. Only the coefficients of the basis are stored in the cache.
+    """
+    if not isinstance(cache, ResultCache):
+        cache = ResultCache(cache)
+    if repr_basis == 'auto':
+        repr_basis = hermitian_basis(
+            sp.Matrix(symmetry_operations[0].repr.matrix).shape[0]
+        )
+    key = problem_key(
+        symmetry_operations,
+        expr_basis=expr_basis,
+        repr_basis=repr_basis,
+        method=kwargs['method']
+    )
+    coefficients = cache.get(key)
+    if coefficients is not None:
+        LOGGER.info('Using cached result %s.', key)
+        return SymmetricHamiltonianBasis(
+            coefficients, expr_basis=expr_basis, repr_basis=repr_basis
+        )
+    result = _symmetric_hamiltonian(
+        symmetry_operations,
+        expr_basis=expr_basis,
+        repr_basis=repr_basis,
+        **kwargs
+    )
+    cache.set(key, result.coefficients)
+    return result
+
+
+def _symmetric_hamiltonian(
+    symmetry_operations, *, expr_basis, repr_basis, check_repr_basis, method,
+    executor, max_workers
+):
+    """
+    Calculates the basis of the symmetric Hamiltonian, without using the cache.
+    """
+    repr_data = _get_repr_data(
+        symmetry_operations,
+        repr_basis=repr_basis,
+        check_repr_basis=check_repr_basis,
+        require_group=method != 'nullspace',
+        with_group_matrices=method == 'projector'
+    )
+    with executor_context(
+        executor, max_workers=max_workers
+    ) as operation_executor:
+        return _symmetric_basis(
+            expr_basis=expr_basis,
+            repr_data=repr_data,
+            method=method,
+            executor=operation_executor
+        )
+
+
+@export
+def symmetric_hamiltonian_orders(
+    *symmetry_operations,
+    orders,
+    repr_basis='auto',
+    check_repr_basis=False,
+    method='nullspace',
+    executor=None,
+    max_workers=None,
+    lazy=False
+):
+    r"""
+    Calculates the basis of the symmetric Hamiltonian for several orders in :math:`\mathbf{k}`, using the :py:func:`.monomial_basis` of each order as expression basis. Since the symmetry operations do not mix monomials of different degree, each order is solved independently. The symmetry group and the matrix form of the representations are computed only once and re-used for all orders.
+
+    The results are generated one order at a time, such that they can be used before the higher orders are done.
+
+    :param symmetry_operations: The symmetry operations that the Hamiltonian should respect.
+    :type symmetry_operations: :py:class:`symmetry_representation.SymmetryOperation`
+
+    :param orders: The orders (degrees of the monomials) for which the basis is computed.
+    :type orders: :py:class:`list` of :py:class:`int`
+
+    :param repr_basis: The basis for the hermitian matrices, as in :py:func:`.symmetric_hamiltonian`.
+    :type repr_basis: :py:class:`list` of :py:mod:`sympy` matrices
+
+    :param check_repr_basis: Flag to enable explicitly checking the orthogonality of ``repr_basis``.
+    :type check_repr_basis: bool
+
+    :param method: Method used to compute the invariant subspace, as in :py:func:`.symmetric_hamiltonian`.
+    :type method: str
+
+    :param executor: Executor used for the individual symmetry operations, as in :py:func:`.symmetric_hamiltonian`. The same executor is used for all orders.
+    :type executor: None, str, concurrent.futures.Executor
+
+    :param max_workers: The number of worker processes when ``executor`` is ``'process'``.
+    :type max_workers: int
+
+    :param lazy: If set, each basis is returned as a :py:class:`.SymmetricHamiltonianBasis`, as in :py:func:`.symmetric_hamiltonian`.
+    :type lazy: bool
+
+    :returns: Generator of ``(order, basis)`` tuples, where ``basis`` is the basis for the symmetric Hamiltonian of the given order.
+    """
+    # the input is checked here, such that errors are raised when the
+    # function is called, and not only when the generator is first used
+    _check_method(method, executor=executor)
+    repr_data = _get_repr_data(
+        symmetry_operations,
+        repr_basis=repr_basis,
+        check_repr_basis=check_repr_basis,
+        require_group=method != 'nullspace',
+        with_group_matrices=method == 'projector'
+    )
+    return _symmetric_hamiltonian_orders(
+        orders=orders,
+        repr_data=repr_data,
+        method=method,
+        executor=executor,
+        max_workers=max_workers,
+        lazy=lazy
+    )
+
+
+def _symmetric_hamiltonian_orders(
+    *, orders, repr_data, method, executor, max_workers, lazy
+):
+    """
+    Generates the basis of the symmetric Hamiltonian for each of the given orders.
+    """
+    with executor_context(
+        executor, max_workers=max_workers
+    ) as operation_executor:
+        for order in orders:
+            LOGGER.info('Calculating basis for order %s.', order)
+            with stage('order', order=order) as info:
+                result = _symmetric_basis(
+                    expr_basis=monomial_basis(order),
+                    repr_data=repr_data,
+                    method=method,
+                    executor=operation_executor
+                )
+                info['dimension'] = len(result)
+                if not lazy:
+                    with stage('expand_basis'):
+                        result = list(result)
+            yield order, result
+
+
+@export
+def symmetric_hamiltonian_dimension(
+    *symmetry_operations, expr_basis, repr_basis='auto'
+):
+    r"""
+    Calculates the number of basis elements of the symmetric Hamiltonian for a given set of symmetry operations, without computing the basis itself. The dimension is computed from the traces of the symmetry operations over the group they generate.
+
+    The parameters are the same as for :py:func:`.symmetric_hamiltonian`.
+
+    :returns: Number of basis elements of the symmetric Hamiltonian.
+    :rtype: int
+    """
+    repr_data = _get_repr_data(symmetry_operations, repr_basis=repr_basis)
+    return invariant_dimension_from_traces([
+        (expr_mat.trace(), repr_trace_value)
+        for expr_mat, repr_trace_value in zip(
+            _get_expr_matrices(repr_data.group, expr_basis=expr_basis),
+            repr_data.group_repr_traces
+        )
+    ])
+
+
+def _check_method(method, *, executor):
+    """
+    Checks that the method for computing the invariant subspace is valid, and that the executor is valid and can be used with this method.
+    """
+    if method not in ('nullspace', 'projector', 'incremental', 'numeric'):
+        raise ValueError(
+            "Invalid method '{}', must be 'nullspace', 'projector', 'incremental' or 'numeric'."
+            .format(method)
+        )
+    check_executor(executor)
+    if executor is not None and method != 'nullspace':
+        raise ValueError(
+            "The executor can only be used with the 'nullspace' method, not with '{}'."
+            .format(method)
+        )
+
+
+def _get_repr_data(
+    symmetry_operations,
+    *,
+    repr_basis,
+    check_repr_basis=False,
+    require_group=True,
+    with_group_matrices=False
+):
+    """
+    Returns the representation basis, the symmetry group generated by the symmetry operations, and the matrices which describe the action of the generators on the representation basis. For the group elements, only the traces of these matrices are computed, unless ``with_group_matrices`` is set.
+
+    If the symmetry operations do not generate a finite group, an error is raised if ``require_group`` is set. Otherwise, a warning is logged and the group and its traces are ``None``.
+    """
     if any(sym_op.numeric for sym_op in symmetry_operations):
         raise ValueError(
-            'Symmetry operations used in kdotp-symmetry can not be numeric.'
+            'Symmetry operations used in kdotp-symmetry can not be numeric. Use numeric_symmetric_hamiltonian for numeric symmetry operations.'
         )
-    expr_dim = len(expr_basis)
-    # for sympy or numpy matrices
-    try:
-        repr_matrix_size = symmetry_operations[0].repr.matrix.shape[0]
-    # for plain lists -- this doesn't work for sympy matrices because
-    # their 'len' is the total number of elements
-    except AttributeError:
-        repr_matrix_size = len(symmetry_operations[0].repr.matrix)
+    generators = [
+        SymmetryGroupElement(
+            rotation_matrix=sym_op.rotation_matrix,
+            repr_matrix=sp.Matrix(sym_op.repr.matrix),
+            repr_has_cc=sym_op.repr.has_cc
+        ) for sym_op in symmetry_operations
+    ]
+    repr_matrix_size = generators[0].repr_matrix.shape[0]
 
     if repr_basis == 'auto':
         repr_basis = hermitian_basis(repr_matrix_size)
@@ -60,63 +323,521 @@ def symmetric_hamiltonian(
     if check_repr_basis:
         check_orthogonal(repr_basis)
 
-    repr_dim = len(repr_basis)
-    repr_basis_norm_squares = [frobenius_product(b, b) for b in repr_basis]
-    full_dim = expr_dim * repr_dim
-    full_basis = [
-        sp.Matrix(x) for x in np.outer(expr_basis, repr_basis).
-        reshape(full_dim, repr_matrix_size, repr_matrix_size).tolist()
+    group = _get_group(generators, require_group=require_group)
+
+    LOGGER.info('Calculating matrix form of representations.')
+    with stage('repr_matrices') as info:
+        repr_basis_norm_squares = [frobenius_product(b, b) for b in repr_basis]
+        repr_kwargs = dict(
+            basis=repr_basis, basis_norm_squares=repr_basis_norm_squares
+        )
+        group_repr_traces = None
+        if group is not None:
+            group_repr_traces = [
+                repr_trace(
+                    element.repr_matrix,
+                    complex_conjugate=element.repr_has_cc,
+                    **repr_kwargs
+                ) for element in group
+            ]
+        if with_group_matrices:
+            group_repr_matrices = _get_repr_matrices(group, **repr_kwargs)
+        else:
+            group_repr_matrices = None
+        generator_repr_matrices = _get_repr_matrices(generators, **repr_kwargs)
+        info.update(matrix_info(*generator_repr_matrices))
+    return _ReprData(
+        repr_basis=repr_basis,
+        generators=generators,
+        generator_repr_matrices=generator_repr_matrices,
+        group=group,
+        group_repr_traces=group_repr_traces,
+        group_repr_matrices=group_repr_matrices
+    )
+
+
+def _get_group(generators, *, require_group):
+    """
+    Returns the symmetry group generated by the given generators. If the group is not finite, an error is raised if ``require_group`` is set, and ``None`` is returned otherwise.
+    """
+    LOGGER.info('Generating the symmetry group.')
+    with stage('symmetry_group') as info:
+        info['num_generators'] = len(generators)
+        try:
+            group = generate_symmetry_group(generators)
+        except ValueError:
+            if require_group:
+                raise
+            LOGGER.warning(
+                'The symmetry operations do not generate a finite group, the dimension of the invariant subspace is not predicted.'
+            )
+            return None
+        info['group_order'] = len(group)
+    LOGGER.info('Order of the symmetry group: %s', len(group))
+    return group
+
+
+def _get_repr_matrices(elements, *, basis, basis_norm_squares):
+    """
+    Returns the matrices which describe the action of the symmetry operations on the representation basis.
+    """
+    return [
+        repr_to_matrix(
+            element.repr_matrix,
+            basis=basis,
+            complex_conjugate=element.repr_has_cc,
+            basis_norm_squares=basis_norm_squares
+        ) for element in elements
     ]
 
-    invariant_bases = []
-    for sym_op in symmetry_operations:
-        LOGGER.info('Calculating matrix form of expression.')
-        expr_mat = to_matrix(
-            operator=matrix_to_expr_operator(
-                sym_op.rotation_matrix, repr_has_cc=sym_op.repr.has_cc
-            ),
+
+def _get_expr_matrices(elements, *, expr_basis):
+    """
+    Returns the matrices which describe the action of the symmetry operations on the expression basis.
+    """
+    return [
+        matrix_to_expr_matrix(
+            sp.Matrix(element.rotation_matrix),
             basis=expr_basis,
-            to_vector_fct=expr_to_vector
+            repr_has_cc=element.repr_has_cc
+        ) for element in elements
+    ]
+
+
+def _symmetric_basis(*, expr_basis, repr_data, method, executor):
+    """
+    Computes the basis of the symmetric Hamiltonian for the given expression basis.
+
+    The expression basis is first split into blocks which are invariant under all symmetry operations (for example, monomials of different degrees), and each block is solved separately. The basis is returned as a :class:`.SymmetricHamiltonianBasis`, without expanding it into matrices.
+    """
+    LOGGER.info('Calculating matrix form of expressions.')
+    with stage('expr_matrices') as info:
+        generator_expr_matrices = _get_expr_matrices(
+            repr_data.generators, expr_basis=expr_basis
+        )
+        group_expr_matrices = None
+        if repr_data.group is not None:
+            group_expr_matrices = _get_expr_matrices(
+                repr_data.group, expr_basis=expr_basis
+            )
+        info.update(matrix_info(*generator_expr_matrices))
+    with stage('invariant_blocks') as info:
+        expr_blocks = invariant_blocks(generator_expr_matrices)
+        LOGGER.info(
+            'Splitting the expression basis into %s invariant blocks.',
+            len(expr_blocks)
+        )
+        info.update(
+            num_blocks=len(expr_blocks),
+            block_sizes=[len(block) for block in expr_blocks]
         )
-        LOGGER.info('Calculating matrix form of representation.')
-        repr_mat = to_matrix(
-            operator=repr_to_matrix_operator(
-                sym_op.repr.matrix, complex_conjugate=sym_op.repr.has_cc
+        if group_expr_matrices is None:
+            # without a finite group, the dimensions are not predicted
+            dimensions = [None] * len(expr_blocks)
+        else:
+            dimensions = _block_dimensions(
+                expr_blocks,
+                group_expr_matrices=group_expr_matrices,
+                group_repr_traces=repr_data.group_repr_traces
+            )
+            info['dimension'] = sum(dimensions)
+            LOGGER.info(
+                'Dimension of the invariant subspace: %s', sum(dimensions)
+            )
+
+    if method == 'projector':
+        group_matrices = list(
+            zip(group_expr_matrices, repr_data.group_repr_matrices)
+        )
+    else:
+        group_matrices = None
+    return SymmetricHamiltonianBasis(
+        _invariant_coefficients(
+            list(zip(expr_blocks, dimensions)),
+            operator_matrices=list(
+                zip(
+                    generator_expr_matrices, repr_data.generator_repr_matrices
+                )
             ),
-            basis=repr_basis,
-            to_vector_fct=hermitian_to_vector,
-            to_vector_kwargs=dict(basis_norm_squares=repr_basis_norm_squares)
-        )
-        # outer product
-        LOGGER.info('Calculating outer product.')
-        full_mat = TensorProduct(expr_mat, repr_mat)
-
-        # get Eig(F \ocross G, 1) basis
-        mat = full_mat - sp.eye(full_dim)
-        LOGGER.info('Calculating nullspace.')
-        curr_basis = np.array(nullspace_blocked(mat, simplify=sp.nsimplify)
-                              ).tolist()
-        if len(curr_basis) != _numeric_nullspace_dim(mat):
-            raise ValueError(
-                'Analytic and numeric dimensions of the nullspace of the matrix {mat} do not match'
-                .format(mat=mat)
+            group_matrices=group_matrices,
+            method=method,
+            executor=executor
+        ),
+        expr_basis=expr_basis,
+        repr_basis=repr_data.repr_basis
+    )
+
+
+def _block_dimensions(expr_blocks, *, group_expr_matrices, group_repr_traces):
+    """
+    Returns the dimension of the invariant subspace for each block of the expression basis, computed from the traces over the symmetry group.
+    """
+    return [
+        invariant_dimension_from_traces([
+            (sum(expr_mat[i, i] for i in block), repr_trace_value)
+            for expr_mat, repr_trace_value in
+            zip(group_expr_matrices, group_repr_traces)
+        ]) for block in expr_blocks
+    ]
+
+
+def _invariant_coefficients(
+    blocks, *, operator_matrices, group_matrices, method, executor
+):
+    """
+    Computes the basis of the invariant subspace for each of the given ``(block, dimension)`` pairs, and combines them into the sparse coefficient matrix w.r.t. the full product basis. Each block is reported as a separate stage.
+    """
+    expr_dim = operator_matrices[0][0].shape[0]
+    repr_dim = operator_matrices[0][1].shape[0]
+    coefficient_entries = {}
+    num_terms = 0
+    for block_idx, (block, dimension) in enumerate(blocks):
+        with stage('block', block=block_idx) as info:
+            info.update(size=len(block) * repr_dim, dimension=dimension)
+            basis_vectors = _invariant_basis_block(
+                operator_matrices=_restrict_to_block(operator_matrices, block),
+                group_matrices=_restrict_to_block(group_matrices, block),
+                dimension=dimension,
+                method=method,
+                executor=executor
             )
-        invariant_bases.append(curr_basis)
+        # convert the indices within the block to indices of the full
+        # product basis
+        for vec in basis_vectors:
+            for idx, val in vec.items():
+                expr_idx, repr_idx = divmod(idx, repr_dim)
+                coefficient_entries[
+                    (num_terms, block[expr_idx] * repr_dim + repr_idx)] = val
+            num_terms += 1
+    return sp.SparseMatrix(num_terms, expr_dim * repr_dim, coefficient_entries)
+
+
+def _restrict_to_block(matrices, block):
+    """
+    Restricts the expression matrices of the given (F, G) pairs to a block of the expression basis. If ``matrices`` is ``None``, ``None`` is returned.
+    """
+    if matrices is None:
+        return None
+    return [(expr_mat.extract(block, block), repr_mat)
+            for expr_mat, repr_mat in matrices]
+
+
+def _invariant_basis_block(
+    *, operator_matrices, group_matrices, dimension, method, executor
+):
+    """
+    Computes the basis of the invariant subspace for an expression basis which is invariant under the symmetry operations, and checks its dimension if it is given.
+    """
+    if dimension is not None:
+        LOGGER.info(
+            'Dimension of the invariant subspace of the block: %s', dimension
+        )
+    if method == 'nullspace':
+        basis_vectors = _invariant_basis_nullspace(
+            operator_matrices, executor=executor
+        )
+    elif method == 'projector':
+        basis_vectors = _invariant_basis_projector(
+            group_matrices, dimension=dimension
+        )
+    elif method == 'numeric':
+        basis_vectors = _invariant_basis_numeric(
+            operator_matrices, dimension=dimension
+        )
+    else:
+        basis_vectors = _invariant_basis_incremental(
+            operator_matrices, dimension=dimension
+        )
+    if dimension is not None and len(basis_vectors) != dimension:
+        raise ValueError(
+            'The dimension {} of the computed basis does not match the dimension {} predicted from the characters.'
+            .format(len(basis_vectors), dimension)
+        )
+    return basis_vectors
+
+
+def _invariant_basis_nullspace(operator_matrices, *, executor):
+    r"""
+    Computes the basis of the invariant subspace by intersecting the nullspaces of (F \otimes G - 1) for each symmetry operation. The nullspaces of the different symmetry operations are computed using the given executor.
+    """
+    results = executor_map(
+        _indexed_operation_invariant_basis,
+        enumerate(operator_matrices),
+        executor=executor
+    )
+    invariant_bases = []
+    for op_idx, (expr_mat, repr_mat) in enumerate(operator_matrices):
+        try:
+            invariant_bases.append(next(results))
+        except Exception as exc:
+            raise ValueError(
+                'Calculating the invariant subspace failed for symmetry operation {idx}, with expression matrix {expr_mat} and representation matrix {repr_mat}.'
+                .format(idx=op_idx, expr_mat=expr_mat, repr_mat=repr_mat)
+            ) from exc
 
     LOGGER.info('Calculating basis intersection.')
-    basis_vectors = intersection_basis(*invariant_bases)
-    LOGGER.info('Expanding basis vectors.')
-    basis_vectors_expanded = []
-    for vec in basis_vectors:
-        basis_vectors_expanded.append(
-            sum((v * b for v, b in zip(vec, full_basis)),
-                sp.zeros(repr_matrix_size))
-        )
-    return basis_vectors_expanded
-
-
-def _numeric_nullspace_dim(mat):
-    """Numerically computes the nullspace dimension of a matrix."""
-    mat_numeric = np.array(mat.evalf().tolist(), dtype=complex)
-    eigenvals = la.eigvals(mat_numeric)
-    return np.sum(np.isclose(eigenvals, np.zeros_like(eigenvals)))
+    expr_mat, repr_mat = operator_matrices[0]
+    with stage('intersection') as info:
+        res = sparse_intersection_basis(
+            invariant_bases, dim=expr_mat.shape[0] * repr_mat.shape[0]
+        )
+        info.update(
+            num_bases=len(invariant_bases),
+            input_dimensions=[len(basis) for basis in invariant_bases],
+            dimension=len(res)
+        )
+    return res
+
+
+def _indexed_operation_invariant_basis(item):
+    """
+    Computes the basis of the nullspace for the symmetry operation with the given index, as a stage of the calculation. The dimension of the nullspace is checked against the one computed from the powers of the operation, unless the operation does not have finite order.
+    """
+    op_idx, operator_matrix = item
+    with stage('operation', operation=op_idx) as info:
+        try:
+            expected_dimension = cyclic_invariant_dimension(operator_matrix)
+        except ValueError:
+            LOGGER.warning(
+                'Symmetry operation %s does not have finite order, the dimension of its invariant subspace is not checked.',
+                op_idx
+            )
+            expected_dimension = None
+        res = _operation_invariant_basis(
+            operator_matrix, expected_dimension=expected_dimension
+        )
+        info.update(expected_dimension=expected_dimension, dimension=len(res))
+    return res
+
+
+def _operation_invariant_basis(operator_matrix, *, expected_dimension=None):
+    r"""
+    Computes the basis of the nullspace of (F \otimes G - 1) for a single symmetry operation. If the ``expected_dimension`` is given, the dimension of the result is checked against it.
+    """
+    expr_mat, repr_mat = operator_matrix
+    # outer product
+    LOGGER.info('Calculating outer product.')
+    with stage('outer_product') as info:
+        full_mat = sparse_kron(expr_mat, repr_mat)
+        info.update(matrix_info(full_mat))
+
+    # get Eig(F \ocross G, 1) basis
+    mat = full_mat - sp.SparseMatrix.eye(full_mat.shape[0])
+    LOGGER.info('Calculating nullspace.')
+    curr_basis = sparse_nullspace_blocked(mat, simplify=sp.nsimplify)
+    if expected_dimension is not None and len(
+        curr_basis
+    ) != expected_dimension:
+        raise ValueError(
+            'Analytic dimension {dim} of the nullspace of the matrix {mat} does not match the dimension {expected_dim} predicted from the characters.'
+            .format(
+                dim=len(curr_basis), mat=mat, expected_dim=expected_dimension
+            )
+        )
+    return curr_basis
+
+
+def _invariant_basis_incremental(operator_matrices, *, dimension):
+    r"""
+    Computes the basis of the invariant subspace by restricting each symmetry operation to the subspace which is invariant under the previous ones. The operations are sorted such that the one with the smallest invariant subspace is processed first, and the calculation stops once the basis has the given ``dimension``.
+    """
+    operation_dimensions = sorted(
+        ((cyclic_invariant_dimension(op), op_idx, op)
+         for op_idx, op in enumerate(operator_matrices)),
+        key=lambda item: item[0]
+    )
+    LOGGER.info('Calculating nullspace of the first symmetry operation.')
+    first_dimension, first_idx, first_operation = operation_dimensions[0]
+    with stage('operation', operation=first_idx) as info:
+        curr_basis = _operation_invariant_basis(
+            first_operation, expected_dimension=first_dimension
+        )
+        info['dimension'] = len(curr_basis)
+    for _, op_idx, operator_matrix in operation_dimensions[1:]:
+        if len(curr_basis) <= dimension:
+            break
+        LOGGER.info(
+            'Calculating nullspace restricted to a subspace of dimension %s.',
+            len(curr_basis)
+        )
+        with stage('operation', operation=op_idx) as info:
+            info['input_dimension'] = len(curr_basis)
+            curr_basis = _restricted_invariant_basis(
+                operator_matrix, curr_basis
+            )
+            info['dimension'] = len(curr_basis)
+    return curr_basis
+
+
+def _restricted_invariant_basis(operator_matrix, basis):
+    r"""
+    Computes the basis of the subspace of the span of ``basis`` which is invariant under (F \otimes G). The unknowns are the r coefficients of the basis vectors.
+
+    Since the span of ``basis`` is in general not invariant under the operation, the operation can not simply be restricted to an r x r matrix. Instead, the coefficients are the nullspace of M = (F \otimes G - 1) V, where V is the matrix of basis vectors. The columns of M are computed by applying the operation to each basis vector, and only the non-zero rows of M are kept.
+    """
+    operator_columns = _operator_columns(operator_matrix)
+    residual_entries = {}
+    for vec_idx, vec in enumerate(basis):
+        for idx, val in _residual(operator_columns, vec).items():
+            residual_entries[(idx, vec_idx)] = val
+    row_indices = sorted({idx for idx, _ in residual_entries})
+    row_positions = {idx: pos for pos, idx in enumerate(row_indices)}
+    residual_mat = sp.SparseMatrix(
+        len(row_indices), len(basis),
+        {(row_positions[idx], vec_idx): val
+         for (idx, vec_idx), val in residual_entries.items()}
+    )
+    return sparse_rref_basis(
+        _linear_combination(basis, coefficients) for coefficients in
+        sparse_nullspace_blocked(residual_mat, simplify=sp.nsimplify)
+    )
+
+
+def _operator_columns(operator_matrix):
+    r"""
+    Returns the non-zero entries of each column of (F \otimes G), for the given operator matrices F and G.
+    """
+    expr_mat, repr_mat = operator_matrix
+    return _column_entries(sparse_kron(expr_mat, repr_mat))
+
+
+def _residual(operator_columns, vec):
+    r"""
+    Returns the non-zero entries of (F \otimes G - 1) v, where the columns of (F \otimes G) are given by ``operator_columns`` and v is given as a dictionary of its non-zero entries.
+    """
+    residual = {idx: -val for idx, val in vec.items()}
+    for idx, val in vec.items():
+        for row_idx, mat_val in operator_columns[idx]:
+            old_val = residual.get(row_idx, sp.Integer(0))
+            residual[row_idx] = old_val + mat_val * val
+    return drop_zeros(residual)
+
+
+def _invariant_basis_numeric(operator_matrices, *, dimension, tolerance=1e-8):
+    r"""
+    Computes the basis of the invariant subspace in floating-point arithmetic, and recovers the exact basis from it.
+
+    The nullspace of (F \otimes G - 1) for each symmetry operation is computed with a singular value decomposition, and the nullspaces are intersected using their principal angles. The exact basis vectors are read off from the reduced row echelon form of the numeric basis, and are checked exactly against each symmetry operation. If this check fails, the basis is computed with the exact ``'nullspace'`` method instead.
+    """
+    if dimension == 0:
+        return []
+    LOGGER.info('Calculating the invariant subspace numerically.')
+    numeric_basis = None
+    for op_idx, operator_matrix in enumerate(operator_matrices):
+        with stage('operation', operation=op_idx) as info:
+            expr_mat, repr_mat = operator_matrix
+            full_mat = np.kron(to_numpy(expr_mat), to_numpy(repr_mat))
+            operation_basis = numeric_nullspace(
+                full_mat - np.eye(full_mat.shape[0]),
+                dimension=cyclic_invariant_dimension(operator_matrix)
+            )
+            if numeric_basis is None:
+                numeric_basis = operation_basis
+            else:
+                numeric_basis = numeric_intersection(
+                    numeric_basis, operation_basis, tolerance=tolerance
+                )
+            info.update(
+                shape=full_mat.shape,
+                nnz=int(np.count_nonzero(full_mat)),
+                dimension=numeric_basis.shape[1]
+            )
+        # the intersection can not be smaller than the invariant subspace
+        if numeric_basis.shape[1] <= dimension:
+            break
+    if numeric_basis.shape[1] == dimension:
+        LOGGER.info('Recovering the exact basis vectors.')
+        with stage('rationalize') as info:
+            basis_vectors = _rationalize_basis(
+                numeric_basis, tolerance=tolerance
+            )
+            exact = all(
+                not _residual(_operator_columns(operator_matrix), vec)
+                for operator_matrix in operator_matrices
+                for vec in basis_vectors
+            )
+            info['exact'] = exact
+        if exact:
+            return basis_vectors
+    LOGGER.warning(
+        'The numeric invariant subspace could not be converted to an exact basis, falling back to the exact calculation.'
+    )
+    return _invariant_basis_nullspace(operator_matrices, executor=None)
+
+
+def _rationalize_basis(numeric_basis, *, tolerance):
+    """
+    Converts a numeric basis, given as the columns of an array, into exact basis vectors in reduced row echelon form. The vectors are given as dictionaries of their non-zero entries.
+    """
+    rref_rows, pivots = numeric_rref(numeric_basis.T, tolerance=tolerance)
+    cache = {}
+    basis_vectors = []
+    for row, pivot_idx in zip(rref_rows, pivots):
+        vec = {
+            idx: rationalize(val, tolerance=tolerance, cache=cache)
+            for idx, val in enumerate(row) if val != 0
+        }
+        vec[pivot_idx] = sp.Integer(1)
+        basis_vectors.append(vec)
+    return basis_vectors
+
+
+def _linear_combination(vectors, coefficients):
+    """
+    Returns the linear combination of the given ``vectors`` with the given ``coefficients``, where both the vectors and the coefficients are dictionaries of their non-zero entries.
+    """
+    res = {}
+    for vec_idx, coeff in coefficients.items():
+        for idx, val in vectors[vec_idx].items():
+            res[idx] = res.get(idx, sp.Integer(0)) + coeff * val
+    return drop_zeros(res)
+
+
+def _invariant_basis_projector(group_matrices, *, dimension):
+    r"""
+    Computes the basis of the invariant subspace as the image of the projector which averages F \otimes G over the group generated by the symmetry operations.
+
+    The cost scales with the order of the group, since the matrices of all group elements enter the projector. For point groups of order up to 16 acting on p orbitals, this is up to three times faster than intersecting the nullspaces of the generators, since no elimination is needed beyond the rank of the projector. For groups of order 24 and above, or larger representations such as the 96 elements of diamond with time-reversal, it is slower.
+    """
+    expr_dim = group_matrices[0][0].shape[0]
+    repr_dim = group_matrices[0][1].shape[0]
+    group_columns = [
+        tuple(_column_entries(sp.SparseMatrix(mat)) for mat in element)
+        for element in group_matrices
+    ]
+
+    def projector_columns():
+        """
+        Generates the columns of the (unnormalized) projector, using the Kronecker product structure of each group element.
+        """
+        for expr_idx in range(expr_dim):
+            for repr_idx in range(repr_dim):
+                column = {}
+                for expr_columns, repr_columns in group_columns:
+                    for i, expr_val in expr_columns[expr_idx]:
+                        for j, repr_val in repr_columns[repr_idx]:
+                            idx = i * repr_dim + j
+                            column[idx] = column.get(
+                                idx, sp.Integer(0)
+                            ) + expr_val * repr_val
+                yield {idx: val for idx, val in column.items() if val != 0}
+
+    LOGGER.info('Calculating the image of the projector.')
+    with stage('projector') as info:
+        res = sparse_rref_basis(projector_columns(), max_rank=dimension)
+        info.update(
+            group_order=len(group_matrices),
+            size=expr_dim * repr_dim,
+            dimension=len(res)
+        )
+    return res
+
+
+def _column_entries(mat):
+    """
+    Returns the non-zero entries of each column of a sparse matrix, as a list of (row index, value) pairs.
+    """
+    columns = [[] for _ in range(mat.shape[1])]
+    for i, j, val in mat.row_list():
+        columns[j].append((i, val))
+    return columns
@@ -1,12 +1,18 @@
 # © 2017-2018, ETH Zurich, Institut für Theoretische Physik
 # Author:  Dominik Gresch <greschd@gmx.ch>
 """
-Defines a function to convert an operator into matrix form.
+Defines a function to convert an operator into matrix form, and an in-memory cache for the resulting matrices.
 """
 
 import types
+import functools
 
 import sympy as sp
+from fsc.export import export
+
+MATRIX_CACHE_SIZE = 256
+
+_MATRIX_CACHES = {}
 
 
 def to_matrix(
@@ -33,3 +39,42 @@ def to_matrix(
         to_vector_fct(operator(b), basis=basis, **to_vector_kwargs)
         for b in basis
     ]).transpose()
+
+
+def cached_matrix(func):
+    """
+    Decorator which memoizes a function returning a sympy matrix in a bounded LRU cache. All arguments of the function must be hashable. Since sympy matrices are mutable, a copy of the cached matrix is returned.
+
+    The statistics of the cache are reported by :func:`matrix_cache_info`.
+    """
+    cached_func = functools.lru_cache(maxsize=MATRIX_CACHE_SIZE)(func)
+    _MATRIX_CACHES[func.__name__.lstrip('_')] = cached_func
+
+    @functools.wraps(func)
+    def inner(*args, **kwargs):
+        return cached_func(*args, **kwargs).copy()
+
+    return inner
+
+
+@export
+def matrix_cache_info():
+    """
+    Returns the hit and miss statistics of the in-memory caches for the matrix form of the symmetry operations.
+
+    :returns: Dictionary mapping the name of each cache to its :py:func:`functools.lru_cache` statistics.
+    :rtype: dict
+    """
+    return {
+        name: cached_func.cache_info()
+        for name, cached_func in _MATRIX_CACHES.items()
+    }
+
+
+@export
+def clear_matrix_cache():
+    """
+    Clears the in-memory caches for the matrix form of the symmetry operations, and resets their statistics.
+    """
+    for cached_func in _MATRIX_CACHES.values():
+        cached_func.cache_clear()
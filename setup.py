@@ -27,7 +27,7 @@ setup(
     'Calculating the general form of a k.p Hamiltonian with given symmetry constraints.',
     install_requires=[
         'sympy<1.5', 'numpy', 'scipy', 'fsc.export',
-        'symmetry-representation>=0.3', 'networkx>=2'
+        'symmetry-representation>=0.3'
     ],
     python_requires=">=3.6",
     extras_require={
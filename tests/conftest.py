@@ -4,7 +4,90 @@
 # pylint: disable=unused-argument,redefined-outer-name,protected-access
 
 import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pytest
+import sympy as sp
+from sympy import Matrix
+from sympy.core.numbers import I
+import sympy.physics.matrices as sm
+from sympy.physics.quantum import TensorProduct
+import symmetry_representation as sr
+
+import kdotp_symmetry as kp
+
+kx, ky, kz = sp.symbols('kx, ky, kz')
+PAULI_VEC = [sp.eye(2), *(sm.msigma(i) for i in range(1, 4))]
+
+# (symmetry_operations, expr_basis, repr_basis, result) of the symmetric
+# Hamiltonian problems which are shared between the tests
+SYMMETRIC_HAMILTONIAN_CASES = {
+    # exchange of x and y, with a constant Hamiltonian
+    'constant': (
+        [
+            sr.SymmetryOperation(
+                rotation_matrix=[[0, 1, 0], [1, 0, 0], [0, 0, 1]],
+                repr_matrix=[[0, 1], [1, 0]],
+                repr_has_cc=False,
+                numeric=False
+            )
+        ], kp.monomial_basis(0), 'auto',
+        [Matrix([[1, 0], [0, 1]]),
+         Matrix([[0, 1], [1, 0]])]
+    ),
+    # exchange of x and y, with a Hamiltonian linear in k
+    'linear': (
+        [
+            sr.SymmetryOperation(
+                rotation_matrix=[[0, 1, 0], [1, 0, 0], [0, 0, 1]],
+                repr_matrix=[[0, 1], [1, 0]],
+                repr_has_cc=False,
+                numeric=False
+            )
+        ], kp.monomial_basis(1), 'auto', [
+            Matrix([[kx, 0], [0, ky]]),
+            Matrix([[ky, 0], [0, kx]]),
+            Matrix([[0, kx + ky], [kx + ky, 0]]),
+            Matrix([[0, I * kx - I * ky], [-I * kx + I * ky, 0]]),
+            Matrix([[kz, 0], [0, kz]]),
+            Matrix([[0, kz], [kz, 0]])
+        ]
+    ),
+    # a four-band model with time-reversal symmetry
+    'spinful': (
+        [
+            sr.SymmetryOperation(
+                rotation_matrix=[[0, 1, 0], [1, 0, 0], [0, 0, -1]],
+                repr_matrix=sp.diag(I, -I, I, -I),
+                repr_has_cc=False,
+                numeric=False
+            ),
+            sr.SymmetryOperation(
+                rotation_matrix=-sp.eye(3),
+                repr_matrix=sp.diag(1, 1, -1, -1),
+                repr_has_cc=False,
+                numeric=False
+            ),
+            sr.SymmetryOperation(
+                rotation_matrix=sp.eye(3),
+                repr_matrix=TensorProduct(
+                    sp.eye(2), sp.Matrix([[0, -1], [1, 0]])
+                ),
+                repr_has_cc=True,
+                numeric=False
+            )
+        ], kp.monomial_basis(0),
+        [TensorProduct(p1, p2) for p1 in PAULI_VEC for p2 in PAULI_VEC], [
+            Matrix(
+                [[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]]
+            ),
+            Matrix(
+                [[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, -1, 0], [0, 0, 0, -1]]
+            ),
+        ]
+    )
+}  # yapf: disable
 
 
 @pytest.fixture
@@ -37,3 +120,53 @@ def compare_data(request, test_name, scope="session"):
 def compare_equal(compare_data):
     """Returns a function which compares data for equality with pre-existing data."""
     return lambda data, tag=None: compare_data(lambda x, y: x == y, data, tag)
+
+
+@pytest.fixture(params=['process', 'thread'])
+def executor(request):
+    """Returns the executor option 'process', or a thread pool which is shut down after the test."""
+    if request.param == 'thread':
+        with ThreadPoolExecutor(2) as thread_executor:
+            yield thread_executor
+    else:
+        yield request.param
+
+
+@pytest.fixture(params=sorted(SYMMETRIC_HAMILTONIAN_CASES))
+def hamiltonian_case(request):
+    """Returns the (symmetry_operations, expr_basis, repr_basis, result) of each of the shared symmetric Hamiltonian problems."""
+    return SYMMETRIC_HAMILTONIAN_CASES[request.param]
+
+
+@pytest.fixture
+def linear_case():
+    """Returns the shared symmetric Hamiltonian problem which is linear in k."""
+    return SYMMETRIC_HAMILTONIAN_CASES['linear']
+
+
+@pytest.fixture
+def spinful_case():
+    """Returns the shared four-band symmetric Hamiltonian problem with time-reversal symmetry."""
+    return SYMMETRIC_HAMILTONIAN_CASES['spinful']
+
+
+@pytest.fixture
+def basis():
+    """Returns a basis of two-band Hamiltonians, used to test the numeric evaluation."""
+    return [
+        Matrix([[kx**2 + ky**2, 0], [0, -kz**2]]),
+        Matrix([[0, kx - I * ky], [kx + I * ky, 0]]),
+        Matrix([[1, 0], [0, -1]]),
+    ]
+
+
+@pytest.fixture
+def coefficients():
+    """Returns the coefficients of the Hamiltonian in the ``basis``."""
+    return np.array([0.7, -1.3, 0.2])
+
+
+@pytest.fixture
+def k_points():
+    """Returns a set of random k-points."""
+    return np.random.RandomState(42).uniform(-1, 1, size=(23, 3))
@@ -0,0 +1,105 @@
+# © 2017-2018, ETH Zurich, Institut für Theoretische Physik
+# Author:  Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the band structure calculation.
+"""
+# pylint: disable=redefined-outer-name
+
+import os
+
+import numpy as np
+import pytest
+
+import kdotp_symmetry as kp
+
+
+@pytest.fixture
+def reference(basis, coefficients, k_points):
+    """Returns the eigenvalues and eigenvectors from diagonalizing each k-point separately."""
+    hamiltonians = kp.HamiltonianEvaluator(basis)(k_points, coefficients)
+    eigenvalues, eigenvectors = zip(
+        *(np.linalg.eigh(ham) for ham in hamiltonians)
+    )
+    return np.array(eigenvalues), np.array(eigenvectors)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 5, 23, 100])
+def test_eigenvalues(basis, coefficients, k_points, reference, chunk_size):
+    """
+    Test that the eigenvalues do not depend on the chunk size.
+    """
+    assert np.allclose(
+        kp.band_structure(
+            basis, coefficients, k_points, chunk_size=chunk_size
+        ), reference[0]
+    )
+
+
+def test_eigenvectors(basis, coefficients, k_points, reference):
+    """
+    Test that the eigenvectors diagonalize the Hamiltonian.
+    """
+    eigenvalues, eigenvectors = kp.band_structure(
+        basis, coefficients, k_points, eigenvectors=True, chunk_size=4
+    )
+    assert np.allclose(eigenvalues, reference[0])
+    hamiltonians = kp.HamiltonianEvaluator(basis)(k_points, coefficients)
+    assert np.allclose(
+        hamiltonians @ eigenvectors,
+        eigenvectors * eigenvalues[:, np.newaxis, :]
+    )
+
+
+def test_executor(basis, coefficients, k_points, reference, executor):
+    """
+    Test that computing the chunks with an executor gives the same result.
+    """
+    assert np.allclose(
+        kp.band_structure(
+            basis,
+            coefficients,
+            k_points,
+            chunk_size=5,
+            executor=executor,
+            max_workers=2
+        ), reference[0]
+    )
+
+
+def test_memory_mapped_output(
+    basis, coefficients, k_points, reference, tmpdir
+):
+    """
+    Test that the results are written to memory-mapped files.
+    """
+    eigenvalues_path = os.path.join(str(tmpdir), 'eigenvalues.npy')
+    eigenvectors_path = os.path.join(str(tmpdir), 'eigenvectors.npy')
+    eigenvalues, _ = kp.band_structure(
+        basis,
+        coefficients,
+        k_points,
+        eigenvectors=True,
+        chunk_size=5,
+        eigenvalues_path=eigenvalues_path,
+        eigenvectors_path=eigenvectors_path
+    )
+    assert isinstance(eigenvalues, np.memmap)
+    assert np.allclose(np.load(eigenvalues_path), reference[0])
+    assert np.load(eigenvectors_path).shape == (len(k_points), 2, 2)
+
+
+def test_invalid_input(basis, coefficients, k_points):
+    """
+    Test that errors are raised for invalid input.
+    """
+    with pytest.raises(ValueError):
+        kp.band_structure(basis, coefficients, k_points, chunk_size=0)
+    with pytest.raises(ValueError):
+        kp.band_structure(basis, [coefficients], k_points)
+    with pytest.raises(ValueError):
+        kp.band_structure(
+            basis,
+            coefficients,
+            k_points,
+            eigenvectors_path='eigenvectors.npy'
+        )
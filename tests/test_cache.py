@@ -0,0 +1,199 @@
+# © 2017-2018, ETH Zurich, Institut für Theoretische Physik
+# Author:  Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the on-disk cache of the symmetric Hamiltonian.
+"""
+# pylint: disable=redefined-outer-name,protected-access
+
+import os
+import json
+
+import pytest
+import sympy as sp
+
+import kdotp_symmetry as kp
+from kdotp_symmetry._cache import problem_key
+
+
+@pytest.fixture
+def disable_calculation(monkeypatch):
+    """
+    Returns a function which disables the calculation of the symmetric Hamiltonian, such that results can only come from the cache.
+    """
+    def inner():
+        def raise_error(*args, **kwargs):
+            raise AssertionError('The result was not taken from the cache.')
+
+        monkeypatch.setattr(
+            kp._symmetric_hamiltonian, '_symmetric_hamiltonian', raise_error
+        )
+
+    return inner
+
+
+def test_cached_result(hamiltonian_case, tmpdir, disable_calculation):
+    """
+    Test that a repeated call returns the cached result.
+    """
+    symmetry_operations, expr_basis, repr_basis, result = hamiltonian_case
+    first_result = kp.symmetric_hamiltonian(
+        *symmetry_operations,
+        expr_basis=expr_basis,
+        repr_basis=repr_basis,
+        cache=str(tmpdir)
+    )
+    disable_calculation()
+    cached_result = kp.symmetric_hamiltonian(
+        *symmetry_operations,
+        expr_basis=expr_basis,
+        repr_basis=repr_basis,
+        cache=kp.ResultCache(str(tmpdir))
+    )
+    assert cached_result == first_result
+    assert sorted(cached_result, key=str) == sorted(result, key=str)
+
+
+def test_version_mismatch(tmpdir, monkeypatch):
+    """
+    Test that cache entries written by a different version are not used.
+    """
+    cache = kp.ResultCache(str(tmpdir))
+    cache.set('key', sp.eye(2))
+    assert cache.get('key') == sp.eye(2)
+    monkeypatch.setattr(kp._cache, '__version__', '0.0.0')
+    assert cache.get('key') is None
+
+
+def test_complex_rational(tmpdir):
+    """
+    Test that complex rational coefficients are stored exactly.
+    """
+    cache = kp.ResultCache(str(tmpdir))
+    coefficients = sp.SparseMatrix([[sp.Rational(1, 3) - sp.I / 2, 0],
+                                    [0, -2 * sp.I]])
+    cache.set('key', coefficients)
+    assert cache.get('key') == coefficients
+
+
+def test_irrational_not_stored(tmpdir):
+    """
+    Test that coefficients which are not rational are not stored.
+    """
+    cache = kp.ResultCache(str(tmpdir))
+    cache.set('key', sp.SparseMatrix([[sp.sqrt(3), 1]]))
+    assert cache.get('key') is None
+    assert not os.path.exists(os.path.join(str(tmpdir), 'key.json'))
+
+
+def test_malicious_entry(tmpdir):
+    """
+    Test that the values of a cache entry are not evaluated, and invalid entries are removed.
+    """
+    cache = kp.ResultCache(str(tmpdir))
+    marker = os.path.join(str(tmpdir), 'marker')
+    path = os.path.join(str(tmpdir), 'key.json')
+    with open(path, 'w') as out_file:
+        json.dump(
+            dict(
+                version=kp.__version__,
+                key='key',
+                coefficients=dict(
+                    shape=[1, 1],
+                    entries=[[
+                        0, 0, "__import__('os').mkdir({!r})".format(marker)
+                    ]]
+                )
+            ), out_file
+        )
+    assert cache.get('key') is None
+    assert not os.path.exists(marker)
+    assert not os.path.exists(path)
+
+
+@pytest.mark.parametrize(
+    'content', [
+        'not json', '[]',
+        '{"version": "%s", "key": "key"}' % kp.__version__,
+        json.dumps(
+            dict(
+                version=kp.__version__,
+                key='key',
+                coefficients=dict(
+                    shape=[1, 1], entries=[[0, 0, [1, 0, 0, 1]]]
+                )
+            )
+        ),
+        json.dumps(
+            dict(
+                version=kp.__version__,
+                key='key',
+                coefficients=dict(
+                    shape=[1, 1], entries=[[2, 0, [1, 1, 0, 1]]]
+                )
+            )
+        )
+    ]
+)
+def test_invalid_entry(tmpdir, content):
+    """
+    Test that entries which can not be decoded are treated as missing, and removed.
+    """
+    cache = kp.ResultCache(str(tmpdir))
+    path = os.path.join(str(tmpdir), 'key.json')
+    with open(path, 'w') as out_file:
+        out_file.write(content)
+    assert cache.get('key') is None
+    assert not os.path.exists(path)
+    cache.set('key', sp.eye(2))
+    assert cache.get('key') == sp.eye(2)
+
+
+def test_eviction(tmpdir):
+    """
+    Test that the least recently used entries are removed when the cache exceeds its maximum size.
+    """
+    cache = kp.ResultCache(str(tmpdir))
+    for key in ['a', 'b', 'c']:
+        cache.set(key, sp.eye(2))
+    entry_size = os.path.getsize(os.path.join(str(tmpdir), 'a.json'))
+    # make the first entry the most recently used one
+    os.utime(os.path.join(str(tmpdir), 'b.json'), (0, 0))
+    os.utime(os.path.join(str(tmpdir), 'c.json'), (1, 1))
+    cache.max_size = 2 * entry_size
+    cache.set('d', sp.eye(2))
+    assert cache.get('b') is None
+    assert cache.get('c') is None
+    assert cache.get('a') == sp.eye(2)
+    assert cache.get('d') == sp.eye(2)
+
+
+def test_key_canonical(linear_case):
+    """
+    Test that the problem key does not depend on the type of the matrices, but changes with the method and the expression basis.
+    """
+    symmetry_operations, expr_basis, _, _ = linear_case
+    repr_basis = kp.hermitian_basis(2)
+    key = problem_key(
+        symmetry_operations,
+        expr_basis=expr_basis,
+        repr_basis=repr_basis,
+        method='nullspace'
+    )
+    assert key == problem_key(
+        symmetry_operations,
+        expr_basis=expr_basis,
+        repr_basis=[sp.Matrix(b) for b in repr_basis],
+        method='nullspace'
+    )
+    assert key != problem_key(
+        symmetry_operations,
+        expr_basis=expr_basis,
+        repr_basis=repr_basis,
+        method='projector'
+    )
+    assert key != problem_key(
+        symmetry_operations,
+        expr_basis=kp.monomial_basis(2),
+        repr_basis=repr_basis,
+        method='nullspace'
+    )
@@ -0,0 +1,103 @@
+# © 2017-2018, ETH Zurich, Institut für Theoretische Physik
+# Author:  Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the vectorized evaluation of the Hamiltonian.
+"""
+
+import numpy as np
+import pytest
+import sympy as sp
+
+import kdotp_symmetry as kp
+from kdotp_symmetry._expr_utils import K_VEC
+from kdotp_symmetry._numeric import to_numpy
+
+
+def _reference_values(basis, k_points, coefficients):
+    """
+    Evaluates the Hamiltonian by substituting each k-point into the sympy matrices.
+    """
+    hamiltonian = sum(
+        (complex(c) * mat for c, mat in zip(coefficients, basis)),
+        sp.zeros(basis[0].shape[0])
+    )
+    return np.array([
+        to_numpy(hamiltonian.subs(list(zip(K_VEC, k.tolist()))))
+        for k in k_points
+    ])
+
+
+def test_evaluator(hamiltonian_case, k_points):
+    """
+    Test that the evaluator matches the values from substituting the k-points, both for a list of matrices and for the lazy result.
+    """
+    symmetry_operations, expr_basis, repr_basis, result = hamiltonian_case
+    coefficients = np.random.RandomState(0).uniform(-1, 1, size=len(result))
+    reference = _reference_values(result, k_points, coefficients)
+    assert np.allclose(
+        kp.HamiltonianEvaluator(result)(k_points, coefficients), reference
+    )
+    lazy_result = kp.symmetric_hamiltonian(
+        *symmetry_operations,
+        expr_basis=expr_basis,
+        repr_basis=repr_basis,
+        lazy=True
+    )
+    assert np.allclose(
+        kp.HamiltonianEvaluator(lazy_result)(k_points, coefficients),
+        _reference_values(list(lazy_result), k_points, coefficients)
+    )
+
+
+def test_batched_coefficients(basis, k_points):
+    """
+    Test that several sets of coefficients are evaluated at once.
+    """
+    evaluator = kp.HamiltonianEvaluator(basis)
+    coefficients = np.array([[1., 2., 0.], [0.5, -1., 1.], [0, 3., -2.]])
+    res = evaluator(k_points, coefficients)
+    assert res.shape == (3, len(k_points), 2, 2)
+    for single_res, single_coefficients in zip(res, coefficients):
+        assert np.allclose(
+            single_res,
+            _reference_values(basis, k_points, single_coefficients)
+        )
+    assert np.allclose(
+        evaluator.basis_values(k_points), evaluator(k_points, np.eye(3))
+    )
+
+
+def test_from_coefficient_tensor(k_points, linear_case):
+    """
+    Test the evaluator for the result of the numeric calculation.
+    """
+    symmetry_operations, expr_basis, repr_basis, _ = linear_case
+    tensor = kp.numeric_symmetric_hamiltonian(
+        *symmetry_operations, expr_basis=expr_basis, repr_basis=repr_basis
+    )
+    evaluator = kp.HamiltonianEvaluator.from_coefficient_tensor(
+        tensor, expr_basis=expr_basis
+    )
+    coefficients = np.arange(len(tensor))
+    expected = np.einsum(
+        'n,nicd,ki->kcd', coefficients, tensor,
+        np.array([[
+            float(expr.subs(list(zip(K_VEC, k.tolist()))))
+            for expr in expr_basis
+        ] for k in k_points])
+    )
+    assert np.allclose(evaluator(k_points, coefficients), expected)
+
+
+def test_invalid_input(k_points):
+    """
+    Test that errors are raised for non-polynomial bases and inconsistent shapes.
+    """
+    kx = K_VEC[0]
+    with pytest.raises(ValueError):
+        kp.HamiltonianEvaluator([sp.Matrix([[sp.sin(kx)]])])
+    evaluator = kp.HamiltonianEvaluator([sp.Matrix([[kx]])])
+    with pytest.raises(ValueError):
+        evaluator(k_points, [1, 2])
+    with pytest.raises(ValueError):
+        evaluator(k_points[:, :2], [1])
@@ -5,7 +5,7 @@
 import pytest
 import sympy as sp
 
-from kdotp_symmetry._expr_utils import expr_to_vector, monomial_basis, matrix_to_expr_operator
+from kdotp_symmetry._expr_utils import expr_to_vector, monomial_basis, matrix_to_expr_operator, matrix_to_expr_matrix
 
 kx, ky, kz = sp.symbols('kx, ky, kz')
 
@@ -29,9 +29,30 @@ def test_expr_to_vector(expr, vector, basis):
     assert expr_to_vector(expr, basis=basis) == vector
 
 
+@pytest.mark.parametrize(
+    'expr,vector,basis', [
+        (3 * kx + ky, (2, 1), [kx + ky, kx - ky]),
+        (
+            kx**2 + 2 * sp.sqrt(3) * kx * ky,
+            (1, sp.sqrt(3)), [kx**2, 2 * kx * ky]
+        ),
+        (
+            2 + sp.exp(kx) / 2,
+            (2, sp.Rational(1, 2)), [sp.Integer(1), sp.exp(kx)]
+        ),
+    ]
+)
+def test_expr_to_vector_general_basis(expr, vector, basis):
+    """
+    Test the conversion to a vector for non-monomial and non-polynomial bases.
+    """
+    assert expr_to_vector(expr, basis=basis) == vector
+
+
 @pytest.mark.parametrize(
     'expr,basis', [
         (1 + kx, [sp.Integer(1), kx, kx, kz]),
+        (1 + kx, [sp.Integer(1), kx + ky, kx - ky, ky]),
     ]
 )
 def test_basis_not_independent(expr, basis):
@@ -42,6 +63,14 @@ def test_basis_not_independent(expr, basis):
         expr_to_vector(expr, basis=basis)
 
 
+def test_expr_not_in_span():
+    """
+    Test that an error is raised when the expression is not in the span of the basis.
+    """
+    with pytest.raises(ValueError):
+        expr_to_vector(kx**2 + ky, basis=[sp.Integer(1), kx, ky, kz])
+
+
 @pytest.mark.parametrize(
     'dim,basis', [(0, [sp.Integer(1)]), (1, [sp.Integer(1), kx, ky, kz]),
                   (
@@ -99,3 +128,39 @@ def test_matrix_to_expr_operator_double_eval(matrix_form, expr1, expr2):
     expr_operator = matrix_to_expr_operator(matrix_form)
     assert sp.simplify(sp.Eq(expr_operator(expr1), expr2))
     assert sp.simplify(sp.Eq(expr_operator(expr1), expr2))
+
+
+@pytest.mark.parametrize(
+    'matrix_form', [
+        [[0, 1, 0], [1, 0, 0], [0, 0, -1]],
+        [[0, 1, 0], [0, 0, 1], [1, 0, 0]],
+        [[1, 1, 1], [0, -1, 0], [0, 0, -1]],
+        [[-sp.Rational(1, 2), -sp.sqrt(3) / 2, 0],
+         [sp.sqrt(3) / 2, -sp.Rational(1, 2), 0], [0, 0, 1]],
+    ]
+)
+@pytest.mark.parametrize('repr_has_cc', [False, True])
+@pytest.mark.parametrize(
+    'basis', [
+        monomial_basis(*range(4)),
+        [
+            kx + ky, kx - ky, kz, 2 * kx * ky, kx**2 - ky**2, kx**2 + ky**2,
+            kz * kz, kx * kz, ky * kz
+        ],
+    ]
+)
+def test_matrix_to_expr_matrix(matrix_form, repr_has_cc, basis):
+    """
+    Test that the direct construction of the expression operator matrix matches the result of applying the expression operator.
+    """
+    expr_operator = matrix_to_expr_operator(
+        matrix_form, repr_has_cc=repr_has_cc
+    )
+    result = matrix_to_expr_matrix(
+        matrix_form, basis=basis, repr_has_cc=repr_has_cc
+    )
+    for i, expr in enumerate(basis):
+        assert sp.expand(
+            expr_operator(expr) -
+            sum(val * b for val, b in zip(result[:, i], basis))
+        ) == 0
@@ -0,0 +1,114 @@
+# © 2017-2018, ETH Zurich, Institut für Theoretische Physik
+# Author:  Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for fitting the coefficients to reference data.
+"""
+
+import numpy as np
+import pytest
+import sympy as sp
+
+import kdotp_symmetry as kp
+from kdotp_symmetry._expr_utils import K_VEC
+
+
+def test_fit_hamiltonian(basis, coefficients, k_points):
+    """
+    Test that the coefficients of a Hamiltonian in the span of the basis are recovered exactly.
+    """
+    evaluator = kp.HamiltonianEvaluator(basis)
+    reference = evaluator(k_points, coefficients)
+    res = kp.fit_hamiltonian(evaluator, k_points, reference)
+    assert np.allclose(res.coefficients, coefficients)
+    assert np.isclose(res.residual, 0)
+
+
+def test_fit_hamiltonian_weights(basis, coefficients, k_points):
+    """
+    Test that points with zero weight do not influence the fit.
+    """
+    evaluator = kp.HamiltonianEvaluator(basis)
+    reference = evaluator(k_points, coefficients)
+    reference[:10] += np.random.RandomState(0).uniform(size=(10, 2, 2))
+    weights = np.ones(len(k_points))
+    weights[:10] = 0
+    res = kp.fit_hamiltonian(basis, k_points, reference, weights=weights)
+    assert np.allclose(res.coefficients, coefficients)
+    assert not np.allclose(
+        kp.fit_hamiltonian(basis, k_points, reference).coefficients,
+        coefficients
+    )
+
+
+def test_fit_hamiltonian_ill_conditioned(coefficients, k_points):
+    """
+    Test that the coefficients are recovered for a basis whose elements are almost linearly dependent.
+    """
+    kx, ky, kz = K_VEC
+    basis = [
+        sp.Matrix([[kx, 0], [0, -kx]]),
+        sp.Matrix([[kx + sp.Rational(1, 10**7) * ky, 0], [0, -kx]]),
+        sp.Matrix([[0, kz], [kz, 0]]),
+    ]
+    reference = kp.HamiltonianEvaluator(basis)(k_points, coefficients)
+    res = kp.fit_hamiltonian(basis, k_points, reference)
+    assert np.allclose(res.coefficients, coefficients)
+
+
+def test_fit_eigenvalues(basis, coefficients, k_points):
+    """
+    Test that the eigenvalue fit recovers the coefficients, starting close to the solution.
+    """
+    reference = kp.band_structure(basis, coefficients, k_points)
+    res = kp.fit_eigenvalues(
+        basis,
+        k_points,
+        reference,
+        initial_coefficients=coefficients + [0.1, 0.1, -0.1]
+    )
+    assert np.isclose(res.residual, 0)
+    assert np.allclose(
+        kp.band_structure(basis, res.coefficients, k_points), reference
+    )
+
+
+def test_fit_eigenvalues_band_indices(basis, coefficients, k_points):
+    """
+    Test fitting only a subset of the bands.
+    """
+    reference = kp.band_structure(basis, coefficients, k_points)
+    res = kp.fit_eigenvalues(
+        basis,
+        k_points,
+        reference[:, 1:],
+        initial_coefficients=coefficients + [0.1, 0.1, -0.1],
+        band_indices=[1]
+    )
+    assert np.isclose(res.residual, 0)
+    assert np.allclose(
+        kp.band_structure(basis, res.coefficients, k_points)[:, 1],
+        reference[:, 1]
+    )
+
+
+def test_invalid_shape(basis, coefficients, k_points):
+    """
+    Test that errors are raised for reference data of the wrong shape.
+    """
+    with pytest.raises(ValueError):
+        kp.fit_hamiltonian(basis, k_points, np.zeros((len(k_points), 3, 3)))
+    with pytest.raises(ValueError):
+        kp.fit_hamiltonian(
+            basis,
+            k_points,
+            np.zeros((len(k_points), 2, 2)),
+            weights=np.ones(3)
+        )
+    with pytest.raises(ValueError):
+        kp.fit_eigenvalues(
+            basis,
+            k_points,
+            np.zeros((len(k_points), 2)),
+            initial_coefficients=coefficients,
+            band_indices=[0]
+        )
@@ -0,0 +1,75 @@
+# © 2017-2018, ETH Zurich, Institut für Theoretische Physik
+# Author:  Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the exact linear algebra routines over the Gaussian rationals.
+"""
+
+import pytest
+import sympy as sp
+
+from kdotp_symmetry._gaussian_rational import gaussian_rational_rref, gaussian_rational_rank, gaussian_rational_nullspace
+from kdotp_symmetry._linalg import nullspace_blocked
+
+MATRICES = [
+    [[1, 1, 0], [0, 1, 0]],
+    [[1, 2, 3], [3, 4, 5], [6, 7, 8]],
+    [[0, 1], [0, 1], [0, 4]],
+    [[0, 0, 0], [0, 0, 0]],
+    [[sp.Rational(1, 2), sp.I, 0, 1], [1, 2 * sp.I, 0, 2],
+     [0, 1 + sp.I, sp.Rational(-1, 3), 0]],
+    [[sp.I, 1, sp.Rational(1, 2) - sp.I / 3], [1, -sp.I, 0],
+     [2, 3, sp.Rational(5, 7)]],
+    [[1 + sp.I, 2], [2, 2 - 2 * sp.I], [0, 0]],
+    [[1 + sp.I, 2, 0, 0], [2, 2 - 2 * sp.I, 1 + sp.I, 0],
+     [0, 1 + sp.I, 2 * sp.I, 3], [0, 0, 3, 1 - sp.I]],
+    [[0, 0, 2, 4], [1, 0, 0, 0], [0, 3 * sp.I, 0, 0], [0, 0, 1, 2]],
+]
+
+
+@pytest.mark.parametrize('input_matrix', MATRICES)
+def test_rref(input_matrix):
+    """
+    Test that the reduced row echelon form matches the sympy result.
+    """
+    mat = sp.Matrix(input_matrix)
+    rref_mat, pivots = mat.rref(simplify=True)
+    expected = (rref_mat.applyfunc(sp.expand), pivots)
+    assert gaussian_rational_rref(mat) == expected
+
+
+@pytest.mark.parametrize('input_matrix', MATRICES)
+def test_rank(input_matrix):
+    """
+    Test that the rank matches the sympy result.
+    """
+    mat = sp.Matrix(input_matrix)
+    assert gaussian_rational_rank(mat) == mat.rank(simplify=True)
+
+
+@pytest.mark.parametrize('input_matrix', MATRICES)
+def test_nullspace(input_matrix):
+    """
+    Test that the nullspace matches the sympy result.
+    """
+    mat = sp.Matrix(input_matrix)
+    assert gaussian_rational_nullspace(mat) == [
+        vec.applyfunc(sp.expand) for vec in mat.nullspace(simplify=True)
+    ]
+
+
+@pytest.mark.parametrize(
+    'input_matrix', [
+        [[1, sp.sqrt(2)], [sp.sqrt(2), 2]],
+        [[sp.exp(sp.I * sp.pi / 3), 1]],
+        [[sp.Symbol('x'), 1]],
+    ]
+)
+def test_not_gaussian_rational(input_matrix):
+    """
+    Test that matrices with entries which are not Gaussian rationals are rejected, and handled by the sympy fallback in "nullspace_blocked".
+    """
+    mat = sp.Matrix(input_matrix)
+    assert gaussian_rational_rref(mat) is None
+    assert gaussian_rational_rank(mat) is None
+    assert gaussian_rational_nullspace(mat) is None
+    assert nullspace_blocked(mat) == mat.nullspace()
@@ -0,0 +1,170 @@
+# © 2017-2018, ETH Zurich, Institut für Theoretische Physik
+# Author:  Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the generation of the group from symmetry generators.
+"""
+
+import pytest
+import sympy as sp
+from sympy.physics.quantum import TensorProduct
+
+from kdotp_symmetry._group import SymmetryGroupElement, generate_group, generate_symmetry_group, invariant_dimension, cyclic_invariant_dimension
+
+C4 = sp.Matrix([[0, -1, 0], [1, 0, 0], [0, 0, 1]])
+C2X = sp.diag(1, -1, -1)
+
+# generators of the diamond structure (Si) in the sp3 orbital basis on
+# the two sites, from examples/Si
+_HALF = sp.Rational(1, 2)
+_SP3_BLOCK_1 = _HALF * sp.Matrix([[1, -1, 1, 1], [-1, 1, 1, 1], [1, 1, -1, 1],
+                                  [1, 1, 1, -1]])
+_SP3_BLOCK_2 = _HALF * sp.Matrix([[1, -1, 1, 1], [-1, 1, 1, 1], [1, 1, 1, -1],
+                                  [1, 1, -1, 1]])
+_SITE_SWAP = sp.Matrix([[0, 1], [1, 0]])
+SI_GENERATORS = [
+    (
+        sp.Matrix([[1, 1, 1], [0, -1, 0],
+                   [0, 0, -1]]), TensorProduct(_SITE_SWAP, _SP3_BLOCK_1)
+    ),
+    (
+        sp.Matrix([[1, 1, 1], [0, 0, -1], [0, -1, 0]]),
+        sp.Matrix(
+            sp.BlockMatrix([[sp.zeros(4), _SP3_BLOCK_2.T],
+                            [_SP3_BLOCK_2, sp.zeros(4)]])
+        )
+    ),
+    (
+        sp.Matrix([[1, 0, 0], [-1, -1, -1], [0, 0, 1]]),
+        TensorProduct(
+            sp.eye(2),
+            sp.Matrix([[0, 0, 1, 0], [0, 1, 0, 0], [1, 0, 0, 0], [0, 0, 0, 1]])
+        )
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    'generators,order', [
+        ([(C4, )], 4),
+        ([(C4, ), (C2X, )], 8),
+        ([(C4, ), (C2X, ), (-sp.eye(3), )], 16),
+        ([(C4, sp.diag(1, -1)), (C4**2, sp.diag(1, 1))], 4),
+        ([(C4, sp.diag(1, -1)), (sp.eye(3), sp.diag(1, -1))], 8),
+        ([(sp.eye(3), )], 1),
+    ]
+)
+def test_generate_group(generators, order):
+    """
+    Test that the group generated by the given generators has the correct order.
+    """
+    group = generate_group(generators)
+    assert len(group) == order
+    assert group[0] == tuple(sp.eye(mat.shape[0]) for mat in generators[0])
+
+
+def test_generate_group_si():
+    """
+    Regression test for the Si generators, where equal group elements are created with a different order of the sparse matrix entries.
+    """
+    group = generate_group(SI_GENERATORS)
+    assert len(group) == 48
+    assert invariant_dimension(group) == 1
+
+
+def test_generate_group_entry_order():
+    """
+    Test that equal group elements are identified, independent of the order in which their sparse entries were created.
+    """
+    mat_a = sp.SparseMatrix(2, 2, {(0, 1): 1, (1, 0): 1})
+    mat_b = sp.SparseMatrix(2, 2, {(1, 0): 1, (0, 1): 1})
+    assert len(generate_group([(mat_a, ), (mat_b, )])) == 2
+
+
+def test_generate_group_infinite():
+    """
+    Test that an error is raised when the generators do not generate a finite group.
+    """
+    with pytest.raises(ValueError):
+        generate_group([(sp.Matrix([[1, 1], [0, 1]]), )], max_order=100)
+
+
+@pytest.mark.parametrize(
+    'generators,dimension', [
+        ([(C4, )], 1),
+        ([(C4, ), (C2X, )], 0),
+        ([(C4, sp.diag(1, -1))], 1),
+        ([(C2X, sp.diag(-1, 1))], 3),
+        ([(sp.eye(3), sp.eye(2))], 6),
+    ]
+)
+def test_invariant_dimension(generators, dimension):
+    """
+    Test the dimension of the invariant subspace computed from the characters.
+    """
+    assert invariant_dimension(generate_group(generators)) == dimension
+
+
+def test_generate_symmetry_group():
+    """
+    Test the group generated by symmetry operations which include an anti-unitary operation.
+    """
+    generators = [
+        SymmetryGroupElement(
+            rotation_matrix=C4,
+            repr_matrix=sp.diag(sp.I, -sp.I),
+            repr_has_cc=False
+        ),
+        SymmetryGroupElement(
+            rotation_matrix=sp.eye(3),
+            repr_matrix=sp.Matrix([[0, -1], [1, 0]]),
+            repr_has_cc=True
+        ),
+    ]
+    group = generate_symmetry_group(generators)
+    # the double group of C4 with time-reversal
+    assert len(group) == 16
+    assert group[0].rotation_matrix == sp.eye(3)
+    assert group[0].repr_matrix == sp.eye(2)
+    assert not group[0].repr_has_cc
+    assert sum(element.repr_has_cc for element in group) == 8
+
+
+@pytest.mark.parametrize(
+    'element', [
+        (C4, ),
+        (C4, sp.diag(1, -1)),
+        (C2X, sp.diag(-1, 1)),
+        (sp.eye(3), sp.eye(2)),
+        (sp.Matrix([[0, 1], [1, 0]]), sp.Matrix([[0, 1], [1, 0]])),
+    ]
+)
+def test_cyclic_invariant_dimension(element):
+    """
+    Test that the invariant dimension of a single element matches the one of the cyclic group it generates.
+    """
+    assert cyclic_invariant_dimension(element) == invariant_dimension(
+        generate_group([element])
+    )
+
+
+def test_generate_symmetry_group_infinite():
+    """
+    Test that an error is raised for a symmetry operation of infinite order, without closing the group exactly.
+    """
+    generators = [
+        SymmetryGroupElement(
+            rotation_matrix=sp.eye(3),
+            repr_matrix=sp.Matrix([[(3 + 4 * sp.I) / 5]]),
+            repr_has_cc=False
+        )
+    ]
+    with pytest.raises(ValueError):
+        generate_symmetry_group(generators)
+
+
+def test_cyclic_invariant_dimension_infinite():
+    """
+    Test that an error is raised for an element of infinite order.
+    """
+    with pytest.raises(ValueError):
+        cyclic_invariant_dimension((sp.Matrix([[(3 + 4 * sp.I) / 5]]), ))
@@ -0,0 +1,84 @@
+# © 2017-2018, ETH Zurich, Institut für Theoretische Physik
+# Author:  Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the compact result type of the symmetric Hamiltonian.
+"""
+
+import numpy as np
+import pytest
+import sympy as sp
+
+import kdotp_symmetry as kp
+
+
+def test_lazy_result(hamiltonian_case):
+    """
+    Test that the lazy result expands to the same matrices as the default result.
+    """
+    symmetry_operations, expr_basis, repr_basis, result = hamiltonian_case
+    lazy_result = kp.symmetric_hamiltonian(
+        *symmetry_operations,
+        expr_basis=expr_basis,
+        repr_basis=repr_basis,
+        lazy=True
+    )
+    assert isinstance(lazy_result, kp.SymmetricHamiltonianBasis)
+    assert len(lazy_result) == len(result)
+    assert list(lazy_result) == kp.symmetric_hamiltonian(
+        *symmetry_operations, expr_basis=expr_basis, repr_basis=repr_basis
+    )
+    assert lazy_result[-1] == lazy_result[len(result) - 1]
+    assert lazy_result[:2] == list(lazy_result)[:2]
+    with pytest.raises(IndexError):
+        lazy_result[len(result)]  # pylint: disable=pointless-statement
+
+
+def test_coefficient_tensor(hamiltonian_case):
+    """
+    Test that the coefficient tensor reproduces the basis matrices.
+    """
+    symmetry_operations, expr_basis, repr_basis, result = hamiltonian_case
+    lazy_result = kp.symmetric_hamiltonian(
+        *symmetry_operations,
+        expr_basis=expr_basis,
+        repr_basis=repr_basis,
+        lazy=True
+    )
+    tensor = lazy_result.coefficient_tensor()
+    dim = lazy_result.repr_basis[0].shape[0]
+    assert tensor.shape == (len(result), len(expr_basis), dim, dim)
+    for term, mat in zip(tensor, lazy_result):
+        assert sp.simplify(
+            sum((
+                expr * sp.Matrix(coeff)
+                for expr, coeff in zip(expr_basis, term)
+            ), sp.zeros(dim)) - mat
+        ) == sp.zeros(dim)
+    numeric_tensor = lazy_result.coefficient_tensor(numeric=True)
+    assert numeric_tensor.dtype == complex
+    assert np.allclose(numeric_tensor, tensor.astype(complex))
+
+
+def test_no_slots_dict():
+    """
+    Test that the result object does not have an instance dictionary.
+    """
+    basis = kp.SymmetricHamiltonianBasis(
+        sp.SparseMatrix(1, 4, {(0, 0): 1}),
+        expr_basis=kp.monomial_basis(0),
+        repr_basis=kp.hermitian_basis(2)
+    )
+    assert not hasattr(basis, '__dict__')
+    assert basis[0] == sp.Matrix([[1, 0], [0, 0]])
+
+
+def test_invalid_shape():
+    """
+    Test that an error is raised if the coefficients do not match the size of the product basis.
+    """
+    with pytest.raises(ValueError):
+        kp.SymmetricHamiltonianBasis(
+            sp.SparseMatrix(1, 3, {}),
+            expr_basis=kp.monomial_basis(0),
+            repr_basis=kp.hermitian_basis(2)
+        )
@@ -6,8 +6,9 @@ Tests for the Zassenhaus algorithm and basis intersection.
 
 import pytest
 import sympy as sp
+from sympy.physics.quantum import TensorProduct
 
-from kdotp_symmetry._linalg import zassenhaus, intersection_basis, nullspace_blocked
+from kdotp_symmetry._linalg import zassenhaus, intersection_basis, nullspace_blocked, sparse_nullspace_blocked, rref_basis, invariant_blocks, sparse_kron
 
 
 @pytest.mark.parametrize(
@@ -58,6 +59,22 @@ def test_zassenhaus_inconsistent_dim(input_bases):
         (([[1, 1, 0], [0, 1, 0]], [[0, 1, 1], [0, 0, 1]]), [[0, 1, 0]]),
         (([[1, 1, 0], [0, 1, 0]], [[0, 1, 1], [0, 0, 1]], [(0, 1, 0)
                                                            ]), [[0, 1, 0]]),
+        (
+            (
+                [[1, 0, 0], [0, 1, 0]],
+                [[1, 1, 0], [0, 0, 1]],
+                [[1, 1, 1], [2, 2, 0]],
+            ),
+            [[1, 1, 0]],
+        ),
+        (
+            (
+                [[1, sp.sqrt(3), 0], [0, 0, 1]],
+                [[2, 2 * sp.sqrt(3), 1]],
+                [[1, 0, 0], [0, 1, 0], [0, 0, 1]],
+            ),
+            [[1, sp.sqrt(3), sp.Rational(1, 2)]],
+        ),
     ]
 )
 def test_intersection_basis(input_bases, output_basis):
@@ -67,6 +84,14 @@ def test_intersection_basis(input_bases, output_basis):
     assert intersection_basis(*input_bases) == output_basis
 
 
+def test_intersection_basis_inconsistent_dim():
+    """
+    Test that the basis intersection raises an error when the input has inconsistent dimension.
+    """
+    with pytest.raises(ValueError):
+        intersection_basis([[1, 0, 0]], [[0, 1]])
+
+
 @pytest.mark.parametrize(
     'input_matrix', [
         ([[1, 1, 0], [0, 1, 0]]),
@@ -80,4 +105,104 @@ def test_nullspace_blocked(input_matrix):
     Test that the result of "nullspace_blocked" matches the sympy result.
     """
     mat = sp.Matrix(input_matrix)
-    assert sorted(mat.nullspace()) == sorted(nullspace_blocked(mat))
+    expected = sorted(mat.nullspace())
+    assert sorted(nullspace_blocked(mat)) == expected
+    assert sorted(nullspace_blocked(sp.SparseMatrix(mat))) == expected
+
+
+@pytest.mark.parametrize(
+    'input_matrix', [
+        ([[1, 1, 0], [0, 1, 0]]),
+        ([[1, 2, 0, 0], [2, 4, 0, 0], [0, 0, 1, sp.sqrt(2)]]),
+        ([[0, 1], [0, 1], [0, 4]]),
+    ]
+)
+def test_sparse_nullspace_blocked(input_matrix):
+    """
+    Test that "sparse_nullspace_blocked" returns the non-zero entries of the "nullspace_blocked" result.
+    """
+    mat = sp.SparseMatrix(input_matrix)
+    assert sparse_nullspace_blocked(mat) == [{
+        idx: val
+        for idx, val in enumerate(vec) if val != 0
+    } for vec in nullspace_blocked(mat)]
+
+
+def test_nullspace_blocked_executor(executor):
+    """
+    Test that the result of "nullspace_blocked" does not depend on the executor used for the independent blocks.
+    """
+    mat = sp.diag(
+        sp.Matrix([[1, 2], [2, 4]]), sp.Matrix([[1, sp.Rational(1, 3)]]),
+        sp.Matrix([[0, 1, 0], [0, 0, 1]])
+    )
+    expected = nullspace_blocked(mat)
+    assert nullspace_blocked(mat, executor=executor, max_workers=2) == expected
+
+
+def test_nullspace_blocked_invalid_executor():
+    """
+    Test that an invalid executor raises an error.
+    """
+    with pytest.raises(ValueError):
+        nullspace_blocked(sp.eye(2), executor='thread')
+
+
+@pytest.mark.parametrize(
+    'matrix_a,matrix_b', [
+        ([[1, 2], [0, 3]], [[0, 1], [1, 0]]),
+        ([[1, 0, sp.sqrt(2)]], [[1], [sp.I]]),
+        ([[0, 0], [0, 0]], [[1, 2], [3, 4]]),
+    ]
+)
+def test_sparse_kron(matrix_a, matrix_b):
+    """
+    Test that the sparse Kronecker product matches the dense tensor product.
+    """
+    result = sparse_kron(matrix_a, matrix_b)
+    assert isinstance(result, sp.SparseMatrix)
+    assert sp.Matrix(result) == TensorProduct(
+        sp.Matrix(matrix_a), sp.Matrix(matrix_b)
+    )
+
+
+@pytest.mark.parametrize(
+    'vectors,max_rank', [
+        ([[1, 1, 0], [0, 1, 0]], None),
+        ([[1, 2, 3], [2, 4, 6], [0, 0, 1]], None),
+        ([[0, 0, 0], [1, 2, 3]], None),
+        ([[1, sp.sqrt(3), 0], [sp.sqrt(3), 3, 1], [0, 1, 0]], None),
+        ([[1, 2, 3], [3, 4, 5], [6, 7, 8]], 2),
+    ]
+)
+def test_rref_basis(vectors, max_rank):
+    """
+    Test that "rref_basis" matches the result of sympy's rref.
+    """
+    mat, pivots = sp.Matrix(vectors).rref()
+    assert rref_basis(({i: val
+                        for i, val in enumerate(vec) if val != 0}
+                       for vec in vectors),
+                      dim=len(vectors[0]),
+                      max_rank=max_rank) == mat[:len(pivots), :].tolist()
+
+
+@pytest.mark.parametrize(
+    'matrices,blocks', [
+        ([[[1, 0, 0], [0, 0, 1], [0, 1, 0]]], [[0], [1, 2]]),
+        (
+            [
+                [[1, 0, 0], [0, 0, 1], [0, 1, 0]],
+                [[0, 1, 0], [1, 0, 0], [0, 0, 1]],
+            ],
+            [[0, 1, 2]],
+        ),
+        ([[[0, 0, 1], [0, 1, 0], [1, 0, 0]]], [[0, 2], [1]]),
+        ([[[1, 0], [0, 1]]], [[0], [1]]),
+    ]
+)
+def test_invariant_blocks(matrices, blocks):
+    """
+    Test the partition of indices into blocks which are invariant under the given matrices.
+    """
+    assert invariant_blocks([sp.Matrix(mat) for mat in matrices]) == blocks
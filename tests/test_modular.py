@@ -0,0 +1,113 @@
+# © 2017-2018, ETH Zurich, Institut für Theoretische Physik
+# Author:  Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the multi-modular linear algebra routines.
+"""
+
+import pytest
+import sympy as sp
+
+from kdotp_symmetry._modular import modular_rref, modular_nullspace, _primes
+from kdotp_symmetry._linalg import nullspace_blocked, intersection_basis
+
+LARGE = sp.Integer(2)**100
+
+FIRST_PRIME, _ = next(_primes())
+
+MATRICES = [
+    [[1, 1, 0], [0, 1, 0]],
+    [[1, 2, 3], [3, 4, 5], [6, 7, 8]],
+    [[0, 0, 0], [0, 0, 0]],
+    [[sp.Rational(1, 2), sp.I, 0, 1], [1, 2 * sp.I, 0, 2],
+     [0, 1 + sp.I, sp.Rational(-1, 3), 0]],
+    [[1 + sp.I, 2, 0, 0], [2, 2 - 2 * sp.I, 1 + sp.I, 0],
+     [0, 1 + sp.I, 2 * sp.I, 3], [0, 0, 3, 1 - sp.I]],
+    [[0, 0, 2, 4], [1, 0, 0, 0], [0, 3 * sp.I, 0, 0], [0, 0, 1, 2]],
+    [[LARGE + 1, 3, 1], [sp.Rational(1, 7), LARGE * sp.I, 0]],
+    [[1, 0], [0, FIRST_PRIME]],
+    [[FIRST_PRIME, 1], [1, 0]],
+]
+
+
+@pytest.mark.parametrize('input_matrix', MATRICES)
+def test_rref(input_matrix):
+    """
+    Test that the reduced row echelon form matches the sympy result.
+    """
+    mat = sp.Matrix(input_matrix)
+    rref_mat, pivots = mat.rref(simplify=True)
+    expected = (rref_mat.applyfunc(sp.expand), pivots)
+    assert modular_rref(mat) == expected
+
+
+@pytest.mark.parametrize('input_matrix', MATRICES)
+def test_nullspace(input_matrix):
+    """
+    Test that the nullspace matches the sympy result.
+    """
+    mat = sp.Matrix(input_matrix)
+    assert modular_nullspace(mat) == [
+        vec.applyfunc(sp.expand) for vec in mat.nullspace(simplify=True)
+    ]
+
+
+@pytest.mark.parametrize(
+    'input_matrix', [
+        [[1, sp.sqrt(2)], [sp.sqrt(2), 2]],
+        [[sp.Symbol('x'), 1]],
+    ]
+)
+def test_not_gaussian_rational(input_matrix):
+    """
+    Test that matrices with entries which are not Gaussian rationals are rejected, and handled by the sympy fallback in "nullspace_blocked".
+    """
+    mat = sp.Matrix(input_matrix)
+    assert modular_rref(mat) is None
+    assert modular_nullspace(mat) is None
+    assert nullspace_blocked(mat, solver='modular') == mat.nullspace()
+
+
+def test_max_primes():
+    """
+    Test that the reconstruction fails if the number of primes is not sufficient for the size of the entries.
+    """
+    mat = sp.Matrix([[LARGE + 1, 3], [2 * LARGE + 2, 6]])
+    assert modular_rref(mat, max_primes=1) is None
+    assert modular_rref(mat) == mat.rref()
+
+
+@pytest.mark.parametrize('input_matrix', MATRICES)
+def test_nullspace_blocked_solver(input_matrix):
+    """
+    Test that the result of "nullspace_blocked" does not depend on the solver.
+    """
+    mat = sp.Matrix(input_matrix)
+    assert nullspace_blocked(mat, solver='modular'
+                             ) == nullspace_blocked(mat, solver='exact')
+
+
+@pytest.mark.parametrize(
+    'bases', [
+        [[[1, 0, 0], [0, 1, 0]], [[0, 1, 0], [0, 0, 1]]],
+        [[[1, sp.I, 0], [0, 1, 1]], [[1, 0, -sp.I]],
+         [[2, 2 * sp.I, 0], [1, 0, -sp.I]]],
+        [[[1, 2], [3, 4]], [[1, 0]]],
+    ]
+)
+def test_intersection_basis_solver(bases):
+    """
+    Test that the result of "intersection_basis" does not depend on the solver.
+    """
+    assert intersection_basis(*bases, solver='modular'
+                              ) == intersection_basis(*bases, solver='exact')
+
+
+def test_invalid_solver():
+    """
+    Test that an invalid solver raises an error.
+    """
+    mat = sp.Matrix([[1, 0]])
+    with pytest.raises(ValueError):
+        nullspace_blocked(mat, solver='numeric')
+    with pytest.raises(ValueError):
+        intersection_basis([[1, 0]], [[0, 1]], solver='numeric')
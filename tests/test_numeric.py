@@ -0,0 +1,81 @@
+# © 2017-2018, ETH Zurich, Institut für Theoretische Physik
+# Author:  Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the floating-point linear algebra routines.
+"""
+
+import numpy as np
+import pytest
+import sympy as sp
+
+from kdotp_symmetry._numeric import to_numpy, numeric_nullspace, numeric_intersection, numeric_rref, rationalize
+
+MATRICES = [
+    [[1, 1, 0], [0, 1, 0]],
+    [[1, 2, 3], [3, 4, 5], [6, 7, 8]],
+    [[0, 1], [0, 1], [0, 4]],
+    [[sp.Rational(1, 2), sp.I, 0, 1], [1, 2 * sp.I, 0, 2],
+     [0, 1 + sp.I, sp.Rational(-1, 3), 0]],
+    [[0, 0, 2, 4], [1, 0, 0, 0], [0, 3 * sp.I, 0, 0], [0, 0, 1, 2]],
+    [[1, sp.sqrt(3), 0], [sp.sqrt(3), 3, 0]],
+]
+
+
+@pytest.mark.parametrize('input_matrix', MATRICES)
+def test_rref(input_matrix):
+    """
+    Test that the numeric reduced row echelon form matches the sympy result.
+    """
+    mat = sp.Matrix(input_matrix)
+    rref_mat, pivots = mat.rref(simplify=True)
+    numeric_mat, numeric_pivots = numeric_rref(to_numpy(mat), tolerance=1e-8)
+    assert numeric_pivots == pivots
+    assert np.allclose(
+        numeric_mat,
+        to_numpy(rref_mat.extract(range(len(pivots)), range(mat.shape[1])))
+    )
+
+
+@pytest.mark.parametrize('input_matrix', MATRICES)
+def test_nullspace(input_matrix):
+    """
+    Test that the numeric nullspace spans the same space as the sympy result.
+    """
+    mat = sp.Matrix(input_matrix)
+    nullspace = mat.nullspace(simplify=True)
+    numeric_basis = numeric_nullspace(to_numpy(mat), dimension=len(nullspace))
+    assert np.allclose(to_numpy(mat) @ numeric_basis, 0)
+    assert np.allclose(
+        numeric_basis.conj().T @ numeric_basis, np.eye(len(nullspace))
+    )
+
+
+def test_intersection():
+    """
+    Test the intersection of two subspaces given by orthonormal bases.
+    """
+    basis_a = np.array([[1, 0], [0, 1], [0, 0]], dtype=complex)
+    basis_b = np.array([[0, 0], [1, 0], [0, 1]], dtype=complex)
+    res = numeric_intersection(basis_a, basis_b, tolerance=1e-8)
+    assert res.shape == (3, 1)
+    assert np.allclose(np.abs(res[:, 0]), [0, 1, 0])
+    assert numeric_intersection(basis_a, basis_b[:, 1:],
+                                tolerance=1e-8).shape == (3, 0)
+
+
+@pytest.mark.parametrize(
+    'value', [
+        sp.Integer(0),
+        sp.Rational(-2, 3),
+        sp.sqrt(3) / 2,
+        sp.Rational(1, 2) - sp.I * sp.sqrt(3) / 2,
+        2 * sp.I,
+    ]
+)
+def test_rationalize(value):
+    """
+    Test that simple exact numbers are recovered from their floating-point value.
+    """
+    assert sp.simplify(
+        rationalize(complex(value), tolerance=1e-8) - value
+    ) == 0
@@ -0,0 +1,138 @@
+# © 2017-2018, ETH Zurich, Institut für Theoretische Physik
+# Author:  Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the floating-point calculation of the symmetric Hamiltonian.
+"""
+
+import numpy as np
+import pytest
+import sympy as sp
+import symmetry_representation as sr
+
+import kdotp_symmetry as kp
+from kdotp_symmetry._expr_utils import K_VEC
+from kdotp_symmetry._numeric import to_numpy
+
+
+def _to_coefficients(matrices, *, expr_basis):
+    """
+    Converts matrices given as sympy expressions of a monomial basis into an array of coefficients, as returned by ``numeric_symmetric_hamiltonian``.
+    """
+    monomials = [sp.Poly(b, *K_VEC).monoms()[0] for b in expr_basis]
+    res = []
+    for mat in matrices:
+        mat = sp.Matrix(mat)
+        coefficients = np.zeros((len(expr_basis), *mat.shape), dtype=complex)
+        for i in range(mat.shape[0]):
+            for j in range(mat.shape[1]):
+                poly = sp.Poly(sp.expand(mat[i, j]), *K_VEC)
+                for monomial, coeff in poly.as_dict().items():
+                    coefficients[monomials.index(monomial), i,
+                                 j] = complex(coeff)
+        res.append(coefficients)
+    return np.array(res)
+
+
+def _same_span(coefficients_a, coefficients_b):
+    """
+    Checks whether two arrays of coefficients span the same space.
+    """
+    mat_a = coefficients_a.reshape(len(coefficients_a), -1)
+    mat_b = coefficients_b.reshape(len(coefficients_b), -1)
+    rank = np.linalg.matrix_rank
+    return rank(mat_a) == rank(mat_b) == rank(np.concatenate([mat_a, mat_b]))
+
+
+def test_numeric_symmetric_hamiltonian(hamiltonian_case):
+    """
+    Test that the numeric result spans the same space as the exact reference result.
+    """
+    symmetry_operations, expr_basis, repr_basis, result = hamiltonian_case
+    coefficients = kp.numeric_symmetric_hamiltonian(
+        *symmetry_operations, expr_basis=expr_basis, repr_basis=repr_basis
+    )
+    assert coefficients.shape[:2] == (len(result), len(expr_basis))
+    assert _same_span(
+        coefficients, _to_coefficients(result, expr_basis=expr_basis)
+    )
+
+
+@pytest.mark.parametrize('order', [0, 1, 2, 3])
+def test_numeric_symmetry_operations(order):
+    """
+    Test that numeric symmetry operations of a threefold rotation give the same result as the exact ones.
+    """
+    sqrt_3 = sp.sqrt(3)
+    phase = -sp.Rational(1, 2) + sp.I * sqrt_3 / 2
+    rotation_matrices = [
+        sp.Matrix([[-sp.Rational(1, 2), -sqrt_3 / 2, 0],
+                   [sqrt_3 / 2, -sp.Rational(1, 2), 0], [0, 0, 1]]),
+        sp.Matrix([[1, 0, 0], [0, -1, 0], [0, 0, 1]])
+    ]
+    repr_matrices = [
+        sp.diag(phase, sp.conjugate(phase)),
+        sp.Matrix([[0, 1], [1, 0]])
+    ]
+    exact_operations = [
+        sr.SymmetryOperation(
+            rotation_matrix=rot,
+            repr_matrix=rep,
+            repr_has_cc=False,
+            numeric=False
+        ) for rot, rep in zip(rotation_matrices, repr_matrices)
+    ]
+    numeric_operations = [
+        sr.SymmetryOperation(
+            rotation_matrix=to_numpy(rot).real,
+            repr_matrix=to_numpy(rep),
+            repr_has_cc=False,
+            numeric=True
+        ) for rot, rep in zip(rotation_matrices, repr_matrices)
+    ]
+    expr_basis = kp.monomial_basis(order)
+    coefficients = kp.numeric_symmetric_hamiltonian(
+        *numeric_operations, expr_basis=expr_basis
+    )
+    assert np.allclose(
+        coefficients, np.conj(np.swapaxes(coefficients, -1, -2))
+    )
+    assert _same_span(
+        coefficients,
+        _to_coefficients(
+            kp.symmetric_hamiltonian(*exact_operations, expr_basis=expr_basis),
+            expr_basis=expr_basis
+        )
+    )
+
+
+def test_exact_rejects_numeric():
+    """
+    Test that the exact calculation raises an error for numeric symmetry operations.
+    """
+    with pytest.raises(ValueError):
+        kp.symmetric_hamiltonian(
+            sr.SymmetryOperation(
+                rotation_matrix=np.eye(3),
+                repr_matrix=np.eye(2),
+                repr_has_cc=False,
+                numeric=True
+            ),
+            expr_basis=kp.monomial_basis(0)
+        )
+
+
+def test_non_polynomial_basis():
+    """
+    Test that an error is raised for an expression basis which is not polynomial.
+    """
+    kx = K_VEC[0]
+    with pytest.raises(ValueError):
+        kp.numeric_symmetric_hamiltonian(
+            sr.SymmetryOperation(
+                rotation_matrix=np.eye(3),
+                repr_matrix=np.eye(2),
+                repr_has_cc=False,
+                numeric=True
+            ),
+            expr_basis=[sp.sin(kx)]
+        )
@@ -0,0 +1,137 @@
+# © 2017-2018, ETH Zurich, Institut für Theoretische Physik
+# Author:  Dominik Gresch <greschd@gmx.ch>
+"""
+Tests for the profiling hooks of the calculation stages.
+"""
+
+import pstats
+
+import pytest
+import sympy as sp
+
+import kdotp_symmetry as kp
+from kdotp_symmetry._profiling import stage
+from kdotp_symmetry._linalg import nullspace_blocked
+
+
+def _events_by_stage(events):
+    """
+    Returns a dictionary mapping the stage names to the list of their events.
+    """
+    res = {}
+    for event in events:
+        res.setdefault(event.stage, []).append(event)
+    return res
+
+
+@pytest.mark.parametrize(
+    'method', ['nullspace', 'projector', 'incremental', 'numeric']
+)
+def test_symmetric_hamiltonian_events(method, spinful_case):
+    """
+    Test that the stages of the calculation are reported, and the total dimension matches the result.
+    """
+    symmetry_operations, expr_basis, repr_basis, result = spinful_case
+    with kp.profile_stages() as events:
+        kp.symmetric_hamiltonian(
+            *symmetry_operations,
+            expr_basis=expr_basis,
+            repr_basis=repr_basis,
+            method=method
+        )
+    by_stage = _events_by_stage(events)
+    # the outermost stage ends last
+    assert events[-1].stage == 'symmetric_hamiltonian'
+    assert events[-1].info['dimension'] == len(result)
+    assert by_stage['invariant_blocks'][0].info['dimension'] == len(result)
+    assert by_stage['symmetry_group'][0].info['group_order'] > 1
+    for event in events:
+        assert event.wall_time >= 0
+        assert event.cpu_time >= 0
+        assert event.peak_memory is None
+        assert event.profile is None
+    assert all(
+        'block' in event.context for event in by_stage.get('operation', []) +
+        by_stage.get('projector', [])
+    )
+
+
+def test_nullspace_events(spinful_case):
+    """
+    Test the per-operation events of the 'nullspace' method.
+    """
+    symmetry_operations, expr_basis, repr_basis, _ = spinful_case
+    with kp.profile_stages() as events:
+        kp.symmetric_hamiltonian(
+            *symmetry_operations, expr_basis=expr_basis, repr_basis=repr_basis
+        )
+    by_stage = _events_by_stage(events)
+    num_blocks = by_stage['invariant_blocks'][0].info['num_blocks']
+    assert len(by_stage['operation']) == num_blocks * len(symmetry_operations)
+    for event in by_stage['operation']:
+        assert event.info['dimension'] == event.info['expected_dimension']
+    for event in by_stage['outer_product'] + by_stage['nullspace_blocked']:
+        assert 'operation' in event.context
+        assert event.info['nnz'] > 0
+    for event in by_stage['nullspace_blocked']:
+        assert event.info['num_components'] == len(
+            event.info['component_shapes']
+        )
+
+
+def test_callback_and_profile(linear_case):
+    """
+    Test that the callback receives the events, and the profile and memory are captured.
+    """
+    symmetry_operations, expr_basis, repr_basis, _ = linear_case
+    received = []
+    with kp.profile_stages(
+        received.append, cprofile={'nullspace_blocked'}, trace_memory=True
+    ) as events:
+        kp.symmetric_hamiltonian(
+            *symmetry_operations, expr_basis=expr_basis, repr_basis=repr_basis
+        )
+    assert received == events
+    for event in events:
+        assert event.peak_memory >= 0
+        if event.stage == 'nullspace_blocked':
+            assert isinstance(event.profile, pstats.Stats)
+        else:
+            assert event.profile is None
+
+
+def test_nested_profile():
+    """
+    Test that stages inside a profiled stage are not profiled.
+    """
+    with kp.profile_stages(cprofile=True) as events:
+        with stage('outer', index=1):
+            with stage('inner') as info:
+                info['size'] = 3
+    inner, outer = events
+    assert inner.context == {'index': 1}
+    assert inner.info == {'size': 3}
+    assert inner.profile is None
+    assert isinstance(outer.profile, pstats.Stats)
+
+
+def test_error_event():
+    """
+    Test that a stage which raises an error is still reported.
+    """
+    with kp.profile_stages() as events:
+        with pytest.raises(ValueError):
+            with stage('failing'):
+                raise ValueError('error')
+    assert events[0].stage == 'failing'
+    assert 'error' in events[0].info
+
+
+def test_inactive():
+    """
+    Test that no events are recorded outside of the profile_stages context.
+    """
+    with kp.profile_stages() as events:
+        pass
+    nullspace_blocked(sp.Matrix([[1, 1], [0, 0]]))
+    assert events == []
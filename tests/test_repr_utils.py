@@ -6,8 +6,10 @@ Tests for utilities handling matrix representations of symmetries.
 
 import pytest
 import sympy as sp
+from sympy.physics.quantum import TensorProduct
 
-from kdotp_symmetry._repr_utils import frobenius_product, hermitian_basis, hermitian_to_vector
+from kdotp_symmetry._repr_utils import frobenius_product, hermitian_basis, hermitian_to_vector, repr_to_matrix, repr_to_matrix_operator, repr_trace
+from kdotp_symmetry._to_matrix import to_matrix
 
 SIGMA_0 = sp.Matrix([[1, 0], [0, 1]])
 SIGMA_X = sp.Matrix([[0, 1], [1, 0]])
@@ -78,3 +80,109 @@ def test_hermitian_to_vector(mat, vec, basis):
     Test that a Hermitian matrix is correctly converted to a vector.
     """
     assert hermitian_to_vector(mat, basis) == vec
+
+
+@pytest.mark.parametrize(
+    'matrix_representation', [
+        SIGMA_X,
+        SIGMA_Y,
+        sp.diag(
+            sp.exp(-sp.I * sp.pi * sp.Rational(2, 3)),
+            sp.exp(sp.I * sp.pi * sp.Rational(2, 3))
+        ),
+        sp.Matrix([[1, sp.I], [sp.I, 1]]) / sp.sqrt(2),
+        sp.Matrix([[0, -1, 0], [1, 0, 0], [0, 0, sp.I]]),
+        sp.diag(
+            sp.exp(sp.I * sp.pi * sp.Rational(2, 3)),
+            sp.exp(-sp.I * sp.pi * sp.Rational(2, 3)), 1
+        ),
+    ]
+)
+@pytest.mark.parametrize('complex_conjugate', [False, True])
+def test_repr_to_matrix(matrix_representation, complex_conjugate):
+    """
+    Test that the direct construction of the representation matrix for the hermitian basis matches the result from applying the operator to each basis element.
+    """
+    basis = hermitian_basis(matrix_representation.shape[0])
+    assert repr_to_matrix(
+        matrix_representation,
+        basis=basis,
+        complex_conjugate=complex_conjugate
+    ) == to_matrix(
+        operator=repr_to_matrix_operator(
+            matrix_representation, complex_conjugate=complex_conjugate
+        ),
+        basis=basis,
+        to_vector_fct=hermitian_to_vector
+    )
+
+
+def test_repr_to_matrix_sparse():
+    """
+    Test that the representation matrix for the hermitian basis is sparse, and that modifying it does not change the cached result.
+    """
+    matrix_representation = TensorProduct(SIGMA_X, SIGMA_Y)
+    basis = hermitian_basis(4)
+    result = repr_to_matrix(matrix_representation, basis=basis)
+    assert isinstance(result, sp.SparseMatrix)
+    assert result.nnz() == 16
+    expected = result.copy()
+    result[0, 0] = 5
+    assert repr_to_matrix(matrix_representation, basis=basis) == expected
+
+
+@pytest.mark.parametrize('complex_conjugate', [False, True])
+def test_repr_to_matrix_general_basis(complex_conjugate):
+    """
+    Test the representation matrix for a basis other than the hermitian basis.
+    """
+    matrix_representation = TensorProduct(SIGMA_X, SIGMA_Y)
+    basis = [TensorProduct(s1, s2) for s1 in SIGMA_VEC for s2 in SIGMA_VEC]
+    assert repr_to_matrix(
+        matrix_representation,
+        basis=basis,
+        complex_conjugate=complex_conjugate
+    ) == to_matrix(
+        operator=repr_to_matrix_operator(
+            matrix_representation, complex_conjugate=complex_conjugate
+        ),
+        basis=basis,
+        to_vector_fct=hermitian_to_vector
+    )
+
+
+@pytest.mark.parametrize(
+    'matrix_representation', [
+        SIGMA_Y,
+        sp.Matrix([[1, sp.I], [sp.I, 1]]) / sp.sqrt(2),
+        sp.Matrix([[0, -1, 0], [1, 0, 0], [0, 0, sp.I]]),
+        sp.diag(
+            sp.exp(sp.I * sp.pi * sp.Rational(2, 3)),
+            sp.exp(-sp.I * sp.pi * sp.Rational(2, 3)), 1
+        ),
+    ]
+)
+@pytest.mark.parametrize('complex_conjugate', [False, True])
+@pytest.mark.parametrize('partial_basis', [False, True])
+def test_repr_trace(matrix_representation, complex_conjugate, partial_basis):
+    """
+    Test that the trace of the representation matrix is computed correctly, for the full hermitian basis and for the diagonal matrices only.
+    """
+    dim = matrix_representation.shape[0]
+    basis = hermitian_basis(dim)
+    if partial_basis:
+        basis = basis[:dim]
+        matrix_representation = sp.diag(
+            *[matrix_representation[i, i] for i in range(dim)]
+        )
+    trace = repr_trace(
+        matrix_representation,
+        basis=basis,
+        complex_conjugate=complex_conjugate
+    )
+    expected = repr_to_matrix(
+        matrix_representation,
+        basis=basis,
+        complex_conjugate=complex_conjugate
+    ).trace()
+    assert sp.simplify(sp.expand_complex(trace - expected)) == 0
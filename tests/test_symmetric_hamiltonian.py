@@ -4,92 +4,314 @@
 Tests for the function to compute the basis of a symmetry-constrained Hamiltonian.
 """
 
+import concurrent.futures
+
 import pytest
 import sympy as sp
-from sympy import Matrix
 from sympy.core.numbers import I
-import sympy.physics.matrices as sm
-from sympy.physics.quantum import TensorProduct
 import symmetry_representation as sr
 
 import kdotp_symmetry as kp
 
 kx, ky, kz = sp.symbols('kx, ky, kz')
-PAULI_VEC = [sp.eye(2), *(sm.msigma(i) for i in range(1, 4))]
 
 
-@pytest.mark.parametrize(
-    'symmetry_operations,expr_basis,repr_basis,result', [
-        (
-            [
-                sr.SymmetryOperation(
-                    rotation_matrix=[[0, 1, 0], [1, 0, 0], [0, 0, 1]],
-                    repr_matrix=[[0, 1], [1, 0]],
-                    repr_has_cc=False,
-                    numeric=False
-                )
-            ], kp.monomial_basis(0), 'auto',
-            [Matrix([[1, 0], [0, 1]]),
-             Matrix([[0, 1], [1, 0]])]
-        ), (
-            [
-                sr.SymmetryOperation(
-                    rotation_matrix=[[0, 1, 0], [1, 0, 0], [0, 0, 1]],
-                    repr_matrix=[[0, 1], [1, 0]],
-                    repr_has_cc=False,
-                    numeric=False
-                )
-            ], kp.monomial_basis(1), 'auto', [
-                Matrix([[kx, 0], [0, ky]]),
-                Matrix([[ky, 0], [0, kx]]),
-                Matrix([[0, kx + ky], [kx + ky, 0]]),
-                Matrix([[0, I * kx - I * ky], [-I * kx + I * ky, 0]]),
-                Matrix([[kz, 0], [0, kz]]),
-                Matrix([[0, kz], [kz, 0]])
-            ]
-        ), (
-            [
-                sr.SymmetryOperation(
-                    rotation_matrix=[[0, 1, 0], [1, 0, 0], [0, 0, -1]],
-                    repr_matrix=sp.diag(I, -I, I, -I),
-                    repr_has_cc=False,
-                    numeric=False
-                ),
-                sr.SymmetryOperation(
-                    rotation_matrix=-sp.eye(3),
-                    repr_matrix=sp.diag(1, 1, -1, -1),
-                    repr_has_cc=False,
-                    numeric=False
-                ),
-                sr.SymmetryOperation(
-                    rotation_matrix=sp.eye(3),
-                    repr_matrix=TensorProduct(
-                        sp.eye(2), sp.Matrix([[0, -1], [1, 0]])
-                    ),
-                    repr_has_cc=True,
-                    numeric=False
-                )
-            ], kp.monomial_basis(0),
-            [TensorProduct(p1, p2) for p1 in PAULI_VEC for p2 in PAULI_VEC], [
-                Matrix(
-                    [[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]]
-                ),
-                Matrix(
-                    [[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, -1, 0], [0, 0, 0, -1]]
-                ),
-            ]
-        )
-    ]
-)  # yapf: disable
-def test_symmetric_hamiltonian(
-    symmetry_operations, expr_basis, repr_basis, result
-):
+def test_symmetric_hamiltonian(hamiltonian_case):
     """
     Test the method for calculating the symmetric Hamiltonian.
     """
+    symmetry_operations, expr_basis, repr_basis, result = hamiltonian_case
     assert sorted(
         kp.symmetric_hamiltonian(
             *symmetry_operations, expr_basis=expr_basis, repr_basis=repr_basis
         ),
         key=str
     ) == sorted(result, key=str)
+
+
+def _coefficient_span(matrices):
+    """
+    Returns the reduced row echelon form of the given matrices, written as vectors of the polynomial coefficients of their entries.
+    """
+    coefficients = []
+    for mat in matrices:
+        mat = sp.Matrix(mat)
+        mat_coefficients = {}
+        for i in range(mat.shape[0]):
+            for j in range(mat.shape[1]):
+                poly = sp.Poly(sp.expand(mat[i, j]), kx, ky, kz)
+                for monomial, coeff in poly.as_dict().items():
+                    mat_coefficients[(i, j, monomial)] = coeff
+        coefficients.append(mat_coefficients)
+    keys = sorted(set().union(*coefficients))
+    mat, pivots = sp.Matrix([[c.get(k, 0) for k in keys]
+                             for c in coefficients]).rref()
+    assert len(pivots) == len(matrices)
+    return mat
+
+
+@pytest.mark.parametrize('method', ['projector', 'incremental', 'numeric'])
+def test_symmetric_hamiltonian_method(hamiltonian_case, method):
+    """
+    Test that the alternative methods span the same space as the reference result.
+    """
+    symmetry_operations, expr_basis, repr_basis, result = hamiltonian_case
+    assert _coefficient_span(
+        kp.symmetric_hamiltonian(
+            *symmetry_operations,
+            expr_basis=expr_basis,
+            repr_basis=repr_basis,
+            method=method
+        )
+    ) == _coefficient_span(result)
+
+
+def test_symmetric_hamiltonian_dimension(hamiltonian_case):
+    """
+    Test that the predicted dimension matches the size of the reference result.
+    """
+    symmetry_operations, expr_basis, repr_basis, result = hamiltonian_case
+    assert kp.symmetric_hamiltonian_dimension(
+        *symmetry_operations, expr_basis=expr_basis, repr_basis=repr_basis
+    ) == len(result)
+
+
+def test_infinite_order(caplog):
+    """
+    Test that the 'nullspace' method works for a symmetry operation of infinite order, which does not generate a finite group, and that the skipped dimension checks are logged.
+    """
+    symmetry_operations = [
+        sr.SymmetryOperation(
+            rotation_matrix=sp.eye(3),
+            repr_matrix=sp.diag((3 + 4 * I) / 5, 1),
+            repr_has_cc=False,
+            numeric=False
+        )
+    ]
+    expr_basis = kp.monomial_basis(0, 1)
+    result = kp.symmetric_hamiltonian(
+        *symmetry_operations, expr_basis=expr_basis
+    )
+    assert len(result) == 2 * len(expr_basis)
+    for mat in result:
+        assert mat[0, 1] == 0
+        assert mat[1, 0] == 0
+    warnings = [
+        record.getMessage() for record in caplog.records
+        if record.levelname == 'WARNING'
+    ]
+    assert any('finite group' in message for message in warnings)
+    assert any('finite order' in message for message in warnings)
+
+
+@pytest.mark.parametrize(
+    'method', ['nullspace', 'projector', 'incremental', 'numeric']
+)
+def test_symmetric_hamiltonian_mixed_degrees(method, spinful_case):
+    """
+    Test that the result for an expression basis with several degrees spans the same space as the results for each degree.
+    """
+    symmetry_operations, _, repr_basis, _ = spinful_case
+    separate_results = []
+    for order in range(3):
+        separate_results.extend(
+            kp.symmetric_hamiltonian(
+                *symmetry_operations,
+                expr_basis=kp.monomial_basis(order),
+                repr_basis=repr_basis
+            )
+        )
+    assert _coefficient_span(
+        kp.symmetric_hamiltonian(
+            *symmetry_operations,
+            expr_basis=kp.monomial_basis(*range(3)),
+            repr_basis=repr_basis,
+            method=method
+        )
+    ) == _coefficient_span(separate_results)
+
+
+@pytest.mark.parametrize('order', [1, 2, 3])
+def test_numeric_irrational(order):
+    """
+    Test the 'numeric' method for a threefold rotation, where the symmetry operations and the basis contain irrational entries.
+    """
+    sqrt_3 = sp.sqrt(3)
+    phase = -sp.Rational(1, 2) + I * sqrt_3 / 2
+    symmetry_operations = [
+        sr.SymmetryOperation(
+            rotation_matrix=[[-sp.Rational(1, 2), -sqrt_3 / 2, 0],
+                             [sqrt_3 / 2, -sp.Rational(1, 2), 0], [0, 0, 1]],
+            repr_matrix=sp.diag(phase, sp.conjugate(phase)),
+            repr_has_cc=False,
+            numeric=False
+        ),
+        sr.SymmetryOperation(
+            rotation_matrix=[[1, 0, 0], [0, -1, 0], [0, 0, 1]],
+            repr_matrix=[[0, 1], [1, 0]],
+            repr_has_cc=False,
+            numeric=False
+        )
+    ]
+    expr_basis = kp.monomial_basis(order)
+    assert _coefficient_span(
+        kp.symmetric_hamiltonian(
+            *symmetry_operations, expr_basis=expr_basis, method='numeric'
+        )
+    ) == _coefficient_span(
+        kp.symmetric_hamiltonian(*symmetry_operations, expr_basis=expr_basis)
+    )
+
+
+def test_numeric_fallback(monkeypatch, linear_case):
+    """
+    Test that the 'numeric' method falls back to the exact calculation if the exact basis can not be recovered.
+    """
+    monkeypatch.setattr(
+        kp._symmetric_hamiltonian,  # pylint: disable=protected-access
+        'rationalize',
+        lambda value, **kwargs: sp.Integer(1)
+    )
+    symmetry_operations, expr_basis, repr_basis, result = linear_case
+    assert _coefficient_span(
+        kp.symmetric_hamiltonian(
+            *symmetry_operations,
+            expr_basis=expr_basis,
+            repr_basis=repr_basis,
+            method='numeric'
+        )
+    ) == _coefficient_span(result)
+
+
+def test_symmetric_hamiltonian_orders(spinful_case):
+    """
+    Test that computing several orders at once gives the same result as computing each order separately.
+    """
+    symmetry_operations, _, repr_basis, _ = spinful_case
+    orders = [2, 0, 1]
+    results = list(
+        kp.symmetric_hamiltonian_orders(
+            *symmetry_operations, orders=orders, repr_basis=repr_basis
+        )
+    )
+    assert [order for order, _ in results] == orders
+    for order, result in results:
+        assert result == kp.symmetric_hamiltonian(
+            *symmetry_operations,
+            expr_basis=kp.monomial_basis(order),
+            repr_basis=repr_basis
+        )
+
+
+def test_symmetric_hamiltonian_executor(executor, spinful_case):
+    """
+    Test that computing the symmetry operations with an executor gives the same result as the serial computation.
+    """
+    symmetry_operations, expr_basis, repr_basis, _ = spinful_case
+    assert kp.symmetric_hamiltonian(
+        *symmetry_operations,
+        expr_basis=expr_basis,
+        repr_basis=repr_basis,
+        executor=executor,
+        max_workers=2
+    ) == kp.symmetric_hamiltonian(
+        *symmetry_operations, expr_basis=expr_basis, repr_basis=repr_basis
+    )
+
+
+def test_invalid_method():
+    """
+    Test that an error is raised for an invalid method.
+    """
+    with pytest.raises(ValueError):
+        kp.symmetric_hamiltonian(
+            sr.SymmetryOperation(
+                rotation_matrix=sp.eye(3),
+                repr_matrix=sp.eye(2),
+                repr_has_cc=False,
+                numeric=False
+            ),
+            expr_basis=kp.monomial_basis(0),
+            method='invalid'
+        )
+
+
+def test_orders_invalid_method():
+    """
+    Test that the input of "symmetric_hamiltonian_orders" is checked when it is called, before the results are generated.
+    """
+    with pytest.raises(ValueError):
+        kp.symmetric_hamiltonian_orders(
+            sr.SymmetryOperation(
+                rotation_matrix=sp.eye(3),
+                repr_matrix=sp.eye(2),
+                repr_has_cc=False,
+                numeric=False
+            ),
+            orders=[0],
+            method='invalid'
+        )
+
+
+def test_invalid_executor():
+    """
+    Test that an error is raised for an invalid executor.
+    """
+    with pytest.raises(ValueError):
+        kp.symmetric_hamiltonian(
+            sr.SymmetryOperation(
+                rotation_matrix=sp.eye(3),
+                repr_matrix=sp.eye(2),
+                repr_has_cc=False,
+                numeric=False
+            ),
+            expr_basis=kp.monomial_basis(0),
+            executor='invalid'
+        )
+
+
+def test_process_pool_created_once(monkeypatch, spinful_case):
+    """
+    Test that only one process pool is created when computing several orders with the 'process' executor.
+    """
+    pools = []
+
+    class CountingProcessPoolExecutor(concurrent.futures.ProcessPoolExecutor):
+        """
+        Process pool which records its creation.
+        """
+        def __init__(self, *args, **kwargs):
+            pools.append(self)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(
+        concurrent.futures, 'ProcessPoolExecutor', CountingProcessPoolExecutor
+    )
+    symmetry_operations, _, repr_basis, _ = spinful_case
+    results = list(
+        kp.symmetric_hamiltonian_orders(
+            *symmetry_operations,
+            orders=[0, 1],
+            repr_basis=repr_basis,
+            executor='process',
+            max_workers=2
+        )
+    )
+    assert len(results) == 2
+    assert len(pools) == 1
+
+
+@pytest.mark.parametrize('method', ['projector', 'incremental', 'numeric'])
+def test_executor_invalid_method(method, spinful_case):
+    """
+    Test that an error is raised when an executor is given for a method which does not use it.
+    """
+    symmetry_operations, expr_basis, repr_basis, _ = spinful_case
+    with pytest.raises(ValueError):
+        kp.symmetric_hamiltonian(
+            *symmetry_operations,
+            expr_basis=expr_basis,
+            repr_basis=repr_basis,
+            method=method,
+            executor='process'
+        )
@@ -7,10 +7,10 @@ Tests for turning hermitian matrices and algebraic expressions into matrix form.
 import pytest
 import sympy as sp
 
-from kdotp_symmetry._to_matrix import to_matrix
+from kdotp_symmetry._to_matrix import to_matrix, matrix_cache_info, clear_matrix_cache
 
-from kdotp_symmetry._expr_utils import expr_to_vector, monomial_basis, matrix_to_expr_operator
-from kdotp_symmetry._repr_utils import hermitian_to_vector, hermitian_basis, repr_to_matrix_operator
+from kdotp_symmetry._expr_utils import expr_to_vector, monomial_basis, matrix_to_expr_operator, matrix_to_expr_matrix
+from kdotp_symmetry._repr_utils import hermitian_to_vector, hermitian_basis, repr_to_matrix_operator, repr_to_matrix
 
 
 @pytest.mark.parametrize(
@@ -93,3 +93,25 @@ def test_to_matrix(operator, basis, to_vector_fct, result):
     assert to_matrix(
         operator=operator, basis=basis, to_vector_fct=to_vector_fct
     ) == result
+
+
+def test_matrix_cache():
+    """
+    Test that repeated conversions of the same operator are taken from the cache, and that the cached matrices can not be modified through the result.
+    """
+    clear_matrix_cache()
+    matrix_form = [[0, 1, 0], [1, 0, 0], [0, 0, -1]]
+    result = matrix_to_expr_matrix(matrix_form, basis=monomial_basis(1))
+    assert matrix_cache_info()['expr_matrix'].misses == 1
+    result[0, 0] = 5
+    assert matrix_to_expr_matrix(
+        sp.Matrix(matrix_form), basis=monomial_basis(1)
+    ) == sp.Matrix([[0, 1, 0], [1, 0, 0], [0, 0, -1]])
+    info = matrix_cache_info()['expr_matrix']
+    assert (info.hits, info.misses) == (1, 1)
+    repr_to_matrix(sp.eye(2), basis=hermitian_basis(2))
+    repr_to_matrix(sp.eye(2), basis=hermitian_basis(2))
+    info = matrix_cache_info()['repr_matrix']
+    assert (info.hits, info.misses) == (1, 1)
+    clear_matrix_cache()
+    assert matrix_cache_info()['repr_matrix'].currsize == 0